@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+مقارنة أداء بروتوكولي الاتصال بـ Odoo: XML-RPC مقابل JSON-RPC
+
+يجلب نفس الصفحات (search_read مع keyset pagination) بكل بروتوكول ويعرض
+الزمن الكلي، متوسط زمن الطلب، حجم البيانات المستقبلة، وعدد السجلات في الثانية.
+
+مثال:
+    python scripts/benchmarks/bench_odoo_transports.py --model product.product --pages 10
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from odoo_client import OdooClient, PROTOCOLS, JSON_CODEC
+
+ODOO_URL = os.getenv('ODOO_URL', 'https://health-path.erp-ksa.aumet.com')
+ODOO_DB = os.getenv('ODOO_DB', 'health-path.erp-ksa.aumet.com')
+ODOO_USERNAME = os.getenv('ODOO_USERNAME', '')
+ODOO_PASSWORD = os.getenv('ODOO_PASSWORD', '')
+
+DEFAULT_FIELDS = {
+    'pos.order': ['name', 'partner_id', 'date_order', 'amount_total', 'state', 'write_date'],
+    'res.partner': ['name', 'email', 'phone', 'mobile', 'city', 'country_id', 'customer_rank'],
+    'product.product': ['name', 'default_code', 'list_price', 'standard_price', 'categ_id', 'qty_available'],
+    'stock.quant': ['product_id', 'location_id', 'quantity', 'reserved_quantity'],
+}
+
+
+def run_protocol(protocol, model, fields, pages, page_size, url=ODOO_URL):
+    """جلب pages صفحة بالبروتوكول المحدد وإرجاع القياسات"""
+    odoo = OdooClient(url, ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD, protocol=protocol)
+    odoo.authenticate()
+
+    records = 0
+    calls = 0
+    last_id = 0
+    started = time.perf_counter()
+    for _ in range(pages):
+        page = odoo.execute_kw(
+            model, 'search_read',
+            [[['id', '>', last_id]]],
+            {'fields': fields, 'limit': page_size, 'order': 'id asc'}
+        )
+        calls += 1
+        records += len(page)
+        if len(page) < page_size:
+            break
+        last_id = page[-1]['id']
+    seconds = time.perf_counter() - started
+
+    return {
+        'protocol': protocol,
+        'records': records,
+        'calls': calls,
+        'seconds': seconds,
+        'ms_per_call': seconds * 1000 / max(calls, 1),
+        'kb_received': odoo.bytes_received / 1024,
+        'records_per_second': records / seconds if seconds else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='مقارنة XML-RPC و JSON-RPC مع Odoo')
+    parser.add_argument('--url', default=ODOO_URL)
+    parser.add_argument('--model', default='product.product')
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3, help='عدد التكرارات لكل بروتوكول (يُعرض الأفضل)')
+    args = parser.parse_args(argv)
+
+    fields = DEFAULT_FIELDS.get(args.model, ['name'])
+    print(f"📊 {args.model}: {args.pages} صفحة × {args.page_size} (JSON codec: {JSON_CODEC})")
+    print(f"{'protocol':<10} {'records':>8} {'calls':>6} {'seconds':>8} {'ms/call':>8} {'KB recv':>9} {'rec/s':>9}")
+
+    results = []
+    for protocol in PROTOCOLS:
+        runs = [
+            run_protocol(protocol, args.model, fields, args.pages, args.page_size, args.url)
+            for _ in range(args.repeat)
+        ]
+        best = min(runs, key=lambda r: r['seconds'])
+        results.append(best)
+        print(
+            f"{best['protocol']:<10} {best['records']:>8} {best['calls']:>6} {best['seconds']:>8.2f} "
+            f"{best['ms_per_call']:>8.1f} {best['kb_received']:>9.0f} {best['records_per_second']:>9.0f}"
+        )
+
+    baseline, candidate = results
+    if candidate['seconds']:
+        print(f"⚡ jsonrpc أسرع بـ {baseline['seconds'] / candidate['seconds']:.2f}x من xmlrpc")
+    return results
+
+
+if __name__ == '__main__':
+    main()
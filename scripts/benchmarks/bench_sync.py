@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+قياس أداء سكريبتات المزامنة محلياً بدون Odoo أو Supabase الفعليين
+
+يشغل خادم Odoo وهمي (fake_odoo) وبديل PostgREST (fake_postgrest) في عملية
+منفصلة، ثم ينفذ sync_aumet_to_supabase.main() و sync_suppliers.main() كاملين
+ويعرض لكل كيان: الزمن، السجلات في الثانية، عدد الطلبات لكل طرف، والذروة
+في استهلاك الذاكرة (tracemalloc، لجانب السكريبت فقط).
+
+المراحل تُشغّل تسلسلياً (--stage-workers 1) حتى تُنسب الطلبات والذاكرة لكل كيان.
+
+مثال:
+    python scripts/benchmarks/bench_sync.py --orders 50000 --products 29000 --latency 0.05 --runs 2
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import tempfile
+import importlib
+import contextlib
+import tracemalloc
+import multiprocessing
+import urllib.request
+import xmlrpc.client
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_odoo import FakeOdooServer, make_dataset
+from fake_postgrest import FakePostgrest
+
+# مفتاح بصيغة JWT (لا يُتحقق منه في البديل المحلي)
+FAKE_SUPABASE_KEY = 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.bench'
+
+
+# ==================== الخوادم الوهمية ====================
+
+def _serve(dataset_options, latency, supabase_latency, connection):
+    """نقطة دخول العملية الفرعية: تشغيل الخادمين وإرسال عنوانيهما"""
+    odoo = FakeOdooServer(make_dataset(**dataset_options), latency=latency).start()
+    postgrest = FakePostgrest(latency=supabase_latency).start()
+    connection.send((odoo.url, postgrest.url))
+    connection.recv()  # الانتظار حتى نهاية القياس
+
+
+class FakeBackends:
+    """الخادمان الوهميان في عملية منفصلة حتى لا تُحسب ذاكرتهما ضمن السكريبت"""
+
+    def __init__(self, dataset_options, latency=0.0, supabase_latency=0.0):
+        self._connection, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(dataset_options, latency, supabase_latency, child), daemon=True
+        )
+
+    def __enter__(self):
+        self._process.start()
+        self.odoo_url, self.postgrest_url = self._connection.recv()
+        self._odoo = xmlrpc.client.ServerProxy(f'{self.odoo_url}/xmlrpc/2/common', allow_none=True)
+        return self
+
+    def __exit__(self, *exc):
+        self._connection.send('stop')
+        self._process.join(timeout=5)
+
+    def stats(self):
+        """لقطة من عدادات الخادمين"""
+        odoo = self._odoo.bench_stats()
+        with urllib.request.urlopen(f'{self.postgrest_url}/__stats') as response:
+            postgrest = json.loads(response.read())
+        return {
+            'odoo_calls': sum(odoo['calls'].values()),
+            'records': sum(odoo['records'].values()),
+            'supabase_calls': sum(postgrest['calls'].values()),
+            'rows_written': sum(postgrest['rows_written'].values()),
+            'tables': postgrest['tables'],
+        }
+
+
+# ==================== القياس ====================
+
+class EntityMeter:
+    """قياس زمن وذروة ذاكرة وطلبات كيان واحد (فرق عدادات الخادمين قبل/بعد)"""
+
+    def __init__(self, backends, trace_memory=True):
+        self.backends = backends
+        self.trace_memory = trace_memory
+        self.results = []
+
+    @contextlib.contextmanager
+    def measure(self, entity):
+        before = self.backends.stats()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        result = {'entity': entity, 'status': 'ok'}
+        try:
+            yield result
+        finally:
+            result['seconds'] = time.perf_counter() - started
+            result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 / 1024 if self.trace_memory else None
+            after = self.backends.stats()
+            for counter in ('odoo_calls', 'records', 'supabase_calls', 'rows_written'):
+                result[counter] = after[counter] - before[counter]
+            self.results.append(result)
+
+
+def configure_environment(backends, workdir):
+    """متغيرات البيئة التي تقرأها السكريبتات عند الاستيراد"""
+    os.environ.update({
+        'ODOO_URL': backends.odoo_url,
+        'ODOO_DB': 'bench',
+        'ODOO_USERNAME': 'bench',
+        'ODOO_PASSWORD': 'bench',
+        'SUPABASE_URL': backends.postgrest_url,
+        'SUPABASE_KEY': FAKE_SUPABASE_KEY,
+        'ODOO_SESSION_CACHE': os.path.join(workdir, 'odoo_session.json'),
+        'SYNC_STATE_FILE': os.path.join(workdir, 'sync_state.json'),
+        'SYNC_SNAPSHOT_FILE': os.path.join(workdir, 'sync_snapshot.sqlite'),
+        'SYNC_CHECKPOINT_FILE': os.path.join(workdir, 'sync_checkpoint.json'),
+        'SYNC_REPORT_FILE': os.path.join(workdir, 'sync_report.json'),
+    })
+
+
+def run_sync(sync, meter, argv):
+    """تشغيل sync_aumet_to_supabase.main() مع قياس كل مرحلة على حدة"""
+    run_stage = sync._run_stage
+
+    def measured_stage(stage):
+        with meter.measure(stage.name) as result:
+            outcome = run_stage(stage)
+            result['status'] = outcome['status']
+        return outcome
+
+    sync._run_stage = measured_stage
+    sys.argv = ['sync_aumet_to_supabase.py', '--stage-workers', '1'] + argv
+    try:
+        sync.main()
+    except SystemExit:
+        pass  # فشل مرحلة يظهر في حالتها ضمن التقرير
+    finally:
+        sync._run_stage = run_stage
+
+
+def run_suppliers(suppliers, meter):
+    """تشغيل sync_suppliers.main() ككيان واحد"""
+    with meter.measure('suppliers'):
+        suppliers.main()
+
+
+def print_report(run, results):
+    print(f"\n📊 التشغيل {run}:")
+    print(
+        f"{'entity':<14} {'status':<8} {'seconds':>8} {'records':>8} {'rec/s':>9} "
+        f"{'odoo rt':>8} {'supa rt':>8} {'written':>8} {'peak MB':>8}"
+    )
+    for r in results:
+        peak = f"{r['peak_mb']:>8.1f}" if r['peak_mb'] is not None else f"{'-':>8}"
+        rate = r['records'] / r['seconds'] if r['seconds'] else 0.0
+        print(
+            f"{r['entity']:<14} {r['status']:<8} {r['seconds']:>8.2f} {r['records']:>8} {rate:>9.0f} "
+            f"{r['odoo_calls']:>8} {r['supabase_calls']:>8} {r['rows_written']:>8} {peak}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='قياس أداء المزامنة على خوادم وهمية محلية')
+    parser.add_argument('--orders', type=int, default=20000, help='عدد طلبات pos.order')
+    parser.add_argument('--partners', type=int, default=3000, help='عدد res.partner')
+    parser.add_argument('--products', type=int, default=29000, help='عدد product.product')
+    parser.add_argument('--quants', type=int, default=15000, help='عدد stock.quant')
+    parser.add_argument('--purchases', type=int, default=2000, help='عدد purchase.order')
+    parser.add_argument('--latency', type=float, default=0.0, help='تأخير كل طلب Odoo (ثانية)')
+    parser.add_argument('--supabase-latency', type=float, default=0.0, help='تأخير كل طلب Supabase (ثانية)')
+    parser.add_argument('--runs', type=int, default=1, help='عدد التشغيلات المتتالية (الثاني فما بعده تزايدي)')
+    parser.add_argument('--odoo-workers', type=int, default=1)
+    parser.add_argument('--odoo-protocol', choices=('xmlrpc', 'jsonrpc'), default='xmlrpc')
+    parser.add_argument('--write-mode', choices=('upsert', 'swap'), default='upsert')
+    parser.add_argument('--write-concurrency', type=int, default=4, help='طلبات upsert المتزامنة إلى Supabase')
+    parser.add_argument('--summary', action='store_true', help='وضع الملخص (read_group) بدل المزامنة الكاملة')
+    parser.add_argument('--no-memory', action='store_true', help='بدون tracemalloc (أرقام زمن أدق)')
+    parser.add_argument('--verbose', action='store_true', help='إظهار سجلات السكريبتات')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    dataset_options = {
+        'orders': args.orders, 'partners': args.partners, 'products': args.products,
+        'quants': args.quants, 'purchases': args.purchases,
+    }
+    sync_argv = [
+        '--odoo-workers', str(args.odoo_workers),
+        '--odoo-protocol', args.odoo_protocol,
+        '--write-mode', args.write_mode,
+        '--write-concurrency', str(args.write_concurrency),
+    ] + (['--summary'] if args.summary else [])
+
+    print(
+        f"🚀 بيانات اصطناعية: {dataset_options}، تأخير Odoo: {args.latency * 1000:.0f}ms، "
+        f"تأخير Supabase: {args.supabase_latency * 1000:.0f}ms"
+    )
+    with FakeBackends(dataset_options, args.latency, args.supabase_latency) as backends, \
+            tempfile.TemporaryDirectory(prefix='bench_sync_') as workdir:
+        configure_environment(backends, workdir)
+        sync = importlib.import_module('sync_aumet_to_supabase')
+        suppliers = importlib.import_module('sync_suppliers')
+        if not args.verbose:
+            logging.getLogger().setLevel(logging.WARNING)
+
+        if not args.no_memory:
+            tracemalloc.start()
+        all_results = []
+        for run in range(1, args.runs + 1):
+            meter = EntityMeter(backends, trace_memory=not args.no_memory)
+            with open(os.devnull, 'w') as devnull, \
+                    contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+                run_sync(sync, meter, sync_argv)
+                run_suppliers(suppliers, meter)
+            print_report(run, meter.results)
+            all_results.append(meter.results)
+        if not args.no_memory:
+            tracemalloc.stop()
+
+        print(f"\n📦 الجداول: {backends.stats()['tables']}")
+    return all_results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+خادم Odoo وهمي محلي لقياس أداء سكريبتات المزامنة دون الاتصال بالنظام الفعلي
+
+يدعم XML-RPC (/xmlrpc/2/common و /xmlrpc/2/object) و JSON-RPC (/jsonrpc)
+والدوال: search و search_count و read و search_read و read_group على بيانات اصطناعية
+لـ pos.order (وبنوده) و res.partner و product.product و stock.quant (و purchase.order)، مع تأخير
+اختياري لكل طلب لمحاكاة زمن الشبكة.
+"""
+
+import json
+import time
+import random
+import threading
+import xmlrpc.client
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+FAKE_UID = 7
+ODOO_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+SERVER_VERSION = {'server_version': '16.0', 'server_version_info': [16, 0, 0, 'final', 0, '']}
+
+
+def make_dataset(orders=3000, partners=500, products=2000, quants=1500, purchases=300, seed=1):
+    """بيانات اصطناعية ثابتة (نفس seed = نفس البيانات) بنفس حقول نماذج Odoo"""
+    rnd = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    stamp = base.strftime('%Y-%m-%d %H:%M:%S')
+
+    partner_rows = [{
+        'id': i,
+        'name': f'Partner {i}',
+        'email': f'partner{i}@example.com',
+        'phone': None,
+        'mobile': f'05{i:08d}',
+        'street': f'Street {i % 40}',
+        'city': rnd.choice(['Riyadh', 'Jeddah', 'Dammam']),
+        'country_id': [1, 'Saudi Arabia'],
+        'customer_rank': rnd.randint(0, 2),
+        'supplier_rank': rnd.randint(0, 1),
+        'write_date': stamp,
+    } for i in range(1, partners + 1)]
+
+    product_rows = [{
+        'id': i,
+        'name': f'Product {i}',
+        'default_code': f'SKU{i:06d}',
+        'list_price': round(rnd.uniform(1, 200), 2),
+        'standard_price': round(rnd.uniform(1, 150), 2),
+        'categ_id': [1 + i % 12, f'Category {1 + i % 12}'],
+        'qty_available': float(rnd.randint(0, 100)),
+        'sale_ok': i % 10 != 0,
+        'write_date': stamp,
+    } for i in range(1, products + 1)]
+
+    order_rows = []
+    for i in range(1, orders + 1):
+        date = (base + timedelta(minutes=37 * i)).strftime('%Y-%m-%d %H:%M:%S')
+        partner_id = rnd.randint(1, partners) if partners and i % 7 else None
+        order_rows.append({
+            'id': i,
+            'name': f'POS/{i:06d}',
+            'partner_id': [partner_id, f'Partner {partner_id}'] if partner_id else False,
+            'date_order': date,
+            # ~5% مرتجعات بمبالغ سالبة
+            'amount_total': round(rnd.uniform(-50, 0) if rnd.random() < 0.05 else rnd.uniform(5, 600), 2),
+            'state': rnd.choice(['paid', 'done', 'invoiced']),
+            'write_date': date,
+        })
+
+    # 1-4 بنود لكل طلب، متتالية في id كما في Odoo
+    line_rows = []
+    for order in order_rows:
+        for _ in range(rnd.randint(1, 4)):
+            product_id = rnd.randint(1, max(products, 1))
+            qty = float(rnd.randint(1, 5))
+            price = round(rnd.uniform(2, 150), 2)
+            line_rows.append({
+                'id': len(line_rows) + 1,
+                'order_id': [order['id'], order['name']],
+                'product_id': [product_id, f'Product {product_id}'],
+                'qty': -qty if order['amount_total'] < 0 else qty,
+                'price_unit': price,
+                'price_subtotal': round(qty * price, 2) * (-1 if order['amount_total'] < 0 else 1),
+                'price_subtotal_incl': round(qty * price * 1.15, 2) * (-1 if order['amount_total'] < 0 else 1),
+                'write_date': order['write_date'],
+            })
+
+    quant_rows = []
+    for i in range(1, quants + 1):
+        product_id = rnd.randint(1, max(products, 1))
+        location_id = rnd.randint(1, 4)
+        quant_rows.append({
+            'id': i,
+            'product_id': [product_id, f'Product {product_id}'],
+            'location_id': [location_id, f'WH/Stock/{location_id}'],
+            'quantity': float(rnd.randint(-2, 60)),
+            'reserved_quantity': float(rnd.randint(0, 3)),
+            'write_date': stamp,
+        })
+
+    purchase_rows = []
+    for i in range(1, purchases + 1):
+        date = (base + timedelta(hours=29 * i)).strftime('%Y-%m-%d %H:%M:%S')
+        partner_id = rnd.randint(1, max(partners, 1))
+        purchase_rows.append({
+            'id': i,
+            'name': f'P{i:05d}',
+            'partner_id': [partner_id, f'Partner {partner_id}'],
+            'date_order': date,
+            'amount_total': round(rnd.uniform(100, 20000), 2),
+            'state': rnd.choice(['draft', 'purchase', 'done', 'cancel']),
+            'write_date': date,
+        })
+
+    return {
+        'pos.order': order_rows,
+        'pos.order.line': line_rows,
+        'res.partner': partner_rows,
+        'product.product': product_rows,
+        'stock.quant': quant_rows,
+        'purchase.order': purchase_rows,
+    }
+
+
+def _plain(value):
+    """قيمة many2one ([id, name]) تُقارن بالـ id كما في Odoo"""
+    if isinstance(value, list) and len(value) == 2 and isinstance(value[0], int):
+        return value[0]
+    return value
+
+
+def _compare(value, operator, operand):
+    if operator == '=':
+        return value == operand
+    if operator == '!=':
+        return value != operand
+    if operator == 'in':
+        return value in operand
+    if operator == 'not in':
+        return value not in operand
+    if value is None or value is False:
+        return False
+    if operator == '>':
+        return value > operand
+    if operator == '>=':
+        return value >= operand
+    if operator == '<':
+        return value < operand
+    if operator == '<=':
+        return value <= operand
+    raise ValueError(f"عامل غير مدعوم في الخادم الوهمي: {operator}")
+
+
+# نماذج حقول many2one (لتقييم domain بمسار منقط مثل order_id.date_order)
+RELATIONS = {'order_id': 'pos.order', 'product_id': 'product.product', 'partner_id': 'res.partner'}
+
+
+def _field_value(record, field, index=None):
+    """قيمة حقل أو مسار منقط عبر many2one (index: {النموذج: {id: السجل}})"""
+    name, _, rest = field.partition('.')
+    value = record.get(name)
+    if not rest:
+        return value
+    target = (index or {}).get(RELATIONS.get(name), {}).get(_plain(value))
+    return _field_value(target, rest, index) if target else None
+
+
+def matches(record, domain, index=None):
+    """تقييم domain بصيغة Odoo البولندية ('&' و '|' و '!' قبل المعاملات)"""
+    stack = []
+    for term in reversed(domain):
+        if term == '!':
+            stack.append(not stack.pop())
+        elif term in ('&', '|'):
+            left, right = stack.pop(), stack.pop()
+            stack.append(left and right if term == '&' else left or right)
+        else:
+            field, operator, operand = term
+            stack.append(_compare(_plain(_field_value(record, field, index)), operator, operand))
+    return all(stack)
+
+
+class FakeOdooServer:
+    """خادم Odoo وهمي يعمل في thread خلفي
+
+    الاستخدام:
+        server = FakeOdooServer(make_dataset(), latency=0.02).start()
+        url = server.url
+        ...
+        server.stop()
+
+    calls يعد الطلبات لكل (model, method) و records_served يعد السجلات المُعادة؛
+    تُقرأ من عملية أخرى عبر الدالة bench_stats على /xmlrpc/2/common.
+    """
+
+    def __init__(self, dataset, latency=0.0, host='127.0.0.1', port=0):
+        self.dataset = dataset
+        self.latency = latency
+        self.calls = Counter()
+        self.records_served = Counter()
+        self._lock = threading.Lock()
+
+        fake = self
+
+        class RequestHandler(SimpleXMLRPCRequestHandler):
+            rpc_paths = ('/xmlrpc/2/common', '/xmlrpc/2/object')
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                if self.path == '/jsonrpc':
+                    self._jsonrpc()
+                else:
+                    super().do_POST()
+
+            def _jsonrpc(self):
+                request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                params = request['params']
+                try:
+                    result = fake.dispatch(params['method'], *params['args'])
+                    reply = {'jsonrpc': '2.0', 'id': request['id'], 'result': result}
+                except Exception as e:
+                    name = 'odoo.exceptions.AccessDenied' if 'AccessDenied' in str(e) else 'builtins.ValueError'
+                    reply = {
+                        'jsonrpc': '2.0', 'id': request['id'],
+                        'error': {'code': 200, 'message': 'Odoo Server Error',
+                                  'data': {'name': name, 'message': str(e)}},
+                    }
+                body = json.dumps(reply).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        class Server(ThreadingMixIn, SimpleXMLRPCServer):
+            daemon_threads = True
+
+        self._server = Server((host, port), requestHandler=RequestHandler, allow_none=True, logRequests=False)
+        self._server.register_function(lambda: fake.dispatch('version'), 'version')
+        self._server.register_function(lambda *args: fake.dispatch('authenticate', *args), 'authenticate')
+        self._server.register_function(lambda *args: fake.dispatch('execute_kw', *args), 'execute_kw')
+        # إحصاءات للمقياس (لا تُحسب ضمن الطلبات)
+        self._server.register_function(self.stats, 'bench_stats')
+        self.url = f'http://{host}:{self._server.server_address[1]}'
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def round_trips(self):
+        return sum(self.calls.values())
+
+    def stats(self):
+        """الطلبات والسجلات المُعادة حتى الآن (بصيغة قابلة للإرسال عبر XML-RPC)"""
+        with self._lock:
+            return {
+                'calls': {f'{model}/{method}': count for (model, method), count in self.calls.items()},
+                'records': dict(self.records_served),
+            }
+
+    # ---------- الدوال ----------
+
+    def dispatch(self, method, *args):
+        if self.latency:
+            time.sleep(self.latency)
+        if method == 'version':
+            self._count('common', 'version')
+            return SERVER_VERSION
+        if method == 'authenticate':
+            self._count('common', 'authenticate')
+            return FAKE_UID
+        if method == 'execute_kw':
+            return self.execute_kw(*args)
+        raise ValueError(f"دالة غير مدعومة: {method}")
+
+    def _count(self, model, method, records=0):
+        with self._lock:
+            self.calls[(model, method)] += 1
+            self.records_served[model] += records
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        if uid != FAKE_UID:
+            raise xmlrpc.client.Fault(3, 'odoo.exceptions.AccessDenied: Access Denied')
+        kwargs = kwargs or {}
+        records = self.dataset.get(model)
+        if records is None:
+            raise xmlrpc.client.Fault(2, f"Object {model} doesn't exist")
+
+        if method == 'search_count':
+            index = self._index(args[0])
+            count = sum(1 for record in records if matches(record, args[0], index))
+            self._count(model, method)
+            return count
+        if method == 'search':
+            ids = [record['id'] for record in self._select(records, args[0], kwargs)]
+            self._count(model, method)
+            return ids
+        if method == 'read':
+            wanted = set(args[0])
+            fields = args[1] if len(args) > 1 else kwargs.get('fields')
+            result = [self._project(record, fields) for record in records if record['id'] in wanted]
+            self._count(model, method, len(result))
+            return result
+        if method == 'search_read':
+            domain = args[0] if args else kwargs.get('domain', [])
+            fields = args[1] if len(args) > 1 else kwargs.get('fields')
+            result = [self._project(record, fields) for record in self._select(records, domain, kwargs)]
+            self._count(model, method, len(result))
+            return result
+        if method == 'read_group':
+            result = self._read_group(records, *args, **kwargs)
+            self._count(model, method, len(result))
+            return result
+        raise xmlrpc.client.Fault(2, f"Method {method} is not supported by the fake server")
+
+    def _read_group(self, records, domain, fields, groupby, offset=0, limit=None, orderby=False, lazy=True,
+                    context=None):
+        """read_group مبسط: حقول many2one أو تاريخ بدقة day/month، ومجموع الحقول الرقمية"""
+        tz = ZoneInfo((context or {}).get('tz') or 'UTC')
+        groupby = [groupby] if isinstance(groupby, str) else list(groupby)
+        aggregated = [f.split(':')[0] for f in fields if f.split(':')[0] not in [g.split(':')[0] for g in groupby]]
+        groups = {}
+        index = self._index(domain)
+        for record in records:
+            if not matches(record, domain, index):
+                continue
+            key, values, ranges = [], {}, {}
+            for spec in groupby:
+                name, _, granularity = spec.partition(':')
+                value = record.get(name)
+                if granularity and value:
+                    local = datetime.strptime(value, ODOO_DATETIME_FORMAT).replace(tzinfo=timezone.utc).astimezone(tz)
+                    start = local.replace(hour=0, minute=0, second=0)
+                    if granularity == 'month':
+                        start = start.replace(day=1)
+                        end = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+                    else:
+                        end = start + timedelta(days=1)
+                    value = start.strftime('%d %b %Y' if granularity == 'day' else '%B %Y')
+                    ranges[spec] = {
+                        'from': start.astimezone(timezone.utc).strftime(ODOO_DATETIME_FORMAT),
+                        'to': end.astimezone(timezone.utc).strftime(ODOO_DATETIME_FORMAT),
+                    }
+                key.append(_plain(value) if not granularity else ranges.get(spec, {}).get('from'))
+                values[spec] = value
+            group = groups.get(tuple(key))
+            if group is None:
+                group = groups[tuple(key)] = dict(values, __count=0, **dict.fromkeys(aggregated, 0.0))
+                if ranges:
+                    group['__range'] = ranges
+            group['__count'] += 1
+            for name in aggregated:
+                group[name] += record.get(name) or 0
+        ordered = [groups[key] for key in sorted(groups, key=lambda k: tuple((v is None, v or 0) for v in k))]
+        return ordered[offset:offset + limit if limit else None]
+
+    def _index(self, domain):
+        """فهرس السجلات حسب id لتقييم المسارات المنقطة (يُبنى لكل طلب لأن البيانات قد تتغير)"""
+        if not any(isinstance(term, (list, tuple)) and '.' in term[0] for term in domain):
+            return None
+        return {model: {record['id']: record for record in records} for model, records in self.dataset.items()}
+
+    def _select(self, records, domain, kwargs):
+        index = self._index(domain)
+        selected = [record for record in records if matches(record, domain, index)]
+        field, _, direction = (kwargs.get('order') or 'id asc').partition(' ')
+        selected.sort(key=lambda record: _plain(record.get(field)) or 0, reverse=direction.lower() == 'desc')
+        offset = kwargs.get('offset') or 0
+        limit = kwargs.get('limit')
+        return selected[offset:offset + limit if limit else None]
+
+    @staticmethod
+    def _project(record, fields):
+        if not fields:
+            return dict(record)
+        return {key: value for key, value in record.items() if key == 'id' or key in fields}
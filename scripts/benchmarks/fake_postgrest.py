@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+بديل محلي لـ PostgREST (واجهة Supabase REST) لقياس أداء سكريبتات المزامنة
+
+يحفظ الجداول في الذاكرة ويدعم ما تستخدمه السكريبتات: القراءة مع select و
+order و Range، الإدراج و upsert (on_conflict + Prefer: resolution=... و return=minimal)،
+الحذف بالفلاتر (eq و in ...)، ودوال rpc المسجلة (prepare_sync_staging و
+swap_sync_table و sync_bucket_checksums معرفة افتراضياً)، مع تأخير اختياري لكل طلب لمحاكاة زمن
+الشبكة (الطلبات المتزامنة تنتظر بالتوازي).
+"""
+
+import json
+import time
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
+
+RESERVED_PARAMS = ('select', 'order', 'limit', 'offset', 'on_conflict', 'columns')
+
+
+def _parse_value(text):
+    text = text.strip('"')
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    if text in ('true', 'false'):
+        return text == 'true'
+    return None if text == 'null' else text
+
+
+def apply_filters(rows, params):
+    """تطبيق فلاتر PostgREST (column=op.value) على قائمة صفوف"""
+    for column, expression in params:
+        if column in RESERVED_PARAMS:
+            continue
+        operator, _, raw = expression.partition('.')
+        if operator == 'in':
+            values = {_parse_value(item) for item in raw.strip('()').split(',') if item}
+            rows = [row for row in rows if row.get(column) in values]
+        elif operator == 'is':
+            rows = [row for row in rows if row.get(column) is _parse_value(raw)]
+        else:
+            value = _parse_value(raw)
+            compare = {
+                'eq': lambda a, b: a == b,
+                'neq': lambda a, b: a != b,
+                'gt': lambda a, b: a is not None and a > b,
+                'gte': lambda a, b: a is not None and a >= b,
+                'lt': lambda a, b: a is not None and a < b,
+                'lte': lambda a, b: a is not None and a <= b,
+            }.get(operator)
+            if compare is None:
+                raise ValueError(f"فلتر غير مدعوم في البديل المحلي: {operator}")
+            rows = [row for row in rows if compare(row.get(column), value)]
+    return rows
+
+
+class FakePostgrest:
+    """خادم PostgREST وهمي يعمل في thread خلفي
+
+    tables: {اسم الجدول: [صفوف]}، calls: عدد الطلبات لكل جدول (أو rpc/<name>)،
+    rows_written: عدد الصفوف المستقبلة للكتابة لكل جدول.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.tables = {}
+        self.latency = latency
+        self.rpcs = {
+            'prepare_sync_staging': self._prepare_staging,
+            'swap_sync_table': self._swap_table,
+            'sync_bucket_checksums': self._bucket_checksums,
+        }
+        self.calls = Counter()
+        self.rows_written = Counter()
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+        fake = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _target(self):
+                if fake.latency and self.path != '/__stats':
+                    time.sleep(fake.latency)
+                parsed = urlparse(self.path)
+                parts = parsed.path.strip('/').split('/')  # rest/v1/<table> أو rest/v1/rpc/<name>
+                return parts[2:], parse_qsl(parsed.query, keep_blank_values=True)
+
+            def _body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(length) or b'null')
+
+            def _reply(self, status, payload, headers=None):
+                body = b'' if payload is None else json.dumps(payload, default=str).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/__stats':
+                    return self._reply(200, fake.stats())
+                (table, *_), params = self._target()
+                rows, content_range = fake.select(table, params, self.headers.get('Range'))
+                self._reply(200, rows, {'Content-Range': content_range})
+
+            def do_POST(self):
+                target, params = self._target()
+                body = self._body()
+                if target[0] == 'rpc':
+                    self._reply(200, fake.call_rpc(target[1], body))
+                else:
+                    prefer = self.headers.get('Prefer', '')
+                    rows = fake.write(target[0], body, params, prefer)
+                    self._reply(201, None if 'return=minimal' in prefer else rows)
+
+            def do_PATCH(self):
+                (table, *_), params = self._target()
+                self._reply(200, fake.update(table, self._body(), params))
+
+            def do_DELETE(self):
+                self._body()
+                (table, *_), params = self._target()
+                self._reply(200, fake.delete(table, params))
+
+        self._server = ThreadingHTTPServer((host, port), RequestHandler)
+        self._server.daemon_threads = True
+        self.url = f'http://{host}:{self._server.server_address[1]}'
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def round_trips(self):
+        return sum(self.calls.values())
+
+    def stats(self):
+        """الطلبات والصفوف المكتوبة وحجم كل جدول (تُقرأ من عملية أخرى عبر GET /__stats)"""
+        with self._lock:
+            return {
+                'calls': dict(self.calls),
+                'rows_written': dict(self.rows_written),
+                'tables': {table: len(rows) for table, rows in self.tables.items()},
+            }
+
+    # ---------- العمليات ----------
+
+    def select(self, table, params, range_header=None):
+        with self._lock:
+            self.calls[table] += 1
+            rows = apply_filters(self.tables.get(table, []), params)
+        options = dict(params)
+        if 'order' in options:
+            column, _, direction = options['order'].partition('.')
+            rows = sorted(rows, key=lambda row: (row.get(column) is None, row.get(column)),
+                          reverse=direction.startswith('desc'))
+        total = len(rows)
+        offset = int(options.get('offset', 0))
+        limit = int(options['limit']) if 'limit' in options else None
+        if range_header:
+            first, _, last = range_header.partition('-')
+            offset, limit = int(first), int(last) - int(first) + 1
+        rows = rows[offset:offset + limit if limit is not None else None]
+        if options.get('select', '*') != '*':
+            columns = options['select'].split(',')
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        return rows, f'{offset}-{offset + len(rows) - 1}/{total}'
+
+    def write(self, table, body, params, prefer):
+        rows = body if isinstance(body, list) else [body]
+        options = dict(params)
+        with self._lock:
+            self.calls[table] += 1
+            self.rows_written[table] += len(rows)
+            stored = self.tables.setdefault(table, [])
+            if 'resolution=' in prefer:
+                key_columns = options.get('on_conflict', 'id').split(',')
+                index = {tuple(row.get(c) for c in key_columns): row for row in stored}
+                for row in rows:
+                    key = tuple(row.get(c) for c in key_columns)
+                    if key in index:
+                        if 'merge-duplicates' in prefer:
+                            index[key].update(row)
+                    else:
+                        index[key] = self._insert(stored, row)
+            else:
+                for row in rows:
+                    self._insert(stored, row)
+        return rows
+
+    def _insert(self, stored, row):
+        row = dict(row)
+        if row.get('id') is None:
+            row['id'] = self._next_id
+        if isinstance(row['id'], int):
+            self._next_id = max(self._next_id, row['id'] + 1)
+        stored.append(row)
+        return row
+
+    def update(self, table, values, params):
+        with self._lock:
+            self.calls[table] += 1
+            rows = apply_filters(self.tables.get(table, []), params)
+            for row in rows:
+                row.update(values)
+        return rows
+
+    def delete(self, table, params):
+        with self._lock:
+            self.calls[table] += 1
+            stored = self.tables.get(table, [])
+            removed = apply_filters(stored, params)
+            removed_ids = {id(row) for row in removed}
+            self.tables[table] = [row for row in stored if id(row) not in removed_ids]
+        return removed
+
+    def call_rpc(self, name, body):
+        with self._lock:
+            self.calls[f'rpc/{name}'] += 1
+            handler = self.rpcs.get(name)
+            if handler is None:
+                raise ValueError(f"دالة rpc غير معرفة في البديل المحلي: {name}")
+            return handler(body or {})
+
+    def _prepare_staging(self, body):
+        self.tables[f"{body['target']}_staging"] = []
+
+    def _swap_table(self, body):
+        target = body['target']
+        self.tables[target] = self.tables.get(f'{target}_staging', [])
+        self.tables[f'{target}_staging'] = []
+
+    def _bucket_checksums(self, body):
+        """مثل sync_bucket_checksums في create_supabase_tables.sql"""
+        key, low, high = body['key_column'], body['low'], body['high']
+        amount, state = body.get('amount_column'), body.get('state_column')
+        buckets = {}
+        for row in self.tables.get(body['target'], []):
+            if row.get(key) is None or not low <= row[key] < high:
+                continue
+            group = ((row[key] - low) // body['bucket_size'], str(row.get(state)) if state else None)
+            totals = buckets.setdefault(group, [0, 0.0])
+            totals[0] += 1
+            totals[1] += float(row.get(amount) or 0) if amount else 0.0
+        return [
+            {'bucket': bucket, 'state': state_value, 'row_count': count, 'amount': round(total, 2)}
+            for (bucket, state_value), (count, total) in sorted(buckets.items(), key=str)
+        ]
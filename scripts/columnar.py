@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+تمثيل عمودي مضغوط لدفعات السجلات أثناء المزامنة
+
+بدلاً من قاموس لكل سجل من Odoo ثم قاموس ثانٍ لكل صف في Supabase، تُحفظ
+الصفحة كقائمة قيم لكل حقل (Columns) وتعمل التحويلات على الأعمدة كاملة.
+الأعمدة المنسوخة كما هي تشارك نفس الكائنات دون نسخ.
+
+Columns تتصرف كتسلسل صفوف (len، تكرار، فهرسة، تقطيع) فتمر عبر مسارات
+الكتابة واللقطات الحالية كما هي؛ القواميس تُبنى فقط عند الحاجة، مثل جزء
+الدفعة المرسل في طلب واحد (as_rows) لأن supabase-py يقبل قوائم قواميس.
+"""
+
+import itertools
+
+
+class Columns:
+    """دفعة صفوف بشكل أعمدة: {اسم العمود: قائمة القيم}"""
+
+    __slots__ = ('data', 'length')
+
+    def __init__(self, data, length=None):
+        self.data = data
+        if length is None:
+            length = len(next(iter(data.values()))) if data else 0
+        self.length = length
+
+    @classmethod
+    def from_records(cls, records, fields):
+        """تحويل صفحة قواميس (search_read/read_group) إلى أعمدة الحقول المعطاة"""
+        return cls({name: [record.get(name) for record in records] for name in fields}, len(records))
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        """عمود (اسم)، أو Columns جزئية (slice)، أو صف واحد كقاموس (رقم)"""
+        if isinstance(index, str):
+            return self.data[index]
+        if isinstance(index, slice):
+            return Columns({name: values[index] for name, values in self.data.items()})
+        return {name: values[index] for name, values in self.data.items()}
+
+    def __setitem__(self, name, values):
+        self.data[name] = values
+
+    def __iter__(self):
+        names = tuple(self.data)
+        for values in zip(*self.data.values()):
+            yield dict(zip(names, values))
+
+    def constant(self, name, value):
+        """إضافة عمود بنفس القيمة لكل الصفوف"""
+        self.data[name] = [value] * self.length
+
+    def select(self, mask):
+        """الصفوف التي قيمتها في mask صحيحة"""
+        if all(mask):
+            return self
+        return Columns(
+            {name: list(itertools.compress(values, mask)) for name, values in self.data.items()}
+        )
+
+    def keys(self, key_cols):
+        """قيم المفتاح الطبيعي لكل صف (tuple لكل صف)"""
+        return list(zip(*(self.data[col] for col in key_cols)))
+
+    def rows(self):
+        return list(self)
+
+
+def as_rows(batch):
+    """قائمة قواميس لإرسالها (Columns تُحوّل، والقوائم تُعاد كما هي)"""
+    return batch.rows() if isinstance(batch, Columns) else batch
+
+
+def many2one(values, index, default=None):
+    """استخراج id (index=0) أو الاسم (index=1) من قيم many2one ([id, name] أو False)"""
+    return [value[index] if value else default for value in values]
+
+
+def floats(values):
+    """تحويل عمود أرقام Odoo إلى float (القيم الفارغة = 0)"""
+    return [float(value or 0) for value in values]
@@ -1,6 +1,14 @@
 -- ===================================================
 -- SQL لإنشاء جداول Supabase - صيدلية سامي
 -- ===================================================
+-- الفروع (sync_branches.py): كل فرع في schema خاص بنفس أسماء الجداول.
+-- لإنشائه يُشغّل هذا الملف بعد:
+--   CREATE SCHEMA IF NOT EXISTS branch_2;
+--   GRANT USAGE ON SCHEMA branch_2 TO anon, authenticated, service_role;
+--   ALTER DEFAULT PRIVILEGES IN SCHEMA branch_2 GRANT ALL ON TABLES TO anon, authenticated, service_role;
+--   ALTER DEFAULT PRIVILEGES IN SCHEMA branch_2 GRANT ALL ON SEQUENCES TO anon, authenticated, service_role;
+--   SET search_path TO branch_2;
+-- ثم يُضاف branch_2 إلى Exposed schemas في إعدادات API في Supabase.
 
 -- 1. جدول العملاء
 CREATE TABLE IF NOT EXISTS aumet_customers (
@@ -79,6 +87,9 @@ BEGIN
     END IF;
 END $$;
 
+-- مفتاح فريد على aumet_id مطلوب للمزامنة التزايدية (upsert on_conflict)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sales_orders_aumet_id ON aumet_sales_orders(aumet_id);
+
 -- ===================================================
 
 -- 5. جدول المشتريات (للمستقبل)
@@ -140,6 +151,83 @@ CREATE INDEX IF NOT EXISTS idx_invoices_type ON aumet_invoices(invoice_type);
 
 -- ===================================================
 
+-- 8. دعم أوضاع الكتابة في سكريبت المزامنة (upsert / swap)
+
+-- مفاتيح طبيعية فريدة مطلوبة لـ upsert on_conflict
+-- (سكريبت المزامنة يكتب معرف Odoo في aumet_id للعملاء والمنتجات)
+ALTER TABLE aumet_customers ADD COLUMN IF NOT EXISTS aumet_id INTEGER;
+ALTER TABLE aumet_products ADD COLUMN IF NOT EXISTS aumet_id INTEGER;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_customers_aumet_id ON aumet_customers(aumet_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_products_aumet_id ON aumet_products(aumet_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_inventory_product_location ON aumet_inventory(product_id, location);
+
+-- جداول staging بنفس بنية الجداول الأصلية (لوضع swap)
+CREATE TABLE IF NOT EXISTS aumet_sales_orders_staging (LIKE aumet_sales_orders INCLUDING DEFAULTS);
+CREATE TABLE IF NOT EXISTS aumet_customers_staging (LIKE aumet_customers INCLUDING DEFAULTS);
+CREATE TABLE IF NOT EXISTS aumet_products_staging (LIKE aumet_products INCLUDING DEFAULTS);
+CREATE TABLE IF NOT EXISTS aumet_inventory_staging (LIKE aumet_inventory INCLUDING DEFAULTS);
+CREATE TABLE IF NOT EXISTS aumet_purchases_staging (LIKE aumet_purchases INCLUDING DEFAULTS);
+
+-- الكتابة في staging لـ service_role فقط: RLS بدون سياسات وبدون صلاحيات لـ anon/authenticated
+-- (صف يُدرج في staging ينقله swap_sync_table إلى الجدول الأصلي)
+ALTER TABLE aumet_sales_orders_staging ENABLE ROW LEVEL SECURITY;
+ALTER TABLE aumet_customers_staging ENABLE ROW LEVEL SECURITY;
+ALTER TABLE aumet_products_staging ENABLE ROW LEVEL SECURITY;
+ALTER TABLE aumet_inventory_staging ENABLE ROW LEVEL SECURITY;
+ALTER TABLE aumet_purchases_staging ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON aumet_sales_orders_staging, aumet_customers_staging, aumet_products_staging, aumet_inventory_staging,
+    aumet_purchases_staging
+    FROM anon, authenticated;
+
+-- الدوال التالية SECURITY DEFINER وتبني أوامر ديناميكية من اسم الجدول، لذلك:
+-- search_path مثبت على schema الإنشاء (SET search_path FROM CURRENT)
+-- وأسماء الجداول مؤهلة بـ current_schema() فلا يحجبها جدول مؤقت (pg_temp)،
+-- والتنفيذ مسموح لـ service_role فقط (REVOKE في آخر القسم).
+
+-- تفريغ جدول staging قبل التحميل
+CREATE OR REPLACE FUNCTION prepare_sync_staging(target TEXT)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path FROM CURRENT
+AS $$
+BEGIN
+    IF target NOT IN ('aumet_sales_orders', 'aumet_customers', 'aumet_products', 'aumet_inventory', 'aumet_purchases',
+                      'aumet_sales_daily_products', 'aumet_sales_daily_partners',
+                      'aumet_sales_daily', 'aumet_sales_monthly', 'aumet_sales_daily_states') THEN
+        RAISE EXCEPTION 'جدول غير مسموح: %', target;
+    END IF;
+    EXECUTE format('TRUNCATE %I.%I', current_schema(), target || '_staging');
+END $$;
+
+-- استبدال محتوى الجدول الأصلي بمحتوى staging داخل transaction واحدة:
+-- القراء يرون البيانات القديمة كاملة حتى لحظة الـ COMMIT ثم الجديدة كاملة،
+-- دون نافذة يكون فيها الجدول فارغاً. (لا نستخدم RENAME حتى تبقى سياسات RLS
+-- وذاكرة schema في PostgREST كما هي.)
+CREATE OR REPLACE FUNCTION swap_sync_table(target TEXT)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path FROM CURRENT
+AS $$
+BEGIN
+    IF target NOT IN ('aumet_sales_orders', 'aumet_customers', 'aumet_products', 'aumet_inventory', 'aumet_purchases',
+                      'aumet_sales_daily_products', 'aumet_sales_daily_partners',
+                      'aumet_sales_daily', 'aumet_sales_monthly', 'aumet_sales_daily_states') THEN
+        RAISE EXCEPTION 'جدول غير مسموح: %', target;
+    END IF;
+    EXECUTE format('DELETE FROM %I.%I', current_schema(), target);
+    EXECUTE format('INSERT INTO %1$I.%2$I SELECT * FROM %1$I.%3$I', current_schema(), target, target || '_staging');
+    EXECUTE format('TRUNCATE %I.%I', current_schema(), target || '_staging');
+END $$;
+
+REVOKE EXECUTE ON FUNCTION prepare_sync_staging(TEXT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION swap_sync_table(TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION prepare_sync_staging(TEXT) TO service_role;
+GRANT EXECUTE ON FUNCTION swap_sync_table(TEXT) TO service_role;
+
+-- ===================================================
+
 -- تفعيل Row Level Security (RLS) للأمان
 ALTER TABLE aumet_customers ENABLE ROW LEVEL SECURITY;
 ALTER TABLE aumet_products ENABLE ROW LEVEL SECURITY;
@@ -158,6 +246,207 @@ CREATE POLICY "Enable read access for all users" ON aumet_invoices FOR SELECT US
 
 -- ===================================================
 
+-- 9. ربط جدول suppliers بمعرف المورد في Odoo (upsert في sync_suppliers.py)
+DO $$
+BEGIN
+    IF EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'suppliers') THEN
+        ALTER TABLE suppliers ADD COLUMN IF NOT EXISTS odoo_partner_id INTEGER;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_suppliers_odoo_partner_id ON suppliers(odoo_partner_id);
+    END IF;
+END $$;
+
+-- ===================================================
+
+-- 10. تجميعات المبيعات اليومية (من بنود pos.order.line)
+CREATE TABLE IF NOT EXISTS aumet_sales_daily_products (
+    id BIGSERIAL PRIMARY KEY,
+    sale_date DATE NOT NULL,
+    product_id INTEGER NOT NULL,
+    product_name TEXT,
+    quantity DECIMAL(14, 3) DEFAULT 0,
+    revenue DECIMAL(14, 2) DEFAULT 0,
+    order_count INTEGER DEFAULT 0,
+    synced_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- partner_id = 0 للطلبات بدون عميل (عميل نقدي)
+CREATE TABLE IF NOT EXISTS aumet_sales_daily_partners (
+    id BIGSERIAL PRIMARY KEY,
+    sale_date DATE NOT NULL,
+    partner_id INTEGER NOT NULL,
+    partner_name TEXT,
+    quantity DECIMAL(14, 3) DEFAULT 0,
+    revenue DECIMAL(14, 2) DEFAULT 0,
+    order_count INTEGER DEFAULT 0,
+    synced_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sales_daily_products_key ON aumet_sales_daily_products(sale_date, product_id);
+CREATE INDEX IF NOT EXISTS idx_sales_daily_products_product ON aumet_sales_daily_products(product_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sales_daily_partners_key ON aumet_sales_daily_partners(sale_date, partner_id);
+CREATE INDEX IF NOT EXISTS idx_sales_daily_partners_partner ON aumet_sales_daily_partners(partner_id);
+
+CREATE TABLE IF NOT EXISTS aumet_sales_daily_products_staging (LIKE aumet_sales_daily_products INCLUDING DEFAULTS);
+CREATE TABLE IF NOT EXISTS aumet_sales_daily_partners_staging (LIKE aumet_sales_daily_partners INCLUDING DEFAULTS);
+
+ALTER TABLE aumet_sales_daily_products ENABLE ROW LEVEL SECURITY;
+ALTER TABLE aumet_sales_daily_partners ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Enable read access for all users" ON aumet_sales_daily_products FOR SELECT USING (true);
+CREATE POLICY "Enable read access for all users" ON aumet_sales_daily_partners FOR SELECT USING (true);
+
+-- staging لـ service_role فقط (كما في القسم 8)
+ALTER TABLE aumet_sales_daily_products_staging ENABLE ROW LEVEL SECURITY;
+ALTER TABLE aumet_sales_daily_partners_staging ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON aumet_sales_daily_products_staging, aumet_sales_daily_partners_staging FROM anon, authenticated;
+
+-- ===================================================
+
+-- 11. إجماليات المبيعات اليومية والشهرية (تُحدّث تزايدياً لكل يوم معدل)
+-- revenue وعدد الطلبات للمبيعات فقط، والمرتجعات (amount_total سالب) منفصلة
+-- بقيمة موجبة في return_amount؛ net_revenue = revenue - return_amount
+CREATE TABLE IF NOT EXISTS aumet_sales_daily (
+    id BIGSERIAL PRIMARY KEY,
+    sale_date DATE NOT NULL,
+    order_count INTEGER DEFAULT 0,
+    revenue DECIMAL(14, 2) DEFAULT 0,
+    avg_basket DECIMAL(12, 2) DEFAULT 0,
+    return_count INTEGER DEFAULT 0,
+    return_amount DECIMAL(14, 2) DEFAULT 0,
+    net_revenue DECIMAL(14, 2) DEFAULT 0,
+    synced_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- month = أول يوم في الشهر
+CREATE TABLE IF NOT EXISTS aumet_sales_monthly (
+    id BIGSERIAL PRIMARY KEY,
+    month DATE NOT NULL,
+    order_count INTEGER DEFAULT 0,
+    revenue DECIMAL(14, 2) DEFAULT 0,
+    avg_basket DECIMAL(12, 2) DEFAULT 0,
+    return_count INTEGER DEFAULT 0,
+    return_amount DECIMAL(14, 2) DEFAULT 0,
+    net_revenue DECIMAL(14, 2) DEFAULT 0,
+    synced_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sales_daily_date ON aumet_sales_daily(sale_date);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sales_monthly_month ON aumet_sales_monthly(month);
+
+CREATE TABLE IF NOT EXISTS aumet_sales_daily_staging (LIKE aumet_sales_daily INCLUDING DEFAULTS);
+CREATE TABLE IF NOT EXISTS aumet_sales_monthly_staging (LIKE aumet_sales_monthly INCLUDING DEFAULTS);
+
+ALTER TABLE aumet_sales_daily ENABLE ROW LEVEL SECURITY;
+ALTER TABLE aumet_sales_monthly ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Enable read access for all users" ON aumet_sales_daily FOR SELECT USING (true);
+CREATE POLICY "Enable read access for all users" ON aumet_sales_monthly FOR SELECT USING (true);
+
+ALTER TABLE aumet_sales_daily_staging ENABLE ROW LEVEL SECURITY;
+ALTER TABLE aumet_sales_monthly_staging ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON aumet_sales_daily_staging, aumet_sales_monthly_staging FROM anon, authenticated;
+
+-- ===================================================
+
+-- 12. مجاميع المبيعات لكل يوم وحالة طلب (state في pos.order)
+-- مجموعها على كل الحالات يساوي صف اليوم في aumet_sales_daily
+CREATE TABLE IF NOT EXISTS aumet_sales_daily_states (
+    id BIGSERIAL PRIMARY KEY,
+    sale_date DATE NOT NULL,
+    state TEXT NOT NULL,
+    order_count INTEGER DEFAULT 0,
+    revenue DECIMAL(14, 2) DEFAULT 0,
+    avg_basket DECIMAL(12, 2) DEFAULT 0,
+    return_count INTEGER DEFAULT 0,
+    return_amount DECIMAL(14, 2) DEFAULT 0,
+    net_revenue DECIMAL(14, 2) DEFAULT 0,
+    synced_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sales_daily_states_key ON aumet_sales_daily_states(sale_date, state);
+
+CREATE TABLE IF NOT EXISTS aumet_sales_daily_states_staging (LIKE aumet_sales_daily_states INCLUDING DEFAULTS);
+
+ALTER TABLE aumet_sales_daily_states ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Enable read access for all users" ON aumet_sales_daily_states FOR SELECT USING (true);
+
+ALTER TABLE aumet_sales_daily_states_staging ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON aumet_sales_daily_states_staging FROM anon, authenticated;
+
+-- ===================================================
+
+-- 13. سجل تغيرات المخزون (صف لكل منتج/موقع تغيرت كميته في تشغيل المزامنة)
+-- aumet_inventory هو الحالة الحالية؛ الكميات هنا مطلقة بعد التغير مع الفرق
+-- عن القيمة السابقة (كمية 0 = اختفى السجل من Odoo)
+CREATE TABLE IF NOT EXISTS aumet_inventory_history (
+    id BIGSERIAL PRIMARY KEY,
+    product_id INTEGER NOT NULL,
+    location TEXT NOT NULL,
+    quantity DECIMAL(10, 2) DEFAULT 0,
+    quantity_delta DECIMAL(10, 2) DEFAULT 0,
+    reserved_quantity DECIMAL(10, 2) DEFAULT 0,
+    reserved_quantity_delta DECIMAL(10, 2) DEFAULT 0,
+    changed_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_inventory_history_key
+    ON aumet_inventory_history(product_id, location, changed_at);
+CREATE INDEX IF NOT EXISTS idx_inventory_history_changed_at ON aumet_inventory_history(changed_at);
+
+ALTER TABLE aumet_inventory_history ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Enable read access for all users" ON aumet_inventory_history FOR SELECT USING (true);
+
+-- المخزون كما كان في لحظة معينة: آخر قيمة لكل منتج/موقع حتى تلك اللحظة
+-- مثال: SELECT * FROM inventory_at('2025-01-31 23:59:59+03');
+CREATE OR REPLACE FUNCTION inventory_at(as_of TIMESTAMP WITH TIME ZONE)
+RETURNS TABLE (product_id INTEGER, location TEXT, quantity DECIMAL, reserved_quantity DECIMAL)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT product_id, location, quantity, reserved_quantity
+    FROM (
+        SELECT DISTINCT ON (h.product_id, h.location)
+            h.product_id, h.location, h.quantity, h.reserved_quantity
+        FROM aumet_inventory_history h
+        WHERE h.changed_at <= as_of
+        ORDER BY h.product_id, h.location, h.changed_at DESC
+    ) latest
+    WHERE quantity <> 0;
+$$;
+
+-- ===================================================
+
+-- 14. مطابقة Odoo و Supabase بـ checksum لكل نطاق id (reconcile_supabase.py)
+-- عدد الصفوف ومجموع amount_column لكل (نطاق، state_column) في [low, high)
+-- باستعلام واحد؛ النطاق = (المفتاح - low) / bucket_size
+CREATE OR REPLACE FUNCTION sync_bucket_checksums(
+    target TEXT, key_column TEXT, low BIGINT, high BIGINT, bucket_size BIGINT,
+    amount_column TEXT DEFAULT NULL, state_column TEXT DEFAULT NULL
+)
+RETURNS TABLE (bucket BIGINT, state TEXT, row_count BIGINT, amount NUMERIC)
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path FROM CURRENT
+AS $$
+BEGIN
+    IF target NOT IN ('aumet_sales_orders', 'aumet_customers', 'aumet_products', 'aumet_purchases') THEN
+        RAISE EXCEPTION 'جدول غير مسموح: %', target;
+    END IF;
+    RETURN QUERY EXECUTE format(
+        'SELECT (%1$I - $1) / $3, %2$s, COUNT(*), %3$s FROM %5$I.%4$I WHERE %1$I >= $1 AND %1$I < $2 GROUP BY 1, 2',
+        key_column,
+        CASE WHEN state_column IS NULL THEN 'NULL::TEXT' ELSE format('%I::TEXT', state_column) END,
+        CASE WHEN amount_column IS NULL THEN '0::NUMERIC' ELSE format('COALESCE(SUM(%I), 0)::NUMERIC', amount_column) END,
+        target,
+        current_schema()
+    ) USING low, high, bucket_size;
+END $$;
+
+REVOKE EXECUTE ON FUNCTION sync_bucket_checksums(TEXT, TEXT, BIGINT, BIGINT, BIGINT, TEXT, TEXT)
+    FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION sync_bucket_checksums(TEXT, TEXT, BIGINT, BIGINT, BIGINT, TEXT, TEXT) TO service_role;
+
+-- ===================================================
+
 -- عرض ملخص الجداول
 SELECT 
     table_name,
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+تصدير جداول المزامنة إلى ملفات Parquet (أو Arrow IPC) مقسمة حسب اليوم
+
+للتحليل المحلي السريع بدون Supabase: كل جدول مجلد بتقسيم hive، وكل يوم
+ملف واحد يُقرأ بـ memory map (بدون نسخ البيانات إلى الذاكرة):
+
+    <root>/aumet_sales_orders/day=2024-05-01/part-0.parquet
+    <root>/aumet_products/snapshot_date=2024-05-01/part-0.parquet
+
+- الجداول المؤرخة (الطلبات والمشتريات) تُقسّم حسب اليوم المحلي للصف
+  (SALES_TIMEZONE)؛ المزامنة الكاملة تستبدل الجدول كاملاً، والتزايدية
+  تدمج الصفوف المعدلة في أقسامها (حذف المفتاح من قسمه القديم ثم إضافته).
+- باقي الجداول (العملاء، المنتجات، المخزون) لقطة لكل يوم تشغيل
+  (snapshot_date)؛ المزامنة الكاملة تكتب قسم اليوم وتبقى أقسام الأيام
+  السابقة كتاريخ للقطات.
+
+القراءة:
+    import pyarrow.dataset as ds
+    orders = ds.dataset('exports/aumet_sales_orders', format='parquet', partitioning='hive').to_table()
+    # ملف Arrow IPC واحد (--export-format arrow) بدون نسخ:
+    day = pa.ipc.open_file(pa.memory_map(path)).read_all()
+"""
+
+import os
+import shutil
+import logging
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import sales_aggregates
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {'parquet': 'parquet', 'arrow': 'arrow'}  # الصيغة ← امتداد الملف
+PARQUET_COMPRESSION = os.getenv('SYNC_EXPORT_COMPRESSION', 'zstd')
+# قسم الصفوف بدون تاريخ (نفس اسم hive الافتراضي الذي يفهمه pyarrow.dataset)
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+PARTITION_COLUMN = '__partition'
+
+# الجداول القابلة للتصدير: المفتاح، الأعمدة وأنواعها، وعمود تاريخ التقسيم
+# (None = لقطة لكل يوم تشغيل بعمود snapshot_date)
+EXPORT_TABLES = {
+    'aumet_sales_orders': {
+        'key': 'aumet_id',
+        'date_column': 'date_order',
+        'columns': (
+            ('aumet_id', 'int64'), ('name', 'string'), ('partner_id', 'int64'),
+            ('date_order', 'timestamp'), ('amount_total', 'float64'), ('state', 'string'),
+        ),
+    },
+    'aumet_purchases': {
+        'key': 'purchase_id',
+        'date_column': 'purchase_date',
+        'columns': (
+            ('purchase_id', 'int64'), ('purchase_name', 'string'), ('supplier_id', 'int64'),
+            ('supplier_name', 'string'), ('purchase_date', 'timestamp'), ('amount_total', 'float64'),
+            ('state', 'string'),
+        ),
+    },
+    'aumet_customers': {
+        'key': 'aumet_id',
+        'date_column': None,
+        'columns': (('aumet_id', 'int64'), ('name', 'string'), ('email', 'string'), ('phone', 'string')),
+    },
+    'aumet_products': {
+        'key': 'aumet_id',
+        'date_column': None,
+        'columns': (
+            ('aumet_id', 'int64'), ('name', 'string'), ('default_code', 'string'), ('list_price', 'float64'),
+        ),
+    },
+    'aumet_inventory': {
+        'key': ('product_id', 'location'),
+        'date_column': None,
+        'columns': (
+            ('product_id', 'int64'), ('product_name', 'string'), ('location', 'string'),
+            ('quantity', 'float64'), ('reserved_quantity', 'float64'), ('available_quantity', 'float64'),
+        ),
+    },
+}
+
+ARROW_TYPES = {
+    'int64': pa.int64(),
+    'float64': pa.float64(),
+    'string': pa.string(),
+    # Parquet لا يحفظ الثواني كوحدة؛ ms حتى تطابق الملفات المقروءة ما يُكتب
+    'timestamp': pa.timestamp('ms', tz='UTC'),
+}
+
+
+def export_schema(table):
+    """schema ملفات الجدول (بدون عمود القسم، فهو في اسم المجلد)"""
+    return pa.schema([(name, ARROW_TYPES[kind]) for name, kind in EXPORT_TABLES[table]['columns']])
+
+
+def _array(values, kind):
+    """عمود Arrow من قيم Odoo/Supabase (False في Odoo = قيمة فارغة)"""
+    if kind == 'timestamp':
+        text = pa.array([value or None for value in values], pa.string())
+        parsed = pc.strptime(text, format=sales_aggregates.ODOO_DATETIME_FORMAT, unit='s')
+        return parsed.cast(ARROW_TYPES[kind])
+    return pa.array([None if value is False else value for value in values], ARROW_TYPES[kind])
+
+
+def _partition_values(table, data, length):
+    """اسم قسم كل صف: اليوم المحلي لعمود التاريخ، أو يوم التشغيل للقطات"""
+    date_column = EXPORT_TABLES[table]['date_column']
+    if date_column is None:
+        return pa.array([sales_aggregates.today()] * length, pa.string())
+    local = data[date_column].cast(pa.timestamp('ms', tz=sales_aggregates.SALES_TIMEZONE))
+    return pc.fill_null(pc.strftime(local, format='%Y-%m-%d'), NULL_PARTITION)
+
+
+def to_arrow(table, rows):
+    """دفعة صفوف (Columns أو قائمة قواميس) ← جدول Arrow بأعمدة التصدير وعمود القسم"""
+    columns = EXPORT_TABLES[table]['columns']
+    if isinstance(rows, list):
+        values = {name: [row.get(name) for row in rows] for name, _ in columns}
+    else:
+        values = {name: rows[name] for name, _ in columns}
+    data = pa.table({name: _array(values[name], kind) for name, kind in columns}, schema=export_schema(table))
+    return data.append_column(PARTITION_COLUMN, _partition_values(table, data, len(data)))
+
+
+def split_partitions(data):
+    """{اسم القسم: صفوفه} بعد إزالة عمود القسم"""
+    if not len(data):
+        return {}
+    data = data.sort_by(PARTITION_COLUMN)
+    parts = {}
+    offset = 0
+    for entry in pc.value_counts(data[PARTITION_COLUMN]):
+        value, count = entry['values'].as_py(), entry['counts'].as_py()
+        parts[value] = data.slice(offset, count).drop_columns([PARTITION_COLUMN])
+        offset += count
+    return parts
+
+
+class FileExport:
+    """مُصدّر جداول المزامنة إلى مجلد واحد بصيغة واحدة (parquet أو arrow)"""
+
+    def __init__(self, root, file_format='parquet'):
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"صيغة تصدير غير معروفة: {file_format}")
+        self.root = root
+        self.file_format = file_format
+        self.filename = f"part-0.{EXPORT_FORMATS[file_format]}"
+
+    def exports(self, table):
+        return table in EXPORT_TABLES
+
+    def _partition_field(self, table):
+        return 'day' if EXPORT_TABLES[table]['date_column'] else 'snapshot_date'
+
+    def _partition_dir(self, base, table, value):
+        return os.path.join(base, f"{self._partition_field(table)}={value}")
+
+    # ---------- الملفات ----------
+
+    def read(self, path, columns=None):
+        """قراءة ملف قسم عبر memory map"""
+        if self.file_format == 'parquet':
+            return pq.read_table(path, columns=columns, memory_map=True)
+        data = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        return data.select(columns) if columns else data
+
+    def _write_file(self, path, data):
+        """كتابة ملف قسم بشكل ذري (ملف مؤقت ثم استبدال)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        if self.file_format == 'parquet':
+            pq.write_table(data, tmp_path, compression=PARQUET_COMPRESSION)
+        else:
+            # بدون ضغط حتى تُقرأ الأعمدة من الملف المربوط بالذاكرة مباشرة
+            with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, data.schema) as writer:
+                writer.write_table(data)
+        os.replace(tmp_path, path)
+
+    def _existing_partitions(self, table):
+        """{اسم القسم: مسار ملفه} للأقسام الموجودة حالياً"""
+        directory = os.path.join(self.root, table)
+        prefix = f"{self._partition_field(table)}="
+        if not os.path.isdir(directory):
+            return {}
+        partitions = {}
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name, self.filename)
+            if name.startswith(prefix) and os.path.exists(path):
+                partitions[name[len(prefix):]] = path
+        return partitions
+
+    # ---------- الكتابة ----------
+
+    def tee(self, table, batches, mode='replace', deletes=()):
+        """تمرير الدفعات كما هي مع تجميعها بصيغة Arrow، ثم كتابة الملفات بعد آخر دفعة
+
+        mode='replace': الدفعات لقطة كاملة للجدول (أو لقسم يوم التشغيل).
+        mode='merge': الدفعات صفوف معدلة فقط؛ deletes مفاتيح تُحذف (تُقرأ بعد
+        آخر دفعة فيمكن ملؤها أثناء المرور).
+        """
+        parts = []
+        for rows in batches:
+            parts.append(to_arrow(table, rows))
+            yield rows
+        self.write_arrow(table, parts, mode, deletes)
+
+    def write(self, table, batches, mode='replace', deletes=()):
+        """كتابة الدفعات مباشرة (بدون Supabase)؛ تُعيد عدد الصفوف"""
+        count = 0
+        for rows in self.tee(table, batches, mode, deletes):
+            count += len(rows)
+        return count
+
+    def write_arrow(self, table, parts, mode='replace', deletes=()):
+        data = pa.concat_tables(parts) if parts else None
+        if mode == 'merge':
+            self._merge(table, data, deletes)
+        elif data is None or not len(data):
+            # لقطة فارغة لا تستبدل الملفات الحالية (كما في load_batches)
+            logger.warning(f"⚠️ {table}: لا توجد صفوف للتصدير - الملفات الحالية كما هي")
+        elif EXPORT_TABLES[table]['date_column']:
+            self._replace_table(table, split_partitions(data))
+        else:
+            self._replace_partitions(table, split_partitions(data))
+
+    def _replace_table(self, table, partitions):
+        """لقطة كاملة لجدول مؤرخ: بناء المجلد كاملاً بجانب الحالي ثم تبديلهما"""
+        target = os.path.join(self.root, table)
+        building = os.path.join(self.root, f".{table}.tmp")
+        previous = os.path.join(self.root, f".{table}.old")
+        for path in (building, previous):
+            shutil.rmtree(path, ignore_errors=True)
+        for value, data in partitions.items():
+            self._write_file(os.path.join(self._partition_dir(building, table, value), self.filename), data)
+        if os.path.exists(target):
+            os.rename(target, previous)
+        os.rename(building, target)
+        shutil.rmtree(previous, ignore_errors=True)
+        rows = sum(len(data) for data in partitions.values())
+        logger.info(f"📁 {table}: تصدير {rows} صف في {len(partitions)} قسم ({self.file_format})")
+
+    def _replace_partitions(self, table, partitions):
+        """لقطة يوم التشغيل: استبدال ملف قسمه فقط"""
+        base = os.path.join(self.root, table)
+        for value, data in partitions.items():
+            self._write_file(os.path.join(self._partition_dir(base, table, value), self.filename), data)
+            logger.info(f"📁 {table}: تصدير {len(data)} صف في {self._partition_field(table)}={value}")
+
+    def _merge(self, table, data, deletes):
+        """دمج صفوف معدلة: حذف مفاتيحها (و deletes) من أقسامها ثم إضافتها لأقسامها الجديدة"""
+        key = EXPORT_TABLES[table]['key']
+        if not isinstance(key, str):
+            raise ValueError(f"{table}: الدمج يتطلب مفتاحاً من عمود واحد")
+        incoming = split_partitions(data) if data is not None else {}
+        existing = self._existing_partitions(table)
+        # دمج الصفوف المعدلة فقط في تصدير غير موجود ينتج جدولاً ناقصاً
+        if not EXPORT_TABLES[table]['date_column']:
+            today = sales_aggregates.today()
+            if today not in existing:
+                logger.info(f"ℹ️ {table}: لا توجد لقطة لليوم ({today}) - تُصدّر في المزامنة الكاملة فقط")
+                return
+            existing = {today: existing[today]}
+        elif not existing:
+            logger.info(f"ℹ️ {table}: لا يوجد تصدير سابق للدمج فيه - شغّل --export-only بدون نافذة لإنشائه")
+            return
+        affected = set(deletes)
+        if data is not None:
+            affected.update(data[key].to_pylist())
+        if not affected:
+            return
+        affected = pa.array(sorted(affected), ARROW_TYPES['int64'])
+
+        base = os.path.join(self.root, table)
+        touched = written = 0
+        for value, path in existing.items():
+            # عمود المفتاح فقط أولاً: معظم الأقسام لا تحتوي مفاتيح معدلة
+            stale = pc.is_in(self.read(path, [key])[key], value_set=affected)
+            new_rows = incoming.pop(value, None)
+            if not pc.any(stale).as_py() and new_rows is None:
+                continue
+            kept = self.read(path).filter(pc.invert(stale))
+            touched += 1
+            merged = pa.concat_tables([kept, new_rows]) if new_rows is not None else kept
+            if len(merged):
+                self._write_file(path, merged)
+            else:
+                shutil.rmtree(os.path.dirname(path))
+            written += 0 if new_rows is None else len(new_rows)
+        for value, new_rows in incoming.items():
+            self._write_file(os.path.join(self._partition_dir(base, table, value), self.filename), new_rows)
+            written += len(new_rows)
+            touched += 1
+        logger.info(f"📁 {table}: دمج {written} صف معدل في {touched} قسم ({self.file_format})")
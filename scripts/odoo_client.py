@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+عميل Odoo مشترك لسكريبتات المزامنة
+
+- بروتوكولان خلف نفس الواجهة: XML-RPC (/xmlrpc/2) أو JSON-RPC (/jsonrpc)
+- اتصالات HTTP دائمة (keep-alive) مع قبول استجابات gzip ومهلة قابلة للتعديل
+- transport مستقل لكل thread (آمن للاستخدام المتزامن)
+- تخزين uid بعد المصادقة لتجنب المصافحة (version + authenticate) في كل تشغيل
+"""
+
+import os
+import ssl
+import gzip
+import json
+import itertools
+import threading
+import http.client
+import xmlrpc.client
+import logging
+from urllib.parse import urlparse
+
+# مكتبة JSON سريعة إن كانت مثبتة (orjson)، وإلا المكتبة القياسية
+try:
+    import orjson
+
+    JSON_CODEC = 'orjson'
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    JSON_CODEC = 'json'
+
+    def _json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+PROTOCOLS = ('xmlrpc', 'jsonrpc')
+DEFAULT_PROTOCOL = os.getenv('ODOO_PROTOCOL', 'xmlrpc')
+DEFAULT_TIMEOUT = float(os.getenv('ODOO_TIMEOUT', '120'))
+DEFAULT_SESSION_CACHE = os.getenv(
+    'ODOO_SESSION_CACHE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.odoo_session.json')
+)
+
+
+class OdooAuthError(Exception):
+    """فشل المصادقة مع Odoo"""
+
+
+class OdooRPCError(Exception):
+    """خطأ أعاده خادم Odoo عبر JSON-RPC (يقابل xmlrpc.client.Fault)"""
+
+    def __init__(self, name, message):
+        super().__init__(f'{name}: {message}')
+        self.name = name
+        self.message = message
+        self.faultString = f'{name}: {message}'
+
+
+class KeepAliveTransport(xmlrpc.client.Transport):
+    """Transport لـ XML-RPC يعيد استخدام اتصال HTTP واحد لجميع الطلبات
+
+    يطلب ضغط gzip للاستجابات، ويطبق مهلة على الاتصال، ويحسب عدد
+    البايتات المرسلة والمستقبلة.
+    """
+
+    accept_gzip_encoding = True
+
+    def __init__(self, scheme='https', timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.scheme = scheme
+        self.timeout = timeout
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def make_connection(self, host):
+        if self._connection and host == self._connection[0]:
+            return self._connection[1]
+
+        chost, self._extra_headers, x509 = self.get_host_info(host)
+        if self.scheme == 'https':
+            connection = http.client.HTTPSConnection(
+                chost, timeout=self.timeout, context=ssl.create_default_context()
+            )
+        else:
+            connection = http.client.HTTPConnection(chost, timeout=self.timeout)
+        self._connection = host, connection
+        return connection
+
+    def send_content(self, connection, request_body):
+        self.bytes_sent += len(request_body)
+        super().send_content(connection, request_body)
+
+    def parse_response(self, response):
+        # Content-Length هو الحجم على الشبكة (بعد الضغط إن وجد)
+        self.bytes_received += int(response.getheader('Content-Length') or 0)
+        return super().parse_response(response)
+
+
+class JsonRpcTransport:
+    """استدعاءات Odoo عبر /jsonrpc على اتصال HTTP دائم
+
+    أخطاء HTTP تُرفع كـ xmlrpc.client.ProtocolError لتُعامل مثل أخطاء XML-RPC
+    (مثلاً في تصغير الدفعات عند 413/504).
+    """
+
+    def __init__(self, url, timeout=DEFAULT_TIMEOUT):
+        parsed = urlparse(url)
+        self.scheme = parsed.scheme or 'https'
+        self.host = parsed.netloc
+        self.path = f"{parsed.path.rstrip('/')}/jsonrpc"
+        self.timeout = timeout
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._connection = None
+        self._ids = itertools.count(1)
+
+    def _connect(self):
+        if self._connection is None:
+            if self.scheme == 'https':
+                self._connection = http.client.HTTPSConnection(
+                    self.host, timeout=self.timeout, context=ssl.create_default_context()
+                )
+            else:
+                self._connection = http.client.HTTPConnection(self.host, timeout=self.timeout)
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _post(self, body):
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip',
+        }
+        # إعادة المحاولة مرة واحدة إذا أغلق الخادم الاتصال الدائم
+        for attempt in (0, 1):
+            connection = self._connect()
+            try:
+                connection.request('POST', self.path, body, headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if attempt:
+                    raise
+            except Exception:
+                # timeout أو خطأ آخر: الاتصال في حالة غير معروفة
+                self.close()
+                raise
+        if response.will_close:
+            self.close()
+
+        self.bytes_sent += len(body)
+        self.bytes_received += len(data)
+        if response.status != 200:
+            raise xmlrpc.client.ProtocolError(
+                f'{self.host}{self.path}', response.status, response.reason, dict(response.getheaders())
+            )
+        if response.getheader('Content-Encoding') == 'gzip':
+            data = gzip.decompress(data)
+        return data
+
+    def call(self, service, method, *args):
+        body = _json_dumps({
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'params': {'service': service, 'method': method, 'args': args},
+            'id': next(self._ids),
+        })
+        reply = _json_loads(self._post(body))
+        error = reply.get('error')
+        if error:
+            data = error.get('data') or {}
+            raise OdooRPCError(data.get('name') or error.get('message', ''), data.get('message') or str(error))
+        return reply.get('result')
+
+
+class OdooClient:
+    """عميل Odoo عبر XML-RPC أو JSON-RPC (protocol)
+
+    الاستخدام:
+        odoo = OdooClient(url, db, username, password)
+        odoo.authenticate()
+        odoo.execute_kw('res.partner', 'search_read', [[]], {'fields': ['name']})
+    """
+
+    def __init__(self, url, db, username, password, uid=None, protocol=DEFAULT_PROTOCOL,
+                 timeout=DEFAULT_TIMEOUT, session_cache=DEFAULT_SESSION_CACHE):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"بروتوكول غير مدعوم: {protocol}")
+        self.protocol = protocol
+        self.url = url.rstrip('/')
+        self.db = db
+        self.username = username
+        self.password = password
+        self.uid = uid
+        self.timeout = timeout
+        self.session_cache = session_cache
+        self._scheme = urlparse(self.url).scheme or 'https'
+        self._local = threading.local()
+        self._transports = []
+        self._transports_lock = threading.Lock()
+        self._auth_lock = threading.Lock()
+
+    # ---------- الاتصال ----------
+
+    def _transport(self):
+        """transport الخاص بالـ thread الحالي (يُنشأ عند أول استخدام)"""
+        transport = getattr(self._local, 'transport', None)
+        if transport is None:
+            if self.protocol == 'jsonrpc':
+                transport = JsonRpcTransport(self.url, self.timeout)
+            else:
+                transport = KeepAliveTransport(self._scheme, self.timeout)
+            self._local.transport = transport
+            self._local.proxies = {}
+            with self._transports_lock:
+                self._transports.append(transport)
+        return transport
+
+    def _call(self, service, method, *args):
+        """استدعاء دالة خدمة Odoo (common/object) بالبروتوكول المحدد"""
+        transport = self._transport()
+        if self.protocol == 'jsonrpc':
+            return transport.call(service, method, *args)
+
+        proxies = self._local.proxies
+        if service not in proxies:
+            proxies[service] = xmlrpc.client.ServerProxy(
+                f'{self.url}/xmlrpc/2/{service}',
+                transport=transport,
+                allow_none=True
+            )
+        return getattr(proxies[service], method)(*args)
+
+    @property
+    def bytes_sent(self):
+        return sum(t.bytes_sent for t in self._transports)
+
+    @property
+    def bytes_received(self):
+        return sum(t.bytes_received for t in self._transports)
+
+    def transport_bytes(self):
+        """(المرسل، المستقبل) عبر transport الـ thread الحالي (لقياس طلب بعينه)"""
+        transport = self._transport()
+        return transport.bytes_sent, transport.bytes_received
+
+    def version(self):
+        """معلومات إصدار الخادم"""
+        return self._call('common', 'version')
+
+    # ---------- المصادقة ----------
+
+    def _cache_key(self):
+        # بدون أي أثر لكلمة المرور: تغيرها يُكتشف برفض uid المخزن ثم إعادة المصادقة
+        return f'{self.url}|{self.db}|{self.username}'
+
+    def _load_cached_uid(self):
+        if not self.session_cache or not os.path.exists(self.session_cache):
+            return None
+        try:
+            with open(self.session_cache, 'r', encoding='utf-8') as f:
+                entry = json.load(f).get(self._cache_key())
+        except (OSError, ValueError):
+            return None
+        return entry.get('uid') if entry else None
+
+    def _save_cached_uid(self):
+        if not self.session_cache:
+            return
+        cache = {}
+        if os.path.exists(self.session_cache):
+            try:
+                with open(self.session_cache, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+        cache[self._cache_key()] = {'uid': self.uid}
+        tmp_path = f'{self.session_cache}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, self.session_cache)
+
+    def authenticate(self, force=False):
+        """الحصول على uid: من الذاكرة المؤقتة إن وجد وإلا عبر المصادقة مع الخادم
+
+        تُعيد (uid, from_cache).
+        """
+        with self._auth_lock:
+            if not force:
+                if self.uid:
+                    return self.uid, True
+                cached_uid = self._load_cached_uid()
+                if cached_uid:
+                    self.uid = cached_uid
+                    return self.uid, True
+
+            uid = self._call('common', 'authenticate', self.db, self.username, self.password, {})
+            if not uid:
+                raise OdooAuthError("فشلت المصادقة مع Odoo")
+            self.uid = uid
+            self._save_cached_uid()
+            return self.uid, False
+
+    # ---------- الاستدعاءات ----------
+
+    @staticmethod
+    def _is_access_denied(error):
+        if not isinstance(error, (xmlrpc.client.Fault, OdooRPCError)):
+            return False
+        return 'AccessDenied' in error.faultString or 'Access Denied' in error.faultString
+
+    def execute_kw(self, model, method, args, kwargs=None):
+        """استدعاء دالة على نموذج Odoo (نفس execute_kw في XML-RPC)
+
+        إذا رُفض uid المخزن (تغيرت كلمة المرور مثلاً) تُعاد المصادقة مرة واحدة.
+        """
+        if not self.uid:
+            self.authenticate()
+        uid = self.uid
+        try:
+            return self._call(
+                'object', 'execute_kw',
+                self.db, uid, self.password, model, method, args, kwargs or {}
+            )
+        except Exception as e:
+            if not self._is_access_denied(e):
+                raise
+            logger.warning("⚠️ رُفض uid المخزن - إعادة المصادقة مع Odoo...")
+            with self._auth_lock:
+                stale = self.uid == uid
+            if stale:
+                self.authenticate(force=True)
+            return self._call(
+                'object', 'execute_kw',
+                self.db, self.uid, self.password, model, method, args, kwargs or {}
+            )
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+مطابقة سريعة بين Odoo و Supabase بـ checksum لكل نطاق id
+
+بدلاً من مقارنة الأعداد الإجمالية يدوياً (test_odoo_count.py و list_all_projects.py)
+يُقسّم كل كيان إلى نطاقات id، ويُقارن في كل نطاق بين الطرفين عدد السجلات
+ومجموع المبلغ لكل حالة (state):
+
+- Supabase: استعلام واحد لكل نطاقات المستوى عبر sync_bucket_checksums
+  (create_supabase_tables.sql).
+- Odoo: read_group لكل نطاق (أو search_count للكيانات بدون مبلغ وحالة).
+
+النطاقات المتطابقة لا تُفتح، والمختلفة فقط تُقسّم من جديد (--fanout) حتى
+يصغر النطاق إلى --leaf-size فتُقارن صفوفه مباشرة بعد نفس تحويل المزامنة،
+لمعرفة المفاتيح الناقصة والزائدة والمختلفة. مع --repair تُعاد مزامنة هذه
+النطاقات فقط: upsert للناقص والمختلف وحذف الزائد.
+
+مثال (فحص ليلي):
+    python scripts/reconcile_supabase.py --entities sales_orders,purchases --repair
+"""
+
+import os
+import re
+import sys
+import math
+import time
+import argparse
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+
+import sync_aumet_to_supabase as sync
+import sales_aggregates
+from columnar import Columns
+from odoo_client import PROTOCOLS, DEFAULT_PROTOCOL
+from snapshot_store import SnapshotStore, row_hash
+from sync_metrics import current_entity, write_json_report
+
+logger = logging.getLogger(__name__)
+
+# ==================== الإعدادات ====================
+
+RECONCILE_FANOUT = int(os.getenv('RECONCILE_FANOUT', '16'))  # عدد النطاقات الفرعية لكل نطاق مختلف
+RECONCILE_LEAF_SIZE = int(os.getenv('RECONCILE_LEAF_SIZE', '2000'))  # طول نطاق id تُقارن صفوفه مباشرة
+RECONCILE_REPORT_FILE = os.getenv(
+    'RECONCILE_REPORT_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.reconcile_report.json')
+)
+
+# أعمدة DECIMAL(10, 2): فرق أقل من نصف هللة ناتج عن جمع float في Odoo
+AMOUNT_TOLERANCE = 0.005
+DATETIME_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}')
+
+
+@dataclass
+class ReconcileSpec:
+    """كيان للمطابقة: نموذج Odoo وجدوله في Supabase وحقول الـ checksum
+
+    amount و state: اسم الحقل في Odoo وعمود Supabase معاً (نفس الاسم)؛
+    بدونهما يُقارن عدد السجلات فقط لكل نطاق.
+    sales_days: أيام الطلبات المُصلحة تُضاف إلى الأيام المعلقة (sync.mark_sales_days).
+    """
+    name: str
+    model: str
+    domain: list
+    fields: list
+    transform: object
+    table: str
+    key: str = 'aumet_id'
+    amount: str = None
+    state: str = None
+    stamp_synced_at: bool = False
+    sales_days: bool = False
+    label: str = 'سجل'
+
+
+def reconcile_specs():
+    """الكيانات القابلة للمطابقة (المفتاح في Supabase هو id السجل في Odoo)"""
+    models = {spec.name: spec for spec in sync.MODEL_SYNCS}
+    specs = [
+        ReconcileSpec(
+            name='sales_orders', model='pos.order',
+            # المرتجعات لا تُكتب في aumet_sales_orders (_order_columns)
+            domain=[['amount_total', '>=', 0]],
+            fields=sync.SALES_FIELDS, transform=sync._order_columns, table='aumet_sales_orders',
+            amount='amount_total', state='state', sales_days=True, label='طلب',
+        ),
+    ]
+    for name, amount, state in (('purchases', 'amount_total', 'state'), ('customers', None, None),
+                                ('products', None, None)):
+        spec = models[name]
+        specs.append(ReconcileSpec(
+            name=name, model=spec.model, domain=spec.domain, fields=spec.fields, transform=spec.transform,
+            table=spec.table, key=spec.key, amount=amount, state=state,
+            stamp_synced_at=spec.stamp_synced_at, label=spec.label,
+        ))
+    return specs
+
+
+# ==================== checksum لكل نطاق ====================
+
+def _range_domain(spec, low, high):
+    return list(spec.domain) + [['id', '>=', low], ['id', '<', high]]
+
+
+def id_bounds(odoo, supabase, spec, counts):
+    """[أصغر id، أكبر id + 1) في الطرفين معاً، أو None إذا كانا فارغين"""
+    ids = []
+    for descending in (False, True):
+        order = 'id desc' if descending else 'id asc'
+        ids += sync.odoo_execute(odoo, spec.model, 'search', [spec.domain], {'limit': 1, 'order': order})
+        query = supabase.table(spec.table).select(spec.key).order(spec.key, desc=descending).limit(1)
+        ids += [row[spec.key] for row in sync.supabase_execute(query, 'read').data]
+    counts['odoo_queries'] += 2
+    counts['supabase_queries'] += 2
+    return (min(ids), max(ids) + 1) if ids else None
+
+
+def odoo_checksum(odoo, spec, low, high):
+    """{الحالة: (العدد، مجموع المبلغ)} لسجلات Odoo في [low, high)"""
+    domain = _range_domain(spec, low, high)
+    if spec.state is None:
+        count = sync.odoo_execute(odoo, spec.model, 'search_count', [domain])
+        return {None: (count, 0.0)} if count else {}
+    groups = sync.odoo_execute(
+        odoo, spec.model, 'read_group', [domain, [spec.amount] if spec.amount else [], [spec.state]],
+        {'lazy': False}
+    )
+    return {
+        group[spec.state]: (group['__count'], round(group.get(spec.amount) or 0, 2) if spec.amount else 0.0)
+        for group in groups if group['__count']
+    }
+
+
+def supabase_checksums(supabase, spec, low, high, bucket_size):
+    """{رقم النطاق: {الحالة: (العدد، مجموع المبلغ)}} لكل نطاقات [low, high) بطلب واحد"""
+    params = {
+        'target': spec.table, 'key_column': spec.key, 'low': low, 'high': high, 'bucket_size': bucket_size,
+        'amount_column': spec.amount, 'state_column': spec.state,
+    }
+    buckets = {}
+    for row in sync.supabase_execute(supabase.rpc('sync_bucket_checksums', params), 'read').data:
+        buckets.setdefault(row['bucket'], {})[row['state']] = (row['row_count'], round(float(row['amount'] or 0), 2))
+    return buckets
+
+
+def same_checksum(odoo_sums, supabase_sums):
+    if odoo_sums.keys() != supabase_sums.keys():
+        return False
+    return all(
+        count == supabase_sums[state][0] and abs(amount - supabase_sums[state][1]) < AMOUNT_TOLERANCE
+        for state, (count, amount) in odoo_sums.items()
+    )
+
+
+# ==================== مقارنة الصفوف ====================
+
+def _normalize(value):
+    """قيمة قابلة للمقارنة بين Odoo (قبل الكتابة) و Supabase (بعد القراءة)"""
+    if value is False:
+        return None
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, str) and DATETIME_PATTERN.match(value):
+        # 'YYYY-MM-DD HH:MM:SS' من Odoo مقابل 'YYYY-MM-DDTHH:MM:SS+00:00' من TIMESTAMPTZ
+        return f"{value[:10]} {value[11:19]}"
+    return value
+
+
+def fetch_stored_range(supabase, spec, low, high, counts):
+    """صفوف Supabase في [low, high) كـ {المفتاح: الصف} (على صفحات)"""
+    stored = {}
+    start = 0
+    while True:
+        query = supabase.table(spec.table).select('*').gte(spec.key, low).lt(spec.key, high).order(spec.key)
+        rows = sync.supabase_execute(query.range(start, start + sync.KEYS_PAGE_SIZE - 1), 'read').data
+        counts['supabase_queries'] += 1
+        stored.update((row[spec.key], row) for row in rows)
+        if len(rows) < sync.KEYS_PAGE_SIZE:
+            return stored
+        start += sync.KEYS_PAGE_SIZE
+
+
+def compare_range(odoo, supabase, spec, low, high, counts):
+    """مقارنة صفوف نطاق صغير: (صفوف Odoo بعد التحويل، صفوف Supabase، الناقص، الزائد، المختلف)"""
+    rows = {}
+    for page in sync.fetch_pages(odoo, spec.model, _range_domain(spec, low, high), spec.fields, workers=1):
+        counts['odoo_queries'] += 1
+        for row in spec.transform(Columns.from_records(page, ['id'] + spec.fields)):
+            rows[row[spec.key]] = row
+    stored = fetch_stored_range(supabase, spec, low, high, counts)
+    missing = rows.keys() - stored.keys()
+    extra = stored.keys() - rows.keys()
+    changed = {
+        key for key in rows.keys() & stored.keys()
+        if any(_normalize(value) != _normalize(stored[key].get(col)) for col, value in rows[key].items())
+    }
+    return rows, stored, missing, extra, changed
+
+
+def repair_range(supabase, spec, rows, stored, missing, extra, changed, synced_at, snapshot=None):
+    """إعادة مزامنة نطاق: upsert للناقص والمختلف وحذف الزائد؛ تُعيد أيام الطلبات المتأثرة"""
+    upserts = [rows[key] for key in sorted(missing | changed)]
+    if spec.stamp_synced_at:
+        for row in upserts:
+            row['synced_at'] = synced_at
+    deletes = [(key,) for key in sorted(extra)]
+    if upserts:
+        sync.upsert_rows(supabase, spec.table, upserts, spec.key)
+    if deletes:
+        sync.delete_keys(supabase, spec.table, spec.key, deletes)
+    if snapshot is not None:
+        # حتى لا تتخطى مزامنة لاحقة صفاً أُصلح هنا أو تحاول حذفه مرة أخرى
+        snapshot.apply(spec.table, {(row[spec.key],): row_hash(row) for row in upserts}, deletes=deletes)
+    if not spec.sales_days:
+        return set()
+    dates = [row.get('date_order') for row in upserts]
+    dates += [stored[key].get('date_order') for key in changed | extra]
+    return {sales_aggregates.local_day(_normalize(value)) for value in dates if value}
+
+
+# ==================== المطابقة ====================
+
+def reconcile_entity(odoo, supabase, spec, fanout=RECONCILE_FANOUT, leaf_size=RECONCILE_LEAF_SIZE, repair=False,
+                     snapshot=None, workers=1):
+    """مطابقة كيان واحد بالتقسيم التدريجي للنطاقات المختلفة فقط وإعادة نتيجته"""
+    result = {
+        'status': 'ok', 'buckets': 0, 'ranges': [], 'missing': 0, 'extra': 0, 'changed': 0,
+        'repaired': 0, 'odoo_queries': 0, 'supabase_queries': 0,
+    }
+    bounds = id_bounds(odoo, supabase, spec, result)
+    if bounds is None:
+        logger.info(f"✅ {spec.name}: لا توجد سجلات في الطرفين")
+        return result
+    synced_at = datetime.now().isoformat()
+    days = set()
+    pending = [bounds]
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='reconcile') as executor:
+        while pending:
+            low, high = pending.pop(0)
+            if high - low <= leaf_size:
+                rows, stored, missing, extra, changed = compare_range(odoo, supabase, spec, low, high, result)
+                if not (missing or extra or changed):
+                    continue
+                result['ranges'].append([low, high])
+                for name, keys in (('missing', missing), ('extra', extra), ('changed', changed)):
+                    result[name] += len(keys)
+                logger.warning(
+                    f"⚠️ {spec.name} [{low}, {high}): ناقص {len(missing)}، زائد {len(extra)}، مختلف {len(changed)}"
+                )
+                if repair:
+                    days |= repair_range(supabase, spec, rows, stored, missing, extra, changed, synced_at, snapshot)
+                    result['repaired'] += len(missing) + len(extra) + len(changed)
+                continue
+
+            size = math.ceil((high - low) / fanout)
+            buckets = [(start, min(start + size, high)) for start in range(low, high, size)]
+            stored = supabase_checksums(supabase, spec, low, high, size)
+            futures = [
+                executor.submit(contextvars.copy_context().run, odoo_checksum, odoo, spec, start, end)
+                for start, end in buckets
+            ]
+            result['buckets'] += len(buckets)
+            result['supabase_queries'] += 1
+            result['odoo_queries'] += len(buckets)
+            for index, (bucket, future) in enumerate(zip(buckets, futures)):
+                if not same_checksum(future.result(), stored.get(index, {})):
+                    pending.append(bucket)
+
+    if days:
+        # تجميعات أيام الطلبات المُصلحة تُعاد في المزامنة التالية
+        sync.mark_sales_days(days)
+    drift = result['missing'] + result['extra'] + result['changed']
+    if drift and not repair:
+        result['status'] = 'drift'
+    elif drift:
+        result['status'] = 'repaired'
+    return result
+
+
+def log_result(spec, result):
+    queries = f"(Odoo: {result['odoo_queries']} طلب، Supabase: {result['supabase_queries']} طلب)"
+    if result['status'] == 'ok':
+        logger.info(f"✅ {spec.name}: متطابق في {result['buckets']} نطاق {queries}")
+        return
+    action = 'أُصلح' if result['status'] == 'repaired' else 'غير مُصلح'
+    logger.warning(
+        f"⚠️ {spec.name}: {len(result['ranges'])} نطاق مختلف - ناقص {result['missing']}، "
+        f"زائد {result['extra']}، مختلف {result['changed']} ({action}) {queries}"
+    )
+
+
+# ==================== البرنامج الرئيسي ====================
+
+def parse_args(argv=None):
+    """قراءة خيارات سطر الأوامر"""
+    names = [spec.name for spec in reconcile_specs()]
+    parser = argparse.ArgumentParser(description='مطابقة Odoo و Supabase بـ checksum لكل نطاق id')
+    parser.add_argument(
+        '--entities', default=','.join(names),
+        help=f"الكيانات مفصولة بفواصل (الافتراضي: الكل: {', '.join(names)})"
+    )
+    parser.add_argument(
+        '--repair', action='store_true',
+        help='إعادة مزامنة النطاقات المختلفة فقط (upsert للناقص والمختلف وحذف الزائد)'
+    )
+    parser.add_argument('--fanout', type=int, default=RECONCILE_FANOUT, help='عدد النطاقات الفرعية لكل نطاق مختلف')
+    parser.add_argument(
+        '--leaf-size', type=int, default=RECONCILE_LEAF_SIZE,
+        help='طول نطاق id الذي تُقارن صفوفه مباشرة بدلاً من تقسيمه'
+    )
+    parser.add_argument(
+        '--odoo-workers', type=int, default=sync.ODOO_WORKERS,
+        help='عدد طلبات checksum المتزامنة إلى Odoo'
+    )
+    parser.add_argument('--odoo-protocol', choices=PROTOCOLS, default=DEFAULT_PROTOCOL)
+    parser.add_argument(
+        '--no-snapshot', action='store_true',
+        help='عدم تحديث اللقطة المحلية بما أُصلح (مع --repair)'
+    )
+    parser.add_argument('--report', default=RECONCILE_REPORT_FILE, help='مسار تقرير المطابقة (JSON)')
+    args = parser.parse_args(argv)
+    args.entities = [name.strip() for name in args.entities.split(',') if name.strip()]
+    unknown = set(args.entities) - set(names)
+    if unknown:
+        parser.error(f"كيانات غير معروفة: {', '.join(sorted(unknown))} (المتاح: {', '.join(names)})")
+    if args.fanout < 2 or args.leaf_size < 1:
+        parser.error('--fanout يجب أن يكون 2 على الأقل و --leaf-size موجباً')
+    return args
+
+
+def main(argv=None):
+    """البرنامج الرئيسي"""
+    args = parse_args(argv)
+    sync.run_metrics.reset()
+
+    logger.info("=" * 60)
+    logger.info(f"🔍 مطابقة Odoo و Supabase ({'مع الإصلاح' if args.repair else 'فحص فقط'})")
+    logger.info("=" * 60)
+
+    odoo = sync.connect_odoo(args.odoo_protocol)
+    supabase = sync.connect_supabase()
+    snapshot = SnapshotStore(sync.SYNC_SNAPSHOT_FILE) if args.repair and not args.no_snapshot else None
+
+    results = {}
+    for spec in reconcile_specs():
+        if spec.name not in args.entities:
+            continue
+        token = current_entity.set(spec.name)
+        started = time.monotonic()
+        try:
+            results[spec.name] = reconcile_entity(
+                odoo, supabase, spec, args.fanout, args.leaf_size, args.repair, snapshot, args.odoo_workers
+            )
+            log_result(spec, results[spec.name])
+            status = 'ok'
+        except Exception as e:
+            logger.exception(f"❌ خطأ في مطابقة {spec.name}")
+            results[spec.name] = {'status': 'failed', 'error': str(e)}
+            status = 'failed'
+        finally:
+            current_entity.reset(token)
+        sync.run_metrics.stage_finished(spec.name, status, time.monotonic() - started)
+    if snapshot is not None:
+        snapshot.close()
+
+    report = sync.run_metrics.report(
+        mode='reconcile', repair=args.repair, fanout=args.fanout, leaf_size=args.leaf_size, reconcile=results
+    )
+    try:
+        write_json_report(args.report, report)
+        logger.info(f"📝 تقرير المطابقة: {args.report}")
+    except OSError as e:
+        logger.warning(f"⚠️ تعذرت كتابة تقرير المطابقة: {e}")
+
+    logger.info("=" * 60)
+    failed = [name for name, result in results.items() if result['status'] in ('failed', 'drift')]
+    if failed:
+        logger.error(f"❌ المطابقة غير مكتملة أو توجد فروقات في: {', '.join(failed)}")
+        sys.exit(1)
+    logger.info("✅ اكتملت المطابقة")
+
+
+if __name__ == "__main__":
+    main()
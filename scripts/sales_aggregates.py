@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+تجميعات المبيعات اليومية والشهرية من رؤوس الطلبات (pos.order)
+
+لكل يوم وشهر: عدد الطلبات، الإيراد، متوسط السلة، المرتجعات (الطلبات
+بمبلغ سالب) وصافي الإيراد، ولكل يوم وحالة طلب (state) نفس المقاييس
+(aumet_sales_daily_states). تُحدّث الجداول تزايدياً: مزامنة الطلبات تسجل
+الأيام التي لمستها الطلبات المعدلة، فيُعاد حساب هذه الأيام فقط من Odoo ثم
+الأشهر التي تحتويها من صفوفها اليومية.
+
+التاريخ في Odoo محفوظ بتوقيت UTC ويُحوّل إلى يوم محلي (SALES_TIMEZONE).
+"""
+
+import os
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+SALES_TIMEZONE = os.getenv('SALES_TIMEZONE', 'Asia/Riyadh')
+ODOO_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+ORDER_FIELDS = ['date_order', 'amount_total', 'state']
+TOTAL_COLUMNS = ('order_count', 'revenue', 'return_count', 'return_amount')
+
+
+def local_day(date_order):
+    """اليوم المحلي (YYYY-MM-DD) لتاريخ طلب بتوقيت UTC (من Odoo أو ISO من Supabase)"""
+    moment = datetime.strptime(date_order[:19].replace('T', ' '), ODOO_DATETIME_FORMAT).replace(tzinfo=timezone.utc)
+    return moment.astimezone(ZoneInfo(SALES_TIMEZONE)).date().isoformat()
+
+
+def month_of(day):
+    """أول يوم في شهر اليوم المعطى (مفتاح الجدول الشهري)"""
+    return f'{day[:7]}-01'
+
+
+def next_month(month):
+    first = date.fromisoformat(month)
+    return (first.replace(day=28) + timedelta(days=4)).replace(day=1).isoformat()
+
+
+def _utc_bound(day):
+    """بداية اليوم المحلي بتوقيت UTC بصيغة Odoo"""
+    start = datetime.combine(date.fromisoformat(day), datetime.min.time(), ZoneInfo(SALES_TIMEZONE))
+    return start.astimezone(timezone.utc).strftime(ODOO_DATETIME_FORMAT)
+
+
+def day_ranges(days):
+    """دمج الأيام المتتالية في فترات [(أول يوم، اليوم التالي لآخر يوم)]"""
+    ranges = []
+    for day in sorted(set(days)):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+        else:
+            ranges.append([day, (date.fromisoformat(day) + timedelta(days=1)).isoformat()])
+    return [tuple(r) for r in ranges]
+
+
+def days_domain(days, field='date_order'):
+    """domain لطلبات Odoo (أو بنودها مع field='order_id.date_order') الواقعة في الأيام المحلية المعطاة"""
+    terms = [
+        ['&', [field, '>=', _utc_bound(first)], [field, '<', _utc_bound(end)]]
+        for first, end in day_ranges(days)
+    ]
+    domain = ['|'] * (len(terms) - 1)
+    for term in terms:
+        domain.extend(term)
+    return domain
+
+
+def window_days(since, until):
+    """الأيام المحلية من since إلى until (شاملة)"""
+    first, last = date.fromisoformat(since), date.fromisoformat(until)
+    return [(first + timedelta(days=offset)).isoformat() for offset in range((last - first).days + 1)]
+
+
+def window_domain(field, since, until):
+    """domain لحقل تاريخ Odoo (بتوقيت UTC) داخل الأيام المحلية من since إلى until (شاملة)"""
+    end = (date.fromisoformat(until) + timedelta(days=1)).isoformat()
+    return [[field, '>=', _utc_bound(since)], [field, '<', _utc_bound(end)]]
+
+
+def today():
+    """اليوم المحلي الحالي (YYYY-MM-DD)"""
+    return datetime.now(ZoneInfo(SALES_TIMEZONE)).date().isoformat()
+
+
+def _empty_totals():
+    return dict.fromkeys(TOTAL_COLUMNS, 0)
+
+
+def add_orders(totals, orders):
+    """إضافة صفحة طلبات إلى المجاميع اليومية {(اليوم، الحالة): مجاميع}"""
+    for order in orders:
+        if not order.get('date_order'):
+            continue
+        bucket = totals.setdefault((local_day(order['date_order']), order.get('state')), _empty_totals())
+        amount = float(order.get('amount_total') or 0)
+        if amount < 0:
+            bucket['return_count'] += 1
+            bucket['return_amount'] -= amount
+        else:
+            bucket['order_count'] += 1
+            bucket['revenue'] += amount
+    return totals
+
+
+def add_day_groups(totals, groups, returns=False):
+    """إضافة نتائج read_group المجمعة على date_order:day و state (بتوقيت SALES_TIMEZONE)
+
+    يوم المجموعة يؤخذ من بداية __range (بتوقيت UTC) لأن تسمية المجموعة
+    تختلف حسب لغة المستخدم في Odoo.
+    """
+    for group in groups:
+        day_range = (group.get('__range') or {}).get('date_order:day')
+        if not day_range:
+            continue
+        bucket = totals.setdefault((local_day(day_range['from']), group.get('state')), _empty_totals())
+        amount = float(group.get('amount_total') or 0)
+        if returns:
+            bucket['return_count'] += group['__count']
+            bucket['return_amount'] -= amount
+        else:
+            bucket['order_count'] += group['__count']
+            bucket['revenue'] += amount
+    return totals
+
+
+def _row(totals, **key):
+    revenue = round(totals['revenue'], 2)
+    return_amount = round(totals['return_amount'], 2)
+    return {
+        **key,
+        'order_count': totals['order_count'],
+        'revenue': revenue,
+        'avg_basket': round(revenue / totals['order_count'], 2) if totals['order_count'] else 0.0,
+        'return_count': totals['return_count'],
+        'return_amount': return_amount,
+        'net_revenue': round(revenue - return_amount, 2),
+    }
+
+
+def totals_days(totals):
+    """الأيام التي فيها طلبات في المجاميع اليومية"""
+    return {day for day, _ in totals}
+
+
+def daily_rows(totals):
+    """صفوف aumet_sales_daily من المجاميع اليومية (جمع كل الحالات)"""
+    days = {}
+    for (day, _), day_totals in totals.items():
+        bucket = days.setdefault(day, _empty_totals())
+        for column in TOTAL_COLUMNS:
+            bucket[column] += day_totals[column]
+    return [_row(day_totals, sale_date=day) for day, day_totals in sorted(days.items())]
+
+
+def state_rows(totals):
+    """صفوف aumet_sales_daily_states: مجاميع كل يوم وحالة طلب"""
+    return [
+        _row(day_totals, sale_date=day, state=state)
+        for (day, state), day_totals in sorted(totals.items(), key=lambda item: (item[0][0], item[0][1] or ''))
+    ]
+
+
+def monthly_rows(rows):
+    """صفوف aumet_sales_monthly بجمع الصفوف اليومية لكل شهر"""
+    months = {}
+    for row in rows:
+        bucket = months.setdefault(month_of(row['sale_date']), _empty_totals())
+        for column in TOTAL_COLUMNS:
+            bucket[column] += row[column]
+    return [_row(month_totals, month=month) for month, month_totals in sorted(months.items())]
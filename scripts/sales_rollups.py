@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+تجميعات المبيعات اليومية من بنود نقاط البيع (pos.order.line) باستخدام pandas
+
+البنود تُختصر صفحة بصفحة إلى (طلب، منتج) حتى لا يُحتفظ بكل البنود في
+الذاكرة، ثم تُربط بتاريخ الطلب وعميله ويُحسب لكل يوم:
+- لكل منتج: الكمية، الإيراد، عدد الطلبات
+- لكل عميل: الكمية، الإيراد، عدد الطلبات
+
+التاريخ في Odoo محفوظ بتوقيت UTC ويُحوّل إلى يوم محلي (SALES_TIMEZONE).
+"""
+
+import pandas as pd
+
+from columnar import many2one
+from sales_aggregates import SALES_TIMEZONE
+
+NO_PARTNER_ID = 0  # عميل نقدي (طلب بدون عميل) - المفتاح لا يقبل NULL
+
+LINE_FIELDS = ['order_id', 'product_id', 'qty', 'price_subtotal_incl']
+ORDER_FIELDS = ['date_order', 'partner_id', 'amount_total']
+
+
+def order_headers_frame(orders):
+    """DataFrame لرؤوس الطلبات (id، اليوم المحلي، العميل) بدون المرتجعات"""
+    orders = [order for order in orders if order.get('amount_total', 0) >= 0]
+    frame = pd.DataFrame({
+        'order_id': [order['id'] for order in orders],
+        'date_order': [order.get('date_order') for order in orders],
+        'partner_id': many2one([order.get('partner_id') for order in orders], 0),
+        'partner_name': many2one([order.get('partner_id') for order in orders], 1),
+    })
+    frame['sale_date'] = (
+        pd.to_datetime(frame['date_order'], utc=True)
+        .dt.tz_convert(SALES_TIMEZONE)
+        .dt.strftime('%Y-%m-%d')
+    )
+    frame['partner_id'] = frame['partner_id'].fillna(NO_PARTNER_ID).astype('int64')
+    frame['partner_name'] = frame['partner_name'].fillna('عميل نقدي')
+    return frame.drop(columns='date_order').set_index('order_id')
+
+
+def reduce_lines(lines):
+    """اختصار صفحة بنود إلى مجاميع (طلب، منتج)"""
+    frame = pd.DataFrame({
+        'order_id': many2one([line.get('order_id') for line in lines], 0),
+        'product_id': many2one([line.get('product_id') for line in lines], 0),
+        'product_name': many2one([line.get('product_id') for line in lines], 1),
+        'quantity': [float(line.get('qty') or 0) for line in lines],
+        'revenue': [float(line.get('price_subtotal_incl') or 0) for line in lines],
+    }).dropna(subset=['order_id', 'product_id'])
+    return frame.groupby(['order_id', 'product_id'], as_index=False, sort=False).agg(
+        product_name=('product_name', 'first'),
+        quantity=('quantity', 'sum'),
+        revenue=('revenue', 'sum'),
+    )
+
+
+def daily_rollups(headers, reduced_pages):
+    """حساب التجميعات اليومية لكل منتج ولكل عميل
+
+    headers: ناتج order_headers_frame، reduced_pages: نواتج reduce_lines.
+    تُعيد (by_product, by_partner) كقوائم صفوف جاهزة للكتابة.
+    """
+    if not reduced_pages:
+        return [], []
+    # طلب واحد قد تتوزع بنوده على صفحتين: إعادة التجميع على (طلب، منتج)
+    pairs = pd.concat(reduced_pages, ignore_index=True).groupby(
+        ['order_id', 'product_id'], as_index=False, sort=False
+    ).agg(product_name=('product_name', 'first'), quantity=('quantity', 'sum'), revenue=('revenue', 'sum'))
+    pairs['order_id'] = pairs['order_id'].astype('int64')
+    pairs['product_id'] = pairs['product_id'].astype('int64')
+    # البنود التابعة لمرتجعات أو طلبات غير موجودة تسقط في الربط
+    pairs = pairs.join(headers, on='order_id', how='inner')
+
+    by_product = pairs.groupby(['sale_date', 'product_id'], as_index=False, sort=True).agg(
+        product_name=('product_name', 'first'),
+        quantity=('quantity', 'sum'),
+        revenue=('revenue', 'sum'),
+        order_count=('order_id', 'nunique'),
+    )
+    by_partner = pairs.groupby(['sale_date', 'partner_id'], as_index=False, sort=True).agg(
+        partner_name=('partner_name', 'first'),
+        quantity=('quantity', 'sum'),
+        revenue=('revenue', 'sum'),
+        order_count=('order_id', 'nunique'),
+    )
+    for frame in (by_product, by_partner):
+        frame['quantity'] = frame['quantity'].round(3)
+        frame['revenue'] = frame['revenue'].round(2)
+    return by_product.to_dict('records'), by_partner.to_dict('records')
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+مخزن لقطات محلي (SQLite) لآخر ما تم إرساله إلى Supabase
+
+لكل كيان (جدول) يُحفظ المفتاح الطبيعي لكل صف مع hash لمحتواه، بحيث
+يُرسل في التشغيل التالي فقط ما أُضيف أو تغير أو حُذف.
+"""
+
+import json
+import sqlite3
+import hashlib
+import threading
+
+# أعمدة تتغير في كل تشغيل ولا تعني تغيراً في البيانات
+HASH_IGNORED_COLUMNS = ('synced_at',)
+
+
+def row_hash(row):
+    """hash ثابت لمحتوى الصف (بغض النظر عن ترتيب الأعمدة)"""
+    content = {k: v for k, v in row.items() if k not in HASH_IGNORED_COLUMNS}
+    encoded = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def _encode_key(key):
+    return json.dumps(list(key), ensure_ascii=False, default=str)
+
+
+def _decode_key(text):
+    return tuple(json.loads(text))
+
+
+class SnapshotStore:
+    """لقطات المفتاح/hash لكل كيان في ملف SQLite واحد (آمن للاستخدام من عدة threads)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS snapshot_rows (
+                entity TEXT NOT NULL,
+                row_key TEXT NOT NULL,
+                row_hash TEXT NOT NULL,
+                PRIMARY KEY (entity, row_key)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.commit()
+
+    def load(self, entity):
+        """قاموس {المفتاح: hash} لآخر لقطة مرسلة للكيان"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT row_key, row_hash FROM snapshot_rows WHERE entity = ?', (entity,)
+            ).fetchall()
+        return {_decode_key(key): digest for key, digest in rows}
+
+    def apply(self, entity, upserts=None, deletes=()):
+        """تسجيل الصفوف التي كُتبت (upserts: {المفتاح: hash}) والمفاتيح التي حُذفت"""
+        with self._lock, self._conn:
+            if upserts:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO snapshot_rows (entity, row_key, row_hash) VALUES (?, ?, ?)',
+                    [(entity, _encode_key(key), digest) for key, digest in upserts.items()]
+                )
+            if deletes:
+                self._conn.executemany(
+                    'DELETE FROM snapshot_rows WHERE entity = ? AND row_key = ?',
+                    [(entity, _encode_key(key)) for key in deletes]
+                )
+
+    def reset(self, entity):
+        """حذف لقطة الكيان (يُرسل كل شيء في التشغيل التالي)"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM snapshot_rows WHERE entity = ?', (entity,))
+
+    def clear(self):
+        """حذف جميع اللقطات"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM snapshot_rows')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
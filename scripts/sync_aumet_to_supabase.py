@@ -6,11 +6,30 @@
 
 import os
 import sys
+import json
+import time
+import random
+import socket
+import hashlib
+import asyncio
+import argparse
+import threading
+import itertools
+import contextvars
+import http.client
 import xmlrpc.client
-from datetime import datetime
-from supabase import create_client, Client
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 import logging
 
+from odoo_client import OdooClient, PROTOCOLS, DEFAULT_PROTOCOL
+from columnar import Columns, as_rows, many2one, floats
+from snapshot_store import SnapshotStore, row_hash
+import sales_aggregates
+from sync_metrics import RunMetrics, current_entity, write_json_report, write_prometheus_textfile
+
 # إعداد Logging
 logging.basicConfig(
     level=logging.INFO,
@@ -26,30 +45,161 @@ ODOO_DB = os.getenv('ODOO_DB', 'health-path.erp-ksa.aumet.com')
 ODOO_USERNAME = os.getenv('ODOO_USERNAME', '')  # يجب إضافته في GitHub Secrets
 ODOO_PASSWORD = os.getenv('ODOO_PASSWORD', '')  # يجب إضافته في GitHub Secrets
 ODOO_UID = int(os.getenv('ODOO_UID', '7'))
+ODOO_TIMEOUT = float(os.getenv('ODOO_TIMEOUT', '120'))  # مهلة كل طلب (ثانية)
+ODOO_WORKERS = int(os.getenv('ODOO_WORKERS', '1'))  # عدد طلبات القراءة المتزامنة
 
 # Supabase Settings
 SUPABASE_URL = os.getenv('SUPABASE_URL', 'https://ajcbqdlpovpxbzltbjfl.supabase.co')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY', '')  # Service Role Key
+# schema الجداول؛ لكل فرع schema خاص بنفس أسماء الجداول (انظر sync_branches.py)
+SUPABASE_SCHEMA = os.getenv('SUPABASE_SCHEMA', 'public')
+
+# ملف حالة المزامنة (يحفظ آخر write_date/id تمت مزامنته لكل كيان)
+SYNC_STATE_FILE = os.getenv(
+    'SYNC_STATE_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.sync_state.json')
+)
+# هامش لفرق الساعة بين هذا الجهاز وخادم Odoo عند تحديد سقف العلامة بوقت بدء التشغيل
+SYNC_WATERMARK_MARGIN_SECONDS = int(os.getenv('SYNC_WATERMARK_MARGIN_SECONDS', '300'))
+ODOO_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # صيغة التواريخ في Odoo (بتوقيت UTC)
+
+# لقطة محلية (SQLite) لمفاتيح و hash آخر صفوف أُرسلت لكل جدول
+SYNC_SNAPSHOT_FILE = os.getenv(
+    'SYNC_SNAPSHOT_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.sync_snapshot.sqlite')
+)
+
+# تقرير مقاييس آخر تشغيل (JSON) وملف Prometheus النصي الاختياري
+SYNC_REPORT_FILE = os.getenv(
+    'SYNC_REPORT_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.sync_report.json')
+)
+SYNC_PROMETHEUS_FILE = os.getenv('SYNC_PROMETHEUS_FILE', '')  # مثال: /var/lib/node_exporter/aumet_sync.prom
+
+# نقاط الاستئناف: آخر صفحة جُلبت وكُتبت لكل كيان (تُحذف عند نجاح الكيان)
+SYNC_CHECKPOINT_FILE = os.getenv(
+    'SYNC_CHECKPOINT_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.sync_checkpoint.json')
+)
+
+# تصدير الجداول إلى ملفات Parquet/Arrow مقسمة حسب اليوم (فارغ = بدون تصدير، انظر file_export.py)
+SYNC_EXPORT_DIR = os.getenv('SYNC_EXPORT_DIR', '')
+SYNC_EXPORT_FORMAT = os.getenv('SYNC_EXPORT_FORMAT', 'parquet')  # parquet أو arrow
+
+# عدد طلبات الكتابة (upsert) المتزامنة إلى Supabase (1 = تسلسلي)
+SUPABASE_WRITE_CONCURRENCY = int(os.getenv('SUPABASE_WRITE_CONCURRENCY', '4'))
+
+# إعادة المحاولة للأخطاء المؤقتة (exponential backoff مع jitter)
+SYNC_MAX_RETRIES = int(os.getenv('SYNC_MAX_RETRIES', '4'))
+SYNC_RETRY_BASE_SECONDS = float(os.getenv('SYNC_RETRY_BASE_SECONDS', '1.0'))
+SYNC_RETRY_MAX_SECONDS = float(os.getenv('SYNC_RETRY_MAX_SECONDS', '30'))
+
+# ==================== حالة المزامنة ====================
+
+def load_state(path=None):
+    """قراءة حالة المزامنة السابقة من الملف (الافتراضي: SYNC_STATE_FILE)"""
+    path = path or SYNC_STATE_FILE
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ تعذرت قراءة ملف الحالة {path}: {e}")
+        return {}
+
+
+_state_lock = threading.Lock()
+
+
+def save_state(state, path=None):
+    """حفظ حالة المزامنة (كتابة ذرية لتجنب ملف تالف عند الانقطاع)"""
+    path = path or SYNC_STATE_FILE
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def update_state(key, value, path=None):
+    """تحديث مفتاح واحد في ملف الحالة (آمن عند تشغيل عدة مراحل بالتوازي)
+    
+    value=None يحذف المفتاح. إذا كانت value دالة تُستدعى بالقيمة الحالية
+    وتُحفظ نتيجتها، فيتم القراءة والتعديل تحت القفل نفسه (مثل إضافة أيام
+    إلى قائمة أو حذفها منها دون فقد ما أضافته مرحلة أخرى في الأثناء).
+    """
+    with _state_lock:
+        state = load_state(path)
+        if callable(value):
+            value = value(state.get(key))
+        if value is None:
+            state.pop(key, None)
+        else:
+            state[key] = value
+        save_state(state, path)
+
+
+class Checkpoint:
+    """نقطة استئناف كيان واحد: آخر id من Odoo كُتبت صفحته بنجاح
+    
+    fingerprint يصف ما يُجلب (النموذج، domain، وضع الكتابة...)؛ نقطة محفوظة
+    ببصمة مختلفة تُتجاهل. context قاموس إضافي يحفظه الكيان (مثل التقدم).
+    """
+    
+    def __init__(self, entity, fingerprint, resume=True):
+        self.entity = entity
+        self.fingerprint = hashlib.sha1(json.dumps(fingerprint, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        saved = load_state(SYNC_CHECKPOINT_FILE).get(entity) if resume else None
+        if saved and saved.get('fingerprint') != self.fingerprint:
+            logger.info(f"♻️ {entity}: تجاهل نقطة استئناف قديمة (تغيرت معايير الجلب)")
+            saved = None
+        self.resumed = bool(saved)
+        self.last_id = saved['last_id'] if saved else 0
+        self.pages = saved['pages'] if saved else 0
+        self.context = saved.get('context', {}) if saved else {}
+        if self.resumed:
+            logger.info(f"⏯️ {entity}: استئناف بعد id {self.last_id} ({self.pages} صفحة مكتوبة سابقاً)")
+    
+    def advance(self, last_id, **context):
+        """تسجيل أن الصفحات حتى last_id كُتبت"""
+        self.last_id = last_id
+        self.pages += 1
+        self.context.update(context)
+        update_state(self.entity, {
+            'fingerprint': self.fingerprint,
+            'last_id': last_id,
+            'pages': self.pages,
+            'context': self.context,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+        }, SYNC_CHECKPOINT_FILE)
+    
+    def clear(self):
+        update_state(self.entity, None, SYNC_CHECKPOINT_FILE)
+
 
 # ==================== الاتصال ====================
 
-def connect_odoo():
-    """الاتصال بـ Odoo ERP"""
+def connect_odoo(protocol=DEFAULT_PROTOCOL):
+    """الاتصال بـ Odoo ERP عبر XML-RPC أو JSON-RPC
+    
+    يُستخدم uid المخزن من تشغيل سابق (أو ODOO_UID) إن وجد لتجنب المصافحة
+    مع الخادم، ولا تتم المصادقة إلا عند عدم وجوده أو رفضه.
+    """
     try:
-        common = xmlrpc.client.ServerProxy(f'{ODOO_URL}/xmlrpc/2/common')
-        models = xmlrpc.client.ServerProxy(f'{ODOO_URL}/xmlrpc/2/object')
-        
-        # التحقق من الاتصال
-        version = common.version()
-        logger.info(f"✅ متصل بـ Odoo: {version}")
+        odoo = OdooClient(
+            ODOO_URL, ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD,
+            uid=ODOO_UID if 'ODOO_UID' in os.environ else None,
+            protocol=protocol,
+            timeout=ODOO_TIMEOUT
+        )
         
         # المصادقة
-        uid = common.authenticate(ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD, {})
-        if not uid:
-            raise Exception("فشلت المصادقة مع Odoo")
-        
-        logger.info(f"✅ تم تسجيل الدخول - UID: {uid}")
-        return models, uid
+        uid, from_cache = odoo.authenticate()
+        if from_cache:
+            logger.info(f"✅ متصل بـ Odoo ({ODOO_URL}, {protocol}) - UID محفوظ: {uid}")
+        else:
+            logger.info(f"✅ تم تسجيل الدخول إلى Odoo ({ODOO_URL}, {protocol}) - UID: {uid}")
+        return odoo
     
     except Exception as e:
         logger.error(f"❌ خطأ في الاتصال بـ Odoo: {e}")
@@ -57,13 +207,17 @@ def connect_odoo():
 
 
 def connect_supabase():
-    """الاتصال بـ Supabase"""
+    """الاتصال بـ Supabase
+    
+    supabase-py يُستورد هنا (وليس أعلى الملف) حتى يبدأ --dry-run بسرعة بدونه.
+    """
     try:
         if not SUPABASE_KEY:
             raise Exception("SUPABASE_KEY غير موجود")
+        from supabase import create_client, Client, ClientOptions
         
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        logger.info("✅ متصل بـ Supabase")
+        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY, ClientOptions(schema=SUPABASE_SCHEMA))
+        logger.info(f"✅ متصل بـ Supabase (schema: {SUPABASE_SCHEMA})")
         return supabase
     
     except Exception as e:
@@ -71,299 +225,2023 @@ def connect_supabase():
         sys.exit(1)
 
 
-# ==================== مزامنة طلبات المبيعات ====================
+# ==================== المقاييس ====================
 
-def sync_sales_orders(models, uid, supabase):
-    """مزامنة طلبات المبيعات من Odoo إلى Supabase (من pos.order)"""
-    try:
-        logger.info("📦 بدء مزامنة طلبات المبيعات (pos.order)...")
-        
-        # أولاً: معرفة العدد الكلي للطلبات
-        total_count = models.execute_kw(
-            ODOO_DB, uid, ODOO_PASSWORD,
-            'pos.order', 'search_count',
-            [[]]
+run_metrics = RunMetrics()
+
+# طور كل دالة Odoo في تقرير المقاييس
+ODOO_METHOD_PHASES = {'search_count': 'count', 'search': 'search'}
+
+
+def odoo_execute(odoo, model, method, args, kwargs=None, retry=True):
+    """odoo.execute_kw مع تسجيل الزمن والبايتات وعدد السجلات المستقبلة
+    
+    retry: إعادة المحاولة عند الأخطاء المؤقتة (exponential backoff مع jitter).
+    """
+    for attempt in itertools.count():
+        try:
+            return _odoo_execute_once(odoo, model, method, args, kwargs)
+        except Exception as e:
+            if not retry or not wait_before_retry(
+                e, attempt, ODOO_METHOD_PHASES.get(method, 'read'), f"Odoo {model}.{method}"
+            ):
+                raise
+
+
+def _odoo_execute_once(odoo, model, method, args, kwargs=None):
+    sent, received = odoo.transport_bytes()
+    with run_metrics.timed(ODOO_METHOD_PHASES.get(method, 'read')) as counters:
+        result = odoo.execute_kw(model, method, args, kwargs)
+        sent_after, received_after = odoo.transport_bytes()
+        counters.update(
+            calls=1,
+            bytes_sent=sent_after - sent,
+            bytes_received=received_after - received,
+            rows_in=len(result) if isinstance(result, list) else 0,
         )
-        
-        logger.info(f"📊 العدد الكلي للطلبات في Odoo: {total_count}")
-        
-        if total_count == 0:
-            logger.warning("⚠️ لا توجد طلبات مبيعات")
-            return
-        
-        # جلب جميع الطلبات باستخدام pagination
-        all_order_ids = []
-        batch_size = 1000  # جلب 1000 طلب في كل دفعة
-        offset = 0
-        
-        while offset < total_count:
-            logger.info(f"🔄 جلب الطلبات من {offset} إلى {offset + batch_size}...")
-            
-            batch_ids = models.execute_kw(
-                ODOO_DB, uid, ODOO_PASSWORD,
-                'pos.order', 'search',
-                [[]], 
-                {'limit': batch_size, 'offset': offset}
-            )
-            
-            if not batch_ids:
-                break
-            
-            all_order_ids.extend(batch_ids)
-            offset += batch_size
-            
-            logger.info(f"✅ تم جلب {len(batch_ids)} طلب (الإجمالي: {len(all_order_ids)}/{total_count})")
-        
-        logger.info(f"📊 تم جلب {len(all_order_ids)} طلب مبيعات بنجاح")
-        
-        # جلب تفاصيل الطلبات (على دفعات أيضاً لتجنب timeout)
-        all_orders = []
-        read_batch_size = 500  # قراءة 500 طلب في كل مرة
-        
-        for i in range(0, len(all_order_ids), read_batch_size):
-            batch_ids = all_order_ids[i:i+read_batch_size]
-            logger.info(f"📖 قراءة تفاصيل الطلبات {i+1} إلى {i+len(batch_ids)}...")
-            
-            orders = models.execute_kw(
-                ODOO_DB, uid, ODOO_PASSWORD,
-                'pos.order', 'read',
-                [batch_ids],
-                {'fields': ['name', 'partner_id', 'date_order', 'amount_total', 'state']}
+    return result
+
+
+def supabase_execute(query, phase, rows=None, retry=True, idempotent=True):
+    """query.execute() مع تسجيل الزمن وعدد الصفوف المرسلة (rows) أو المستقبلة
+    
+    retry: إعادة المحاولة عند الأخطاء المؤقتة؛ idempotent=False للإدراج
+    الذي قد يتكرر إذا أُعيد بعد انقطاع الاستجابة.
+    """
+    for attempt in itertools.count():
+        try:
+            return _supabase_execute_once(query, phase, rows)
+        except Exception as e:
+            if not retry or not wait_before_retry(e, attempt, phase, f"Supabase {phase}", idempotent):
+                raise
+
+
+def _supabase_execute_once(query, phase, rows=None):
+    with run_metrics.timed(phase) as counters:
+        response = query.execute()
+        _count_response(counters, response, rows)
+    return response
+
+
+async def _supabase_execute_once_async(query, phase, rows=None):
+    """مثل _supabase_execute_once لاستعلام من AsyncClient"""
+    with run_metrics.timed(phase) as counters:
+        response = await query.execute()
+        _count_response(counters, response, rows)
+    return response
+
+
+def _count_response(counters, response, rows=None):
+    counters['calls'] = 1
+    if rows is not None:
+        counters['rows_out'] = len(rows)
+        # تقدير حجم الطلب من أول صف لتجنب تسلسل الدفعة مرتين
+        counters['bytes_sent'] = len(json.dumps(rows[0], default=str)) * len(rows) if rows else 0
+    else:
+        data = response.data if isinstance(response.data, list) else []
+        counters['rows_in'] = len(data)
+        counters['bytes_received'] = len(json.dumps(data, default=str))
+
+
+# ==================== التحكم التكيفي في حجم الدفعات ====================
+
+# الزمن المستهدف لكل طلب: تكبر الدفعات ما دام الزمن أقل منه وتصغر إذا تجاوزه
+BATCH_TARGET_SECONDS = float(os.getenv('BATCH_TARGET_SECONDS', '2.0'))
+# الحد الأقصى لحجم جسم طلب الكتابة إلى Supabase (بايت)
+WRITE_MAX_PAYLOAD_BYTES = int(os.getenv('WRITE_MAX_PAYLOAD_BYTES', str(4 * 1024 * 1024)))
+
+
+def is_overload_error(error):
+    """هل الخطأ ناتج عن دفعة كبيرة جداً (timeout أو 413/502/504)؟"""
+    if isinstance(error, (TimeoutError, socket.timeout)):
+        return True
+    if isinstance(error, xmlrpc.client.ProtocolError):
+        return error.errcode in (413, 502, 504)
+    if 'Timeout' in type(error).__name__:
+        return True
+    # postgrest APIError: code هو رمز HTTP عند استجابة غير JSON، أو 57014 عند statement timeout
+    return str(getattr(error, 'code', '')) in ('413', '502', '504', '57014')
+
+
+# أسماء أصناف أخطاء الشبكة المؤقتة (httpx.TransportError وما يرث منه في supabase-py)
+TRANSIENT_ERROR_NAMES = ('TransportError',)
+# رموز HTTP/PostgreSQL لأخطاء مؤقتة (تعارض transaction أو deadlock مثلاً)
+TRANSIENT_ERROR_CODES = ('429', '500', '502', '503', '504', '40001', '40P01')
+# أخطاء تعني أن الطلب لم يُعالج أصلاً (آمن إعادته حتى للإدراج غير المتكرر)
+UNPROCESSED_ERROR_CODES = ('429', '503')
+
+
+def is_transient_error(error, idempotent=True):
+    """هل يستحق الخطأ إعادة المحاولة؟
+    
+    مع idempotent=False (إدراج قد يكون نُفذ قبل انقطاع الاستجابة) تُعاد
+    المحاولة فقط عند فشل الاتصال نفسه أو رفض الخادم للطلب قبل معالجته.
+    """
+    if isinstance(error, ConnectionRefusedError) or 'ConnectError' in type(error).__name__:
+        return True
+    if isinstance(error, xmlrpc.client.ProtocolError):
+        return str(error.errcode) in (TRANSIENT_ERROR_CODES if idempotent else UNPROCESSED_ERROR_CODES)
+    code = str(getattr(error, 'code', ''))
+    if not idempotent:
+        return code in UNPROCESSED_ERROR_CODES
+    if code == '413':
+        return False  # الدفعة كبيرة جداً: تكرارها بنفس الحجم لن ينجح
+    if is_overload_error(error) or code in TRANSIENT_ERROR_CODES:
+        return True
+    if isinstance(error, (ConnectionError, http.client.HTTPException)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def backoff_delay(attempt):
+    """exponential backoff مع full jitter: عشوائي بين 0 و min(الحد، الأساس × 2^المحاولة)"""
+    return random.uniform(0, min(SYNC_RETRY_MAX_SECONDS, SYNC_RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+def retry_delay(error, attempt, phase, description, idempotent=True):
+    """مدة الانتظار قبل إعادة المحاولة (مع تسجيلها)، أو None إذا يجب رفع الخطأ"""
+    if attempt >= SYNC_MAX_RETRIES or not is_transient_error(error, idempotent):
+        return None
+    delay = backoff_delay(attempt)
+    logger.warning(
+        f"⚠️ {description}: {type(error).__name__} - إعادة المحاولة "
+        f"{attempt + 1}/{SYNC_MAX_RETRIES} بعد {delay:.1f}s"
+    )
+    run_metrics.add(phase, retries=1)
+    return delay
+
+
+def wait_before_retry(error, attempt, phase, description, idempotent=True):
+    """الانتظار قبل إعادة المحاولة؛ تُعيد False إذا يجب رفع الخطأ"""
+    delay = retry_delay(error, attempt, phase, description, idempotent)
+    if delay is None:
+        return False
+    time.sleep(delay)
+    return True
+
+
+class AdaptiveBatchSize:
+    """حجم دفعة يتكيف حسب زمن الاستجابة وحجم البيانات المقاسين لكل طلب
+    
+    يكبر الحجم ×1.5 ما دام الطلب الممتلئ ينتهي في أقل من نصف الزمن المستهدف،
+    ويصغر بالتناسب إذا تجاوز الزمن المستهدف، وينخفض للنصف عند timeout أو
+    413/504 مع خفض السقف إلى 80% من الحجم الذي فشل. آمن للاستخدام من عدة threads.
+    """
+    
+    def __init__(self, name, initial, minimum=50, maximum=10000,
+                 target_seconds=None, max_payload_bytes=None):
+        self.name = name
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds or BATCH_TARGET_SECONDS
+        self.max_payload_bytes = max_payload_bytes
+        self.ceiling = maximum  # ينخفض إلى أقل من أي حجم تسبب في خطأ حمل زائد
+        self.calls = 0
+        self.shrinks = 0
+        self._lock = threading.Lock()
+    
+    def record(self, count, seconds, payload_bytes=None):
+        """تسجيل نتيجة طلب ناجح وتعديل الحجم"""
+        with self._lock:
+            self.calls += 1
+            size = self.size
+            if seconds > self.target_seconds:
+                size = int(size * self.target_seconds / seconds)
+            elif seconds < self.target_seconds / 2 and count >= size:
+                size = int(size * 1.5)
+            if payload_bytes and count and self.max_payload_bytes:
+                size = min(size, int(self.max_payload_bytes / (payload_bytes / count)))
+            self.size = max(self.minimum, min(self.ceiling, size))
+    
+    def shrink(self, error):
+        """تصغير الحجم بعد خطأ حمل زائد؛ تُعيد False إذا لا يمكن التصغير أكثر"""
+        with self._lock:
+            if not is_overload_error(error) or self.size <= self.minimum:
+                return False
+            self.ceiling = max(self.minimum, int(self.size * 0.8))
+            self.size = max(self.minimum, self.size // 2)
+            self.shrinks += 1
+            logger.warning(f"⚠️ {self.name}: {type(error).__name__} - تصغير الدفعة إلى {self.size}")
+            return True
+
+
+_batch_sizes = {}
+_batch_sizes_lock = threading.Lock()
+
+
+def batch_size_for(name, initial, **kwargs):
+    """متحكم الحجم الخاص بنموذج/جدول (يُنشأ عند أول استخدام ويُشارك بين المراحل)"""
+    with _batch_sizes_lock:
+        if name not in _batch_sizes:
+            _batch_sizes[name] = AdaptiveBatchSize(name, initial, **kwargs)
+        return _batch_sizes[name]
+
+
+def log_batch_sizes():
+    """طباعة حجم الدفعة الذي استقر عليه كل نموذج/جدول في هذا التشغيل"""
+    if not _batch_sizes:
+        return
+    logger.info("📏 أحجام الدفعات المستقرة:")
+    for name, batch in sorted(_batch_sizes.items()):
+        logger.info(f"   {name:<35} {batch.size:>6} (طلبات: {batch.calls}، تصغير: {batch.shrinks})")
+
+
+# ==================== القراءة من Odoo ====================
+
+ODOO_PAGE_SIZE = 1000  # الحجم الابتدائي لصفحة search_read (يتكيف أثناء التشغيل)
+
+
+def _search_read_page(odoo, model, domain, fields, page_size):
+    """طلب search_read واحد مرتب حسب id
+    
+    page_size إما رقم ثابت أو AdaptiveBatchSize؛ في الحالة الثانية يُقاس
+    الزمن ويُعاد المحاولة بصفحة أصغر عند timeout. تُعيد (الصفحة، الحد المطلوب).
+    """
+    attempt = 0
+    while True:
+        limit = page_size if isinstance(page_size, int) else page_size.size
+        started = time.monotonic()
+        try:
+            page = odoo_execute(
+                odoo, model, 'search_read',
+                [domain],
+                {'fields': fields, 'limit': limit, 'order': 'id asc'},
+                retry=False
             )
-            
-            all_orders.extend(orders)
-            logger.info(f"✅ تم قراءة {len(orders)} طلب (الإجمالي: {len(all_orders)}/{len(all_order_ids)})")
-        
-        orders = all_orders
-        
-        # تحويل البيانات للصيغة المناسبة لـ Supabase
-        sales_data = []
-        skipped_count = 0
-        for order in orders:
-            # تجاهل الطلبات بمبالغ سالبة (المرتجعات) مؤقتاً
-            if order.get('amount_total', 0) < 0:
-                skipped_count += 1
+        except Exception as e:
+            # أولاً تصغير الصفحة عند الحمل الزائد، ثم إعادة المحاولة بنفس الحجم مع backoff
+            if not isinstance(page_size, int) and page_size.shrink(e):
+                run_metrics.add('read', retries=1)
                 continue
-            
-            sales_data.append({
-                'aumet_id': order['id'],
-                'name': order['name'],
-                'partner_id': order['partner_id'][0] if order.get('partner_id') else None,
-                'date_order': order.get('date_order'),
-                'amount_total': float(order['amount_total']),
-                'state': order['state']
-            })
-        
-        if skipped_count > 0:
-            logger.warning(f"⚠️ تم تجاهل {skipped_count} طلب بمبالغ سالبة (مرتجعات)")
-        
-        # حذف البيانات القديمة وإدراج الجديدة
-        logger.info("🗑️ حذف البيانات القديمة...")
-        supabase.table('aumet_sales_orders').delete().neq('aumet_id', 0).execute()
-        
-        # إدراج البيانات الجديدة (على دفعات)
-        batch_size = 1000
-        for i in range(0, len(sales_data), batch_size):
-            batch = sales_data[i:i+batch_size]
-            supabase.table('aumet_sales_orders').insert(batch).execute()
-            logger.info(f"✅ تم إدراج {len(batch)} طلب ({i+len(batch)}/{len(sales_data)})")
+            if not wait_before_retry(e, attempt, 'read', f"Odoo {model}.search_read"):
+                raise
+            attempt += 1
+            continue
+        if not isinstance(page_size, int):
+            page_size.record(len(page), time.monotonic() - started)
+        return page, limit
+
+
+def fetch_pages(odoo, model, domain, fields, page_size=None, workers=None):
+    """جلب سجلات نموذج Odoo على صفحات باستخدام search_read مع keyset pagination
+    
+    بدلاً من offset (الذي يبطؤ كلما كبر) نطلب في كل مرة السجلات ذات
+    id أكبر من آخر id تم جلبه، مع جلب الحقول المطلوبة فقط. كل صفحة
+    تُعاد (yield) بمجرد وصولها. إذا لم يُحدد page_size يتكيف حجم الصفحة
+    حسب زمن الاستجابة (متحكم مستقل لكل نموذج).
+    
+    عند workers > 1 تُقسّم السجلات إلى نطاقات id منفصلة تُجلب بالتوازي،
+    وتُعاد الصفحات بنفس ترتيب id كما في المسار التسلسلي تماماً.
+    """
+    if page_size is None:
+        page_size = batch_size_for(f"odoo:{model}", ODOO_PAGE_SIZE)
+    if workers is None:
+        workers = ODOO_WORKERS
+    if workers > 1:
+        yield from _fetch_pages_parallel(odoo, model, domain, fields, page_size, workers)
+        return
+    
+    last_id = 0
+    while True:
+        page, limit = _search_read_page(
+            odoo, model, list(domain) + [['id', '>', last_id]], fields, page_size
+        )
+        if not page:
+            return
         
-        logger.info(f"✅ تمت مزامنة {len(sales_data)} طلب مبيعات بنجاح")
+        yield page
         
-    except Exception as e:
-        logger.error(f"❌ خطأ في مزامنة طلبات المبيعات: {e}")
+        if len(page) < limit:
+            return
+        last_id = page[-1]['id']
+
 
+def _fetch_id_range(odoo, model, domain, fields, page_size, low, high):
+    """جلب جميع صفحات نطاق id [low, high) داخل thread عامل"""
+    pages = []
+    last_id = low - 1
+    while True:
+        page, limit = _search_read_page(
+            odoo, model,
+            list(domain) + [['id', '>', last_id], ['id', '<', high]],
+            fields, page_size
+        )
+        if page:
+            pages.append(page)
+        # التوقف عند صفحة ناقصة أو بلوغ نهاية النطاق (بدون طلب إضافي فارغ)
+        if len(page) < limit or page[-1]['id'] >= high - 1:
+            return pages
+        last_id = page[-1]['id']
 
-# ==================== مزامنة العملاء ====================
 
-def sync_customers(models, uid, supabase):
-    """مزامنة العملاء من Odoo إلى Supabase"""
-    try:
-        logger.info("👥 بدء مزامنة العملاء...")
-        
-        # جلب العملاء من Odoo (فقط العملاء وليس الموردين)
-        customer_ids = models.execute_kw(
-            ODOO_DB, uid, ODOO_PASSWORD,
-            'res.partner', 'search',
-            [[['customer_rank', '>', 0]]], 
-            {'limit': 5000}
+def _fetch_pages_parallel(odoo, model, domain, fields, page_size, workers):
+    """جلب الصفحات بالتوازي عبر نطاقات id منفصلة"""
+    # تحديد أصغر وأكبر id مطابق لتقسيم المدى
+    bounds = []
+    for order in ('id asc', 'id desc'):
+        ids = odoo_execute(
+            odoo, model, 'search',
+            [domain],
+            {'limit': 1, 'order': order}
         )
-        
-        logger.info(f"📊 تم العثور على {len(customer_ids)} عميل")
-        
-        if not customer_ids:
-            logger.warning("⚠️ لا يوجد عملاء")
+        if not ids:
             return
+        bounds.append(ids[0])
+    min_id, max_id = bounds
+    
+    # نطاقات أكثر من عدد العمال لتوزيع الحمل عند تفاوت كثافة السجلات
+    base_size = page_size if isinstance(page_size, int) else page_size.size
+    step = max(base_size, -(-(max_id - min_id + 1) // (workers * 4)))
+    ranges = iter([(low, min(low + step, max_id + 1)) for low in range(min_id, max_id + 1, step)])
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='odoo-read') as executor:
+        def submit(id_range):
+            # كل نطاق يرث سياق المرحلة (الكيان الحالي في المقاييس)
+            return executor.submit(
+                contextvars.copy_context().run,
+                _fetch_id_range, odoo, model, domain, fields, page_size, *id_range
+            )
         
-        # جلب تفاصيل العملاء
-        customers = models.execute_kw(
-            ODOO_DB, uid, ODOO_PASSWORD,
-            'res.partner', 'read',
-            [customer_ids],
-            {'fields': ['name', 'email', 'phone', 'mobile', 'city', 'country_id', 'customer_rank']}
+        # نافذة محدودة من النطاقات قيد الجلب، تُستهلك بالترتيب
+        pending = deque(submit(r) for r in itertools.islice(ranges, workers * 2))
+        while pending:
+            pages = pending.popleft().result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                pending.append(submit(next_range))
+            yield from pages
+
+
+# ==================== خط المعالجة (Pipeline) ====================
+
+# الحد الأقصى لعدد السجلات المنتظرة بين مرحلة الجلب من Odoo ومرحلة الكتابة
+PIPELINE_MAX_BUFFERED = int(os.getenv('PIPELINE_MAX_BUFFERED', '5000'))
+
+
+def prefetch(pages, max_buffered=None):
+    """تشغيل مولّد الصفحات في thread خلفي مع طابور محدود بعدد السجلات
+    
+    يستمر جلب الصفحات التالية من Odoo بينما يعالج المستهلك الصفحات السابقة
+    ويكتبها، ويتوقف الجلب مؤقتاً إذا بلغ عدد السجلات المنتظرة max_buffered.
+    يبدأ الجلب فور الاستدعاء (قبل أول next) ليتداخل مع أي تحضير للكتابة.
+    """
+    if max_buffered is None:
+        max_buffered = PIPELINE_MAX_BUFFERED
+    
+    buffer = deque()
+    cond = threading.Condition()
+    status = {'buffered': 0, 'done': False, 'closed': False, 'error': None}
+    
+    def has_room(page):
+        # صفحة أكبر من الحد تُقبل فقط عندما يكون الطابور فارغاً
+        return status['closed'] or status['buffered'] == 0 or status['buffered'] + len(page) <= max_buffered
+    
+    def produce():
+        try:
+            for page in pages:
+                with cond:
+                    cond.wait_for(lambda: has_room(page))
+                    if status['closed']:
+                        break
+                    buffer.append(page)
+                    status['buffered'] += len(page)
+                    cond.notify_all()
+        except BaseException as e:
+            status['error'] = e
+        finally:
+            if hasattr(pages, 'close'):
+                pages.close()
+            with cond:
+                status['done'] = True
+                cond.notify_all()
+    
+    threading.Thread(
+        target=contextvars.copy_context().run, args=(produce,), name='odoo-prefetch', daemon=True
+    ).start()
+    
+    def consume():
+        try:
+            while True:
+                with cond:
+                    cond.wait_for(lambda: buffer or status['done'])
+                    if buffer:
+                        page = buffer.popleft()
+                        status['buffered'] -= len(page)
+                        cond.notify_all()
+                    elif status['error'] is not None:
+                        raise status['error']
+                    else:
+                        return
+                yield page
+        finally:
+            with cond:
+                status['closed'] = True
+                cond.notify_all()
+    
+    return consume()
+
+
+def stream_pages(odoo, model, domain, fields, label='سجل', start_after=0):
+    """جلب صفحات نموذج Odoo عبر الطابور المحدود مع تسجيل التقدم
+    
+    start_after: تخطي السجلات حتى هذا id (الاستئناف من نقطة حفظ).
+    """
+    if start_after:
+        domain = list(domain) + [['id', '>', start_after]]
+    fetched = 0
+    for page in prefetch(fetch_pages(odoo, model, domain, fields)):
+        fetched += len(page)
+        logger.info(f"✅ تم جلب {len(page)} {label} (الإجمالي: {fetched})")
+        yield page
+
+
+def read_group_pages(odoo, model, domain, fields, groupby, label='مجموعة', context=None):
+    """جلب نتائج read_group (مجاميع محسوبة في Odoo) على صفحات
+    
+    كل مجموعة قاموس فيه قيم حقول التجميع ومجاميع fields و __count
+    (lazy=False)، وللتواريخ __range بحدود الفترة بتوقيت UTC.
+    """
+    orderby = ', '.join(spec.split(':')[0] for spec in groupby)
+    offset = 0
+    while True:
+        kwargs = {'lazy': False, 'offset': offset, 'limit': ODOO_PAGE_SIZE, 'orderby': orderby}
+        if context:
+            kwargs['context'] = context
+        groups = odoo_execute(odoo, model, 'read_group', [domain, fields, list(groupby)], kwargs)
+        if groups:
+            offset += len(groups)
+            logger.info(f"✅ تم جلب {len(groups)} {label} مجمّعة من Odoo (الإجمالي: {offset})")
+            yield groups
+        if len(groups) < ODOO_PAGE_SIZE:
+            return
+
+
+# ==================== الكتابة إلى Supabase ====================
+
+# أوضاع الكتابة المتاحة:
+#   upsert: تحديث/إضافة الصفوف على المفتاح الطبيعي ثم حذف الصفوف التي اختفت من Odoo فقط
+#   swap:   تحميل كامل في جدول <table>_staging ثم استبدال الجدول الأصلي في transaction واحدة
+WRITE_MODES = ('upsert', 'swap')
+WRITE_BATCH_SIZE = 1000  # الحجم الابتدائي لدفعات الكتابة (يتكيف أثناء التشغيل)
+KEYS_PAGE_SIZE = 1000  # الحد الافتراضي لعدد الصفوف في استجابة PostgREST
+KEYS_LOOKUP_SIZE = 500  # عدد القيم في فلتر in.() واحد (يحد طول الرابط)
+INVENTORY_KEY = ('product_id', 'location')
+
+
+def _key_columns(key):
+    """تحويل المفتاح (عمود واحد أو عدة أعمدة) إلى tuple"""
+    return (key,) if isinstance(key, str) else tuple(key)
+
+
+def _row_key(row, key_cols):
+    """قيمة المفتاح الطبيعي لصف"""
+    return tuple(row.get(col) for col in key_cols)
+
+
+def fetch_existing_keys(supabase, table, key, where=None):
+    """جلب قيم المفتاح الطبيعي الموجودة حالياً في جدول Supabase (على صفحات)"""
+    return set(fetch_existing_values(supabase, table, key, where=where))
+
+
+def fetch_existing_values(supabase, table, key, columns=(), where=None):
+    """جلب {المفتاح: {العمود: القيمة}} لأعمدة محددة من جدول Supabase (على صفحات)
+    
+    where=(العمود، القيم): الصفوف التي قيمة العمود فيها ضمن القيم فقط.
+    """
+    key_cols = _key_columns(key)
+    values = {}
+    start = 0
+    while True:
+        query = supabase.table(table).select(','.join(key_cols + tuple(columns)))
+        if where is not None:
+            query = query.in_(*where)
+        for col in key_cols:
+            query = query.order(col)
+        rows = supabase_execute(query.range(start, start + KEYS_PAGE_SIZE - 1), 'read').data
+        values.update((_row_key(row, key_cols), {col: row.get(col) for col in columns}) for row in rows)
+        if len(rows) < KEYS_PAGE_SIZE:
+            return values
+        start += KEYS_PAGE_SIZE
+
+
+def delete_keys(supabase, table, key, keys):
+    """حذف صفوف محددة بقيم مفتاحها الطبيعي"""
+    key_cols = _key_columns(key)
+    keys = sorted(keys, key=lambda k: tuple('' if v is None else v for v in k))
+    if len(key_cols) == 1:
+        values = [k[0] for k in keys]
+        for i in range(0, len(values), WRITE_BATCH_SIZE):
+            batch = values[i:i+WRITE_BATCH_SIZE]
+            supabase_execute(supabase.table(table).delete().in_(key_cols[0], batch), 'delete', batch)
+        return
+    
+    # مفتاح مركب: تجميع حسب العمود الأول ثم حذف كل مجموعة بطلب واحد
+    groups = {}
+    for k in keys:
+        groups.setdefault(k[:-1], []).append(k[-1])
+    for prefix, last_values in groups.items():
+        query = supabase.table(table).delete()
+        for col, value in zip(key_cols[:-1], prefix):
+            query = query.eq(col, value)
+        supabase_execute(query.in_(key_cols[-1], last_values), 'delete', last_values)
+
+
+def _write_adaptive(table, rows, send, idempotent=True):
+    """إرسال الصفوف على دفعات بحجم يتكيف حسب زمن الاستجابة وحجم البيانات
+    
+    الدفعة الفاشلة تُصغّر عند الحمل الزائد، وإلا يُعاد إرسالها بعد backoff
+    عند الأخطاء المؤقتة (الدفعات المكتوبة قبلها لا تُعاد).
+    """
+    batch_size = _write_batch_size(table)
+    i = 0
+    attempt = 0
+    while i < len(rows):
+        batch = rows[i:i+batch_size.size]
+        started = time.monotonic()
+        try:
+            send(batch)
+        except Exception as e:
+            if batch_size.shrink(e):
+                run_metrics.add('insert', retries=1)
+                continue
+            if not wait_before_retry(e, attempt, 'insert', f"Supabase {table}", idempotent):
+                raise
+            attempt += 1
+            continue
+        attempt = 0
+        # تقدير حجم البيانات من أول صف لتجنب تسلسل الدفعة مرتين
+        payload_bytes = len(json.dumps(batch[0], default=str)) * len(batch)
+        batch_size.record(len(batch), time.monotonic() - started, payload_bytes)
+        i += len(batch)
+
+
+def _write_batch_size(table):
+    return batch_size_for(
+        f"supabase:{table}", WRITE_BATCH_SIZE,
+        maximum=5000, max_payload_bytes=WRITE_MAX_PAYLOAD_BYTES
+    )
+
+
+async def _write_adaptive_async(table, rows, send, idempotent=True):
+    """مثل _write_adaptive لدالة إرسال غير متزامنة (الانتظار لا يوقف باقي الطلبات)"""
+    batch_size = _write_batch_size(table)
+    i = 0
+    attempt = 0
+    while i < len(rows):
+        batch = rows[i:i+batch_size.size]
+        started = time.monotonic()
+        try:
+            await send(batch)
+        except Exception as e:
+            if batch_size.shrink(e):
+                run_metrics.add('insert', retries=1)
+                continue
+            delay = retry_delay(e, attempt, 'insert', f"Supabase {table}", idempotent)
+            if delay is None:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        attempt = 0
+        payload_bytes = len(json.dumps(batch[0], default=str)) * len(batch)
+        batch_size.record(len(batch), time.monotonic() - started, payload_bytes)
+        i += len(batch)
+
+
+def upsert_rows(supabase, table, rows, key):
+    """تحديث/إضافة الصفوف على دفعات باستخدام المفتاح الطبيعي
+    
+    rows قائمة قواميس أو Columns (تُحوّل كل دفعة إلى قواميس عند إرسالها فقط).
+    الاستجابة بدون الصفوف المكتوبة (return=minimal) لتجنب قراءتها وتحليلها.
+    """
+    from postgrest import ReturnMethod
+    on_conflict = ','.join(_key_columns(key))
+    _write_adaptive(
+        table, rows,
+        lambda batch: supabase_execute(
+            supabase.table(table).upsert(as_rows(batch), on_conflict=on_conflict, returning=ReturnMethod.minimal),
+            'insert', batch, retry=False
         )
-        
-        # تحويل البيانات
-        customers_data = []
-        for customer in customers:
-            customers_data.append({
-                'aumet_id': customer['id'],
-                'name': customer['name'],
-                'email': customer.get('email'),
-                'phone': customer.get('phone') or customer.get('mobile')
-            })
-        
-        # حذف البيانات القديمة وإدراج الجديدة
-        logger.info("🗑️ حذف البيانات القديمة...")
-        supabase.table('aumet_customers').delete().neq('aumet_id', 0).execute()
-        
-        # إدراج البيانات الجديدة
-        batch_size = 1000
-        for i in range(0, len(customers_data), batch_size):
-            batch = customers_data[i:i+batch_size]
-            supabase.table('aumet_customers').insert(batch).execute()
-            logger.info(f"✅ تم إدراج {len(batch)} عميل ({i+len(batch)}/{len(customers_data)})")
-        
-        logger.info(f"✅ تمت مزامنة {len(customers_data)} عميل بنجاح")
-        
-    except Exception as e:
-        logger.error(f"❌ خطأ في مزامنة العملاء: {e}")
+    )
+
+
+def insert_rows(supabase, table, rows):
+    """إدراج الصفوف على دفعات"""
+    from postgrest import ReturnMethod
+    _write_adaptive(
+        table, rows,
+        lambda batch: supabase_execute(
+            supabase.table(table).insert(as_rows(batch), returning=ReturnMethod.minimal),
+            'insert', batch, retry=False
+        ),
+        idempotent=False
+    )
+
 
+_END = object()  # نهاية المولّد عند قراءته عبر asyncio.to_thread(next, ...)
 
-# ==================== مزامنة المنتجات ====================
 
-def sync_products(models, uid, supabase):
-    """مزامنة المنتجات من Odoo إلى Supabase"""
+def write_stream(supabase, table, batches, prepare, key=None, label='سجل', on_written=None):
+    """كتابة دفعات متتالية من مولّد إلى جدول Supabase (key=None إدراج، وإلا upsert)
+    
+    prepare(rows) تُعيد (الصفوف المطلوب إرسالها، دالة تُستدعى بعد كتابتها).
+    on_written(i) تُستدعى بترتيب الدفعات بعد اكتمال كتابة الدفعة i وكل ما
+    قبلها (لنقاط الاستئناف). مع SUPABASE_WRITE_CONCURRENCY > 1 يُكتب upsert
+    بعدة طلبات متزامنة عبر asyncio (انظر _write_stream_async)؛ الإدراج يبقى
+    تسلسلياً لأن دفعة لاحقة كُتبت قبل فشل سابقتها ستتكرر عند الاستئناف.
+    """
+    if SUPABASE_WRITE_CONCURRENCY > 1 and key is not None:
+        return asyncio.run(_write_stream_async(supabase, table, batches, prepare, key, on_written))
+    for index, rows in enumerate(batches):
+        rows, written = prepare(rows)
+        if rows:
+            if key is None:
+                insert_rows(supabase, table, rows)
+            else:
+                upsert_rows(supabase, table, rows, key)
+        written()
+        if on_written is not None:
+            on_written(index)
+
+
+async def _write_stream_async(supabase, table, batches, prepare, key, on_written):
+    """كتابة الدفعات بحد أقصى SUPABASE_WRITE_CONCURRENCY طلباً متزامناً
+    
+    كل دفعة تُقسم إلى أجزاء بحجم دفعة الكتابة الحالي، ولكل جزء مكان في
+    نافذة الطلبات المتزامنة. الدفعة التالية لا تُطلب من المولّد (ومن ثم من
+    طابور Odoo) حتى يفرغ مكان، فيتوقف الجلب إذا تأخرت الكتابة. اكتمال
+    الدفعات يُعالج بترتيبها، وعند فشل أي جزء تُلغى الطلبات الجارية؛ أما
+    عند فشل المولّد فتُنتظر الدفعات المرسلة قبل رفع الخطأ.
+    """
+    from postgrest import ReturnMethod
+    from supabase import acreate_client, AsyncClientOptions
+    batches = iter(batches)
+    client = await acreate_client(
+        str(supabase.supabase_url), supabase.supabase_key, AsyncClientOptions(schema=SUPABASE_SCHEMA)
+    )
+    on_conflict = ','.join(_key_columns(key))
+    slots = asyncio.Semaphore(SUPABASE_WRITE_CONCURRENCY)
+    pending = deque()  # (رقم الدفعة، مهام أجزائها، دالة ما بعد الكتابة)
+    
+    async def send(batch):
+        query = client.table(table).upsert(as_rows(batch), on_conflict=on_conflict, returning=ReturnMethod.minimal)
+        await _supabase_execute_once_async(query, 'insert', batch)
+    
+    async def write_part(rows):
+        try:
+            await _write_adaptive_async(table, rows, send)
+        finally:
+            slots.release()
+    
+    async def complete(wait):
+        for _, tasks, _ in pending:
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+        while pending and (wait or all(task.done() for task in pending[0][1])):
+            index, tasks, written = pending[0]
+            await asyncio.gather(*tasks)
+            pending.popleft()
+            written()
+            if on_written is not None:
+                on_written(index)
+    
     try:
-        logger.info("📦 بدء مزامنة المنتجات...")
+        for index in itertools.count():
+            await slots.acquire()
+            # next يعمل في thread (copy_context) لأن المولّد قد ينتظر صفحات Odoo
+            try:
+                rows = await asyncio.to_thread(next, batches, _END)
+            except Exception:
+                # فشل الجلب: الدفعات المرسلة تُكمل كتابتها فتتقدم نقاط الاستئناف حتى آخرها
+                slots.release()
+                await complete(wait=True)
+                raise
+            slots.release()
+            if rows is _END:
+                break
+            rows, written = prepare(rows)
+            tasks = []
+            part_size = _write_batch_size(table).size
+            for i in range(0, len(rows), part_size):
+                await slots.acquire()
+                tasks.append(asyncio.create_task(write_part(rows[i:i+part_size])))
+            pending.append((index, tasks, written))
+            await complete(wait=False)
+        await complete(wait=True)
+    finally:
+        tasks = [task for _, part_tasks, _ in pending for task in part_tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await client.postgrest.aclose()
+
+
+def load_batches(supabase, table, batches, key, write_mode='upsert', label='سجل', snapshot=None,
+                 resumed=False, before_swap=None, on_written=None, partial=False):
+    """كتابة لقطة كاملة ترد على دفعات متتالية إلى Supabase حسب وضع الكتابة
+    
+    upsert: كل دفعة تُكتب فور وصولها، وبعد آخر دفعة تُحذف المفاتيح التي
+    لم تظهر في اللقطة. swap: الدفعات تُحمّل في <table>_staging ثم يُستبدل
+    الجدول الأصلي (يعتمد على prepare_sync_staging و swap_sync_table
+    المعرفتين في create_supabase_tables.sql).
+    
+    مع snapshot (SnapshotStore) وفي وضع upsert تُرسل فقط الصفوف التي تغير
+    hash محتواها منذ آخر تشغيل، وتُستخدم مفاتيح اللقطة بدلاً من قراءة
+    مفاتيح الجدول من Supabase. تُحدّث اللقطة بعد نجاح كل دفعة.
+    إذا كانت اللقطة فارغة لا يُعدّل الجدول. تُعيد عدد صفوف اللقطة.
+    
+    resumed=True (استئناف من نقطة حفظ): في وضع swap يُكمل التحميل في staging
+    دون تفريغه، وفي وضع upsert يُؤجل حذف المفاتيح المفقودة إلى أول تشغيل
+    كامل لأن المفاتيح التي ظهرت قبل الانقطاع غير معروفة.
+    before_swap: يُستدعى قبل swap_sync_table مباشرة (لحذف نقطة الاستئناف): إن
+    نُفذ الاستبدال وضاعت استجابته لا يُستأنف تشغيل لاحق على staging أُفرغ.
+    لا يُستبدل الجدول إذا لم يُكتب أي صف (أو وُجد staging فارغاً عند الاستئناف).
+    partial=True (نافذة --since/--until): الدفعات جزء من الجدول فقط، فتُكتب
+    بـ upsert دون حذف أي مفتاح (غير مسموح مع swap).
+    on_written: انظر write_stream.
+    """
+    if partial and write_mode == 'swap':
+        raise ValueError(f"{table}: الكتابة الجزئية لا تدعم وضع swap")
+    key_cols = _key_columns(key)
+    staging = f"{table}_staging"
+    previous = snapshot.load(table) if snapshot is not None else {}
+    written_hashes = {}
+    existing_keys = set()
+    if write_mode == 'swap':
+        if not resumed:
+            supabase_execute(supabase.rpc('prepare_sync_staging', {'target': table}), 'insert', [])
+    elif resumed:
+        logger.info(f"⏯️ {table}: استئناف - حذف الصفوف المفقودة مؤجل إلى التشغيل الكامل التالي")
+    elif not partial:
+        existing_keys = set(previous) if previous else fetch_existing_keys(supabase, table, key)
+    seen_keys = set()
+    
+    counts = {'total': 0, 'changed': 0}
+    
+    def prepare(rows):
+        counts['total'] += len(rows)
+        total = counts['total']
+        if isinstance(rows, Columns):
+            keys = rows.keys(key_cols)
+        else:
+            keys = [_row_key(row, key_cols) for row in rows]
+        hashes = dict(zip(keys, map(row_hash, rows))) if snapshot is not None else {}
+        if write_mode != 'swap':
+            seen_keys.update(keys)
+            if snapshot is not None:
+                changed = [previous.get(row_key) != hashes[row_key] for row_key in keys]
+                if isinstance(rows, Columns):
+                    rows = rows.select(changed)
+                else:
+                    rows = list(itertools.compress(rows, changed))
+                hashes = {row_key: hashes[row_key] for row_key in itertools.compress(keys, changed)}
+        counts['changed'] += len(rows)
         
-        # جلب المنتجات من Odoo
-        product_ids = models.execute_kw(
-            ODOO_DB, uid, ODOO_PASSWORD,
-            'product.product', 'search',
-            [[['sale_ok', '=', True]]], 
-            {'limit': 5000}
+        def written():
+            if hashes:
+                if write_mode == 'swap':
+                    written_hashes.update(hashes)
+                else:
+                    snapshot.apply(table, hashes)
+            if rows:
+                logger.info(f"✅ تمت كتابة {len(rows)} {label} (الإجمالي: {total})")
+        return rows, written
+    
+    if write_mode == 'swap':
+        write_stream(supabase, staging, batches, prepare, None, label, on_written)
+    else:
+        write_stream(supabase, table, batches, prepare, key, label, on_written)
+    total, changed = counts['total'], counts['changed']
+    
+    if total == 0 and not resumed and write_mode != 'swap':
+        logger.warning(f"⚠️ لا توجد بيانات - لم يتم تعديل {table}")
+        return 0
+    
+    deleted = 0
+    if write_mode == 'swap':
+        if (total == 0 and not resumed) or (resumed and _staging_is_empty(supabase, staging, key_cols)):
+            # staging فارغ يعني أن الاستبدال سيُفرغ الجدول الأصلي
+            logger.error(f"❌ {table}: لم يُكتب أي صف في {staging} - لن يُستبدل الجدول")
+            return 0
+        if before_swap is not None:
+            before_swap()
+        logger.info(f"🔁 استبدال {table} ببيانات {staging}...")
+        # الاستبدال لا يُعاد بعد انقطاع الاستجابة: لو نُفذ فعلاً لأفرغ الإعادةُ الجدول
+        supabase_execute(supabase.rpc('swap_sync_table', {'target': table}), 'insert', [], idempotent=False)
+        if snapshot is not None:
+            if not resumed:
+                snapshot.reset(table)
+            snapshot.apply(table, written_hashes)
+    else:
+        vanished = existing_keys - seen_keys
+        if vanished:
+            logger.info(f"🗑️ حذف {len(vanished)} {label} لم يعد موجوداً في Odoo...")
+            delete_keys(supabase, table, key, vanished)
+            if snapshot is not None:
+                snapshot.apply(table, deletes=vanished)
+        deleted = len(vanished)
+    
+    if snapshot is not None and write_mode != 'swap':
+        logger.info(
+            f"📊 {table}: {changed} جديد/معدل، {total - changed} بدون تغيير، {deleted} محذوف"
         )
-        
-        logger.info(f"📊 تم العثور على {len(product_ids)} منتج")
-        
-        if not product_ids:
-            logger.warning("⚠️ لا توجد منتجات")
-            return
-        
-        # جلب تفاصيل المنتجات
-        products = models.execute_kw(
-            ODOO_DB, uid, ODOO_PASSWORD,
-            'product.product', 'read',
-            [product_ids],
-            {'fields': ['name', 'default_code', 'list_price', 'standard_price', 'categ_id', 'qty_available']}
+    return total
+
+
+def _staging_is_empty(supabase, staging, key_cols):
+    query = supabase.table(staging).select(key_cols[0], count='exact').limit(1)
+    return not supabase_execute(query, 'read').count
+
+
+def write_rows(supabase, table, rows, key, write_mode='upsert', label='سجل', snapshot=None, partial=False):
+    """كتابة لقطة كاملة (أو جزئية مع partial) من الصفوف إلى Supabase حسب وضع الكتابة"""
+    return load_batches(supabase, table, [rows], key, write_mode, label, snapshot, partial=partial)
+
+
+def export_batches(export, table, batches, partial=False, resumed=False, deletes=()):
+    """تمرير الدفعات عبر التصدير إلى الملفات (--export-dir) أثناء كتابتها في Supabase
+
+    الملفات تُكتب بعد آخر دفعة: لقطة كاملة تستبدل التصدير، و partial تدمج
+    الصفوف المعدلة (وتحذف deletes). التشغيل المستأنف لا يُصدّر لأن صفحاته
+    السابقة كُتبت في تشغيل آخر.
+    """
+    if export is None or not export.exports(table):
+        return batches
+    if resumed:
+        logger.warning(f"⚠️ {table}: تشغيل مستأنف - لا يُحدّث التصدير (شغّل --export-only لإعادة بنائه)")
+        return batches
+    return export.tee(table, batches, 'merge' if partial else 'replace', deletes)
+
+
+# ==================== مزامنة طلبات المبيعات ====================
+
+SALES_FIELDS = ['name', 'partner_id', 'date_order', 'amount_total', 'state', 'write_date']
+
+
+def _orders_watermark(orders, previous=None):
+    """حساب علامة المياه العليا (أكبر write_date ثم id) من الطلبات المجلوبة"""
+    watermark = previous
+    for order in orders:
+        candidate = {'write_date': order.get('write_date') or '', 'id': order['id']}
+        if watermark is None or (candidate['write_date'], candidate['id']) > (watermark['write_date'], watermark['id']):
+            watermark = candidate
+    return watermark
+
+
+def _cap_watermark(watermark, started_at):
+    """سقف العلامة: وقت بدء التشغيل ناقص الهامش (started_at بصيغة Odoo بتوقيت UTC)
+    
+    الطلبات تُجلب بترتيب id، فطلب تجاوزه الجلب ثم عُدّل أثناء التشغيل لا
+    يُجلب، بينما قد يرفع طلب لاحق العلامة فوق تعديله فيضيع. بالسقف يُعاد
+    جلب ما عُدّل منذ بدء التشغيل في التشغيل التالي (upsert بدون أثر).
+    """
+    started = datetime.strptime(started_at, ODOO_DATETIME_FORMAT)
+    cap = (started - timedelta(seconds=SYNC_WATERMARK_MARGIN_SECONDS)).strftime(ODOO_DATETIME_FORMAT)
+    if watermark and watermark['write_date'] > cap:
+        return {'write_date': cap, 'id': 0}
+    return watermark
+
+
+def _order_columns(orders):
+    """تحويل صفحة pos.order (Columns) إلى أعمدة aumet_sales_orders بدون المرتجعات"""
+    amounts = floats(orders['amount_total'])
+    return Columns({
+        'aumet_id': orders['id'],
+        'name': orders['name'],
+        'partner_id': many2one(orders['partner_id'], 0),
+        'date_order': orders['date_order'],
+        'amount_total': amounts,
+        'state': orders['state']
+    }).select([amount >= 0 for amount in amounts])
+
+
+def _sales_orders_domain(watermark=None, window=None):
+    """domain طلبات pos.order: نافذة أيام (since, until)، أو ما بعد العلامة، أو الكل"""
+    if window:
+        return sales_aggregates.window_domain('date_order', *window)
+    if watermark:
+        return [
+            '|',
+            ['write_date', '>', watermark['write_date']],
+            '&',
+            ['write_date', '=', watermark['write_date']],
+            ['id', '>', watermark['id']],
+        ]
+    return []
+
+
+def sync_sales_orders(odoo, supabase, full=False, write_mode='upsert', snapshot=None, resume=True, window=None,
+                      export=None):
+    """مزامنة طلبات المبيعات من Odoo إلى Supabase (من pos.order)
+    
+    في الوضع التزايدي يتم جلب الطلبات التي أُنشئت أو عُدّلت بعد آخر
+    write_date/id محفوظ فقط، ثم تحديثها في Supabase (upsert).
+    عند full=True أو عدم وجود حالة سابقة تُكتب لقطة كاملة حسب write_mode.
+    الطلبات تُحوّل وتُكتب صفحة بصفحة أثناء جلب الصفحات التالية، وبعد كل
+    صفحة مكتوبة تُحفظ نقطة استئناف يكمل منها التشغيل التالي إذا انقطع هذا.
+    في الوضع التزايدي تُضاف أيام الطلبات المعدلة (ومنها المرتجعات) إلى
+    الأيام المعلقة في ملف الحالة (انظر mark_sales_days) ليُعاد حساب
+    تجميعاتها فقط، ومعها أيامها السابقة في Supabase إذا تغير تاريخ الطلب.
+    
+    window=(since, until): تحديث طلبات هذه الأيام المحلية فقط بنفس مسار
+    الوضع التزايدي، دون تعديل العلامة المحفوظة.
+    export: FileExport لتصدير الطلبات إلى الملفات بجانب Supabase.
+    """
+    started_at = datetime.now(timezone.utc).strftime(ODOO_DATETIME_FORMAT)
+    watermark = None if full or window else load_state().get('sales_orders')
+    incremental = bool(watermark or window)
+    domain = _sales_orders_domain(watermark, window)
+    
+    if window:
+        logger.info(f"📦 بدء مزامنة طلبات المبيعات (pos.order) من {window[0]} إلى {window[1]}...")
+    elif watermark:
+        logger.info(
+            f"📦 بدء مزامنة تزايدية لطلبات المبيعات (pos.order) "
+            f"منذ {watermark['write_date']} (id > {watermark['id']})..."
         )
-        
-        # تحويل البيانات
-        products_data = []
-        for product in products:
-            products_data.append({
-                'aumet_id': product['id'],
-                'name': product['name'],
-                'default_code': product.get('default_code'),
-                'list_price': float(product.get('list_price', 0))
-            })
-        
-        # حذف البيانات القديمة وإدراج الجديدة
-        logger.info("🗑️ حذف البيانات القديمة...")
-        supabase.table('aumet_products').delete().neq('aumet_id', 0).execute()
-        
-        # إدراج البيانات الجديدة
-        batch_size = 1000
-        for i in range(0, len(products_data), batch_size):
-            batch = products_data[i:i+batch_size]
-            supabase.table('aumet_products').insert(batch).execute()
-            logger.info(f"✅ تم إدراج {len(batch)} منتج ({i+len(batch)}/{len(products_data)})")
-        
-        logger.info(f"✅ تمت مزامنة {len(products_data)} منتج بنجاح")
-        
-    except Exception as e:
-        logger.error(f"❌ خطأ في مزامنة المنتجات: {e}")
+    else:
+        logger.info("📦 بدء مزامنة كاملة لطلبات المبيعات (pos.order)...")
+    
+    checkpoint = Checkpoint(
+        'sales_orders',
+        ['pos.order', domain, SALES_FIELDS, 'incremental' if incremental else write_mode],
+        resume
+    )
+    # started_at يُحفظ مع التقدم: عند الاستئناف يبقى السقف وقت بدء التشغيل الذي جلب الصفحات الأولى
+    progress = checkpoint.context.get('progress') or {
+        'watermark': watermark, 'fetched': 0, 'skipped': 0, 'started_at': started_at, 'days': []
+    }
+    
+    # نقطة الاستئناف لكل صفحة تُحفظ عند اكتمال كتابتها، مع التقدم كما كان بعدها
+    page_marks = {}
+    # المرتجعات المحذوفة من Supabase تُحذف كذلك من ملفات التصدير
+    export_deletes = []
+    
+    def advance(index):
+        last_id, page_progress = page_marks.pop(index)
+        checkpoint.advance(last_id, progress=page_progress)
+    
+    def batches():
+        pages = stream_pages(odoo, 'pos.order', domain, SALES_FIELDS, 'طلب', checkpoint.last_id)
+        for index, page in enumerate(pages):
+            progress['watermark'] = _orders_watermark(page, progress['watermark'])
+            progress['fetched'] += len(page)
+            if incremental:
+                # اليوم الجديد لكل طلب واليوم المحفوظ قبل الكتابة (قبل حذف المرتجعات أيضاً)
+                days = set(progress['days']).union(_previous_order_days(supabase, [order['id'] for order in page]))
+                days.update(sales_aggregates.local_day(order['date_order']) for order in page if order.get('date_order'))
+                progress['days'] = sorted(days)
+            
+            # تجاهل الطلبات بمبالغ سالبة (المرتجعات) مؤقتاً
+            returns = [order['id'] for order in page if order.get('amount_total', 0) < 0]
+            progress['skipped'] += len(returns)
+            if incremental and returns:
+                # الطلبات التي أصبحت مرتجعات تُحذف حتى لا تبقى بقيمتها القديمة
+                return_keys = [(order_id,) for order_id in returns]
+                delete_keys(supabase, 'aumet_sales_orders', 'aumet_id', return_keys)
+                if snapshot is not None:
+                    snapshot.apply('aumet_sales_orders', deletes=return_keys)
+                export_deletes.extend(returns)
+            
+            with run_metrics.timed('transform') as counters:
+                rows = _order_columns(Columns.from_records(page, ['id'] + SALES_FIELDS))
+                counters.update(rows_in=len(page), rows_out=len(rows))
+            # نسخة سطحية تكفي: قيم progress تُستبدل ولا تُعدّل في مكانها
+            page_marks[index] = (page[-1]['id'], dict(progress))
+            yield rows
+    
+    pages = export_batches(
+        export, 'aumet_sales_orders', batches(), incremental, checkpoint.resumed, export_deletes
+    )
+    if incremental:
+        # الوضع التزايدي: تحديث/إضافة الطلبات المعدلة فقط
+        synced = 0
+        for index, rows in enumerate(pages):
+            upsert_rows(supabase, 'aumet_sales_orders', rows, 'aumet_id')
+            if snapshot is not None:
+                # إبقاء اللقطة مطابقة لما كُتب حتى لا تتخطى مزامنة كاملة لاحقة تغييراً
+                snapshot.apply('aumet_sales_orders', {(row['aumet_id'],): row_hash(row) for row in rows})
+            advance(index)
+            synced += len(rows)
+            logger.info(f"✅ تم تحديث {len(rows)} طلب (الإجمالي: {synced})")
+    else:
+        synced = load_batches(
+            supabase, 'aumet_sales_orders', pages, 'aumet_id', write_mode, 'طلب', snapshot,
+            resumed=checkpoint.resumed, before_swap=checkpoint.clear, on_written=advance
+        )
+    
+    if progress['fetched'] == 0:
+        checkpoint.clear()
+        if window:
+            logger.info("✅ لا توجد طلبات في الفترة المحددة")
+        elif watermark:
+            logger.info("✅ لا توجد طلبات جديدة أو معدلة منذ آخر مزامنة")
+        else:
+            logger.warning("⚠️ لا توجد طلبات مبيعات")
+        return
+    
+    if progress['skipped']:
+        logger.warning(f"⚠️ تم تجاهل {progress['skipped']} طلب بمبالغ سالبة (مرتجعات)")
+    
+    if progress['days']:
+        # تُسجل قبل العلامة حتى لا تضيع الأيام إذا انقطع التشغيل بينهما
+        mark_sales_days(progress['days'])
+    
+    # حفظ علامة المياه العليا بعد نجاح الكتابة فقط (النافذة لا ترى كل التغييرات)
+    if not window:
+        update_state('sales_orders', _cap_watermark(progress['watermark'], progress['started_at']))
+    checkpoint.clear()
+    
+    logger.info(f"✅ تمت مزامنة {synced} طلب مبيعات بنجاح")
 
 
-# ==================== مزامنة المخزون ====================
+def _previous_order_days(supabase, order_ids):
+    """الأيام المحلية المحفوظة حالياً في Supabase لطلبات محددة (قبل تحديثها)"""
+    days = set()
+    for i in range(0, len(order_ids), KEYS_LOOKUP_SIZE):
+        query = (
+            supabase.table('aumet_sales_orders').select('aumet_id,date_order')
+            .in_('aumet_id', order_ids[i:i+KEYS_LOOKUP_SIZE])
+        )
+        rows = supabase_execute(query, 'read').data
+        days.update(sales_aggregates.local_day(row['date_order']) for row in rows if row.get('date_order'))
+    return days
 
-def sync_inventory(models, uid, supabase):
-    """مزامنة المخزون من Odoo إلى Supabase"""
-    try:
-        logger.info("📦 بدء مزامنة المخزون...")
-        
-        # جلب بيانات المخزون من Odoo
-        quant_ids = models.execute_kw(
-            ODOO_DB, uid, ODOO_PASSWORD,
-            'stock.quant', 'search',
-            [[['quantity', '>', 0]]], 
-            {'limit': 10000}
+
+# ==================== تجميعات المبيعات اليومية والشهرية ====================
+
+SALES_DAILY_TABLE = 'aumet_sales_daily'
+SALES_MONTHLY_TABLE = 'aumet_sales_monthly'
+SALES_DAILY_STATES_TABLE = 'aumet_sales_daily_states'
+SALES_DAILY_STATES_KEY = ('sale_date', 'state')
+
+# قوائم الأيام المعلقة في ملف الحالة: لكل مرحلة تجميع قائمة تحذف منها ما عالجته فقط
+SALES_PENDING_KEYS = ('sales_aggregates_pending', 'sales_rollups_pending')
+
+
+def mark_sales_days(days):
+    """تسجيل أيام طلبات تغيرت ليُعاد حساب تجميعاتها في المزامنة التالية"""
+    for key in SALES_PENDING_KEYS:
+        update_state(key, lambda pending: sorted(set(pending or []).union(days)))
+
+
+def discard_sales_days(key, days):
+    """حذف الأيام التي أُعيد حسابها من قائمة معلقة (أيام أُضيفت أثناء التشغيل تبقى)"""
+    update_state(key, lambda pending: sorted(set(pending or []) - set(days)) or None)
+
+
+def _fetch_daily_rows(supabase, months):
+    """الصفوف اليومية المحفوظة في Supabase للأشهر المعطاة"""
+    rows = []
+    for month in months:
+        query = (
+            supabase.table(SALES_DAILY_TABLE).select('*')
+            .gte('sale_date', month).lt('sale_date', sales_aggregates.next_month(month))
+        )
+        rows.extend(supabase_execute(query, 'read').data)
+    return rows
+
+
+def _upsert_buckets(supabase, table, key, rows, vanished, snapshot=None):
+    """كتابة صفوف تجميع محددة وحذف الفترات التي لم يعد فيها طلبات"""
+    if rows:
+        upsert_rows(supabase, table, rows, key)
+    if vanished:
+        delete_keys(supabase, table, key, [(bucket,) for bucket in vanished])
+    if snapshot is not None:
+        snapshot.apply(
+            table, {(row[key],): row_hash(row) for row in rows},
+            deletes=[(bucket,) for bucket in vanished]
+        )
+
+
+def _replace_sales_days(supabase, table, key, rows, days, snapshot=None):
+    """كتابة صفوف تجميع أيام محددة وحذف صفوف هذه الأيام التي لم تعد موجودة"""
+    key_cols = _key_columns(key)
+    vanished = fetch_existing_keys(supabase, table, key, where=('sale_date', days))
+    vanished -= {_row_key(row, key_cols) for row in rows}
+    if rows:
+        upsert_rows(supabase, table, rows, key)
+    if vanished:
+        delete_keys(supabase, table, key, vanished)
+    if snapshot is not None:
+        snapshot.apply(table, {_row_key(row, key_cols): row_hash(row) for row in rows}, deletes=vanished)
+
+
+def _read_group_day_totals(odoo):
+    """المجاميع اليومية للمبيعات والمرتجعات عبر read_group (مجموعة لكل يوم محلي وحالة)"""
+    totals = {}
+    context = {'tz': sales_aggregates.SALES_TIMEZONE}
+    for returns in (False, True):
+        domain = [['amount_total', '<' if returns else '>=', 0]]
+        label = 'يوم مرتجعات' if returns else 'يوم مبيعات'
+        for groups in read_group_pages(odoo, 'pos.order', domain, ['amount_total'], ['date_order:day', 'state'], label, context):
+            with run_metrics.timed('transform') as counters:
+                sales_aggregates.add_day_groups(totals, groups, returns)
+                counters.update(rows_in=len(groups), rows_out=len(totals))
+    return totals
+
+
+def _sales_days(pending, window=None):
+    """الأيام التي يُعاد حساب تجميعاتها: المعلقة في ملف الحالة وأيام النافذة"""
+    days = set(pending)
+    if window:
+        days.update(sales_aggregates.window_days(*window))
+    return sorted(days)
+
+
+def sync_sales_aggregates(odoo, supabase, full=False, write_mode='upsert', snapshot=None, summary=False,
+                          window=None):
+    """تحديث جداول المبيعات اليومية والشهرية (aumet_sales_daily و aumet_sales_monthly)
+    ومجاميع كل يوم وحالة طلب (aumet_sales_daily_states)
+    
+    التحديث التزايدي يعيد حساب الأيام المسجلة في sales_aggregates_pending
+    فقط (بجلب طلبات هذه الأيام من Odoo)، ثم الأشهر التي تحتويها من صفوفها
+    اليومية في Supabase؛ فيبقى زمنه ثابتاً مهما كبر التاريخ. أول تشغيل أو
+    full=True يعيد بناء الجدولين من كل الطلبات حسب write_mode.
+    summary=True يعيد بناء الجدولين من read_group (مجاميع يومية محسوبة في
+    Odoo) بدلاً من جلب كل الطلبات: طلبان أو ثلاثة بدل آلاف السجلات.
+    window=(since, until): أيام النافذة يُعاد حسابها مع الأيام المعلقة.
+    """
+    state = load_state()
+    # الأيام المعلقة عند البدء: تُحذف وحدها في النهاية (ما يُسجل أثناء التشغيل يبقى)
+    pending = sorted(state.get('sales_aggregates_pending') or [])
+    days = _sales_days(pending, window)
+    
+    if summary or full or 'sales_aggregates' not in state:
+        if summary:
+            logger.info("📅 إعادة بناء تجميعات المبيعات اليومية والشهرية عبر read_group...")
+            totals = _read_group_day_totals(odoo)
+        else:
+            logger.info("📅 إعادة بناء تجميعات المبيعات اليومية والشهرية من كل الطلبات...")
+            totals = {}
+            for page in stream_pages(odoo, 'pos.order', [], sales_aggregates.ORDER_FIELDS, 'طلب'):
+                with run_metrics.timed('transform') as counters:
+                    sales_aggregates.add_orders(totals, page)
+                    counters.update(rows_in=len(page), rows_out=len(totals))
+        daily = sales_aggregates.daily_rows(totals)
+        monthly = sales_aggregates.monthly_rows(daily)
+        write_rows(supabase, SALES_DAILY_TABLE, daily, 'sale_date', write_mode, 'يوم', snapshot)
+        write_rows(
+            supabase, SALES_DAILY_STATES_TABLE, sales_aggregates.state_rows(totals), SALES_DAILY_STATES_KEY,
+            write_mode, 'يوم/حالة', snapshot
+        )
+        write_rows(supabase, SALES_MONTHLY_TABLE, monthly, 'month', write_mode, 'شهر', snapshot)
+    elif not days:
+        logger.info("✅ لا توجد أيام مبيعات معدلة منذ آخر تحديث للتجميعات")
+        return
+    else:
+        logger.info(f"📅 إعادة حساب تجميعات {len(days)} يوم مبيعات...")
+        totals = {}
+        domain = sales_aggregates.days_domain(days)
+        for page in stream_pages(odoo, 'pos.order', domain, sales_aggregates.ORDER_FIELDS, 'طلب'):
+            with run_metrics.timed('transform') as counters:
+                sales_aggregates.add_orders(totals, page)
+                counters.update(rows_in=len(page), rows_out=len(totals))
+        daily = sales_aggregates.daily_rows(totals)
+        _upsert_buckets(
+            supabase, SALES_DAILY_TABLE, 'sale_date', daily,
+            set(days) - sales_aggregates.totals_days(totals), snapshot
+        )
+        _replace_sales_days(
+            supabase, SALES_DAILY_STATES_TABLE, SALES_DAILY_STATES_KEY,
+            sales_aggregates.state_rows(totals), days, snapshot
         )
         
-        logger.info(f"📊 تم العثور على {len(quant_ids)} سجل مخزون")
-        
-        if not quant_ids:
-            logger.warning("⚠️ لا توجد بيانات مخزون")
+        months = sorted({sales_aggregates.month_of(day) for day in days})
+        monthly = sales_aggregates.monthly_rows(_fetch_daily_rows(supabase, months))
+        _upsert_buckets(
+            supabase, SALES_MONTHLY_TABLE, 'month', monthly,
+            set(months) - {row['month'] for row in monthly}, snapshot
+        )
+    
+    update_state('sales_aggregates', {'updated_at': datetime.now().isoformat(timespec='seconds')})
+    if pending:
+        discard_sales_days('sales_aggregates_pending', pending)
+    logger.info(f"✅ تم تحديث {len(daily)} يوم و {len(monthly)} شهر من تجميعات المبيعات")
+
+
+# ==================== تجميعات المنتجات والعملاء اليومية ====================
+
+SALES_DAILY_PRODUCTS_KEY = ('sale_date', 'product_id')
+SALES_DAILY_PARTNERS_KEY = ('sale_date', 'partner_id')
+
+
+def sync_sales_rollups(odoo, supabase, full=False, write_mode='upsert', snapshot=None, window=None):
+    """حساب تجميعات المبيعات اليومية من بنود pos.order.line وكتابتها إلى جداول الملخص
+    
+    aumet_sales_daily_products: لكل يوم ومنتج الكمية والإيراد وعدد الطلبات.
+    aumet_sales_daily_partners: لكل يوم وعميل نفس المقاييس.
+    الحساب يتم بـ pandas (sales_rollups). التحديث التزايدي يعيد حساب الأيام
+    المسجلة في sales_rollups_pending فقط (طلباتها وبنودها) ويحذف صفوفها التي
+    لم تعد موجودة؛ أول تشغيل أو full=True يعيد بناء الجدولين من كل البنود
+    حسب write_mode.
+    window=(since, until): أيام النافذة يُعاد حسابها مع الأيام المعلقة.
+    """
+    # pandas مطلوب لهذه المرحلة فقط
+    import pandas as pd
+    import sales_rollups
+    
+    state = load_state()
+    # الأيام المعلقة عند البدء: تُحذف وحدها في النهاية (ما يُسجل أثناء التشغيل يبقى)
+    pending = sorted(state.get('sales_rollups_pending') or [])
+    days = _sales_days(pending, window)
+    rebuild = full or 'sales_rollups' not in state
+    if rebuild:
+        logger.info("📈 بدء حساب تجميعات المبيعات اليومية من كل البنود (pos.order.line)...")
+        order_domain = line_domain = []
+    else:
+        if not days:
+            logger.info("✅ لا توجد أيام مبيعات معدلة منذ آخر تحديث لتجميعات المنتجات والعملاء")
             return
-        
-        # جلب تفاصيل المخزون
-        quants = models.execute_kw(
-            ODOO_DB, uid, ODOO_PASSWORD,
-            'stock.quant', 'read',
-            [quant_ids],
-            {'fields': ['product_id', 'location_id', 'quantity', 'reserved_quantity']}
+        logger.info(f"📈 إعادة حساب تجميعات المنتجات والعملاء لـ {len(days)} يوم مبيعات...")
+        order_domain = sales_aggregates.days_domain(days)
+        line_domain = sales_aggregates.days_domain(days, 'order_id.date_order')
+    
+    # رؤوس الطلبات: اليوم المحلي والعميل لكل طلب
+    header_frames = []
+    for page in stream_pages(odoo, 'pos.order', order_domain, sales_rollups.ORDER_FIELDS, 'طلب'):
+        with run_metrics.timed('transform') as counters:
+            header_frames.append(sales_rollups.order_headers_frame(page))
+            counters.update(rows_in=len(page), rows_out=len(header_frames[-1]))
+    if not header_frames and rebuild:
+        logger.warning("⚠️ لا توجد طلبات مبيعات")
+        return
+    
+    # البنود تُختصر صفحة بصفحة إلى (طلب، منتج)
+    reduced = []
+    lines = 0
+    if header_frames:
+        headers = pd.concat(header_frames)
+        for page in stream_pages(odoo, 'pos.order.line', line_domain, sales_rollups.LINE_FIELDS, 'بند'):
+            lines += len(page)
+            with run_metrics.timed('transform') as counters:
+                reduced.append(sales_rollups.reduce_lines(page))
+                counters.update(rows_in=len(page), rows_out=len(reduced[-1]))
+    
+    with run_metrics.timed('transform') as counters:
+        by_product, by_partner = sales_rollups.daily_rollups(headers, reduced) if reduced else ([], [])
+        counters.update(rows_in=sum(map(len, reduced)), rows_out=len(by_product) + len(by_partner))
+    
+    if not by_product and rebuild:
+        logger.warning("⚠️ لا توجد بنود مبيعات")
+        return
+    
+    logger.info(
+        f"📊 {lines} بند → {len(by_product)} صف يومي للمنتجات و {len(by_partner)} صف يومي للعملاء"
+    )
+    if rebuild:
+        write_rows(
+            supabase, 'aumet_sales_daily_products', by_product, SALES_DAILY_PRODUCTS_KEY,
+            write_mode, 'تجميع', snapshot
         )
-        
-        # تحويل البيانات
-        inventory_data = []
-        for quant in quants:
-            inventory_data.append({
-                'product_id': quant['product_id'][0] if quant.get('product_id') else None,
-                'product_name': quant['product_id'][1] if quant.get('product_id') else 'غير معروف',
-                'location': quant['location_id'][1] if quant.get('location_id') else 'غير محدد',
-                'quantity': float(quant.get('quantity', 0)),
-                'reserved_quantity': float(quant.get('reserved_quantity', 0)),
-                'available_quantity': float(quant.get('quantity', 0)) - float(quant.get('reserved_quantity', 0)),
-                'synced_at': datetime.now().isoformat()
-            })
-        
-        # حذف البيانات القديمة وإدراج الجديدة
-        logger.info("🗑️ حذف البيانات القديمة...")
-        supabase.table('aumet_inventory').delete().neq('product_id', 0).execute()
-        
-        # إدراج البيانات الجديدة
-        batch_size = 1000
-        for i in range(0, len(inventory_data), batch_size):
-            batch = inventory_data[i:i+batch_size]
-            supabase.table('aumet_inventory').insert(batch).execute()
-            logger.info(f"✅ تم إدراج {len(batch)} سجل ({i+len(batch)}/{len(inventory_data)})")
-        
-        logger.info(f"✅ تمت مزامنة {len(inventory_data)} سجل مخزون بنجاح")
-        
-    except Exception as e:
-        logger.error(f"❌ خطأ في مزامنة المخزون: {e}")
+        write_rows(
+            supabase, 'aumet_sales_daily_partners', by_partner, SALES_DAILY_PARTNERS_KEY,
+            write_mode, 'تجميع', snapshot
+        )
+    else:
+        _replace_sales_days(
+            supabase, 'aumet_sales_daily_products', SALES_DAILY_PRODUCTS_KEY, by_product, days, snapshot
+        )
+        _replace_sales_days(
+            supabase, 'aumet_sales_daily_partners', SALES_DAILY_PARTNERS_KEY, by_partner, days, snapshot
+        )
+    
+    update_state('sales_rollups', {'updated_at': datetime.now().isoformat(timespec='seconds')})
+    if pending:
+        discard_sales_days('sales_rollups_pending', pending)
+    logger.info("✅ تمت مزامنة تجميعات المبيعات اليومية بنجاح")
+
+
+# ==================== محرك مزامنة النماذج ====================
+
+@dataclass
+class ModelSync:
+    """وصف تصريحي لمزامنة نموذج Odoo إلى جدول Supabase
+    
+    transform: تحويل صفحة سجلات Odoo (Columns بأعمدة id و fields) إلى
+    أعمدة الجدول؛ السجلات التي لا تُكتب تُستبعد بـ Columns.select.
+    merge: إن وُجدت تُجمّع الصفوف ذات المفتاح نفسه عبر جميع الصفحات
+    (merge(الصف_المجمع, الصف_الجديد)) ثم تُكتب اللقطة مرة واحدة.
+    stamp_synced_at: إضافة عمود synced_at موحد لجميع صفوف التشغيل.
+    history_table: جدول سجل تغيرات يُضاف إليه صف لكل مفتاح تغيرت فيه قيم
+    history_columns مقارنة بالجدول الحالي (انظر record_history).
+    group_by: حقول التجميع لوضع --summary: تُجلب نتائج read_group بدل السجلات
+    وتمر بنفس transform/merge (المجموعة تحمل حقول التجميع ومجاميع fields).
+    date_field: حقل التاريخ لنافذة --since/--until (None = النافذة لا تنطبق
+    ويُزامن النموذج كاملاً، كالنماذج المجمعة بـ merge).
+    """
+    name: str
+    model: str
+    fields: list
+    table: str
+    transform: object
+    key: object = 'aumet_id'
+    domain: list = field(default_factory=list)
+    label: str = 'سجل'
+    merge: object = None
+    stamp_synced_at: bool = False
+    history_table: str = None
+    history_columns: tuple = ()
+    group_by: tuple = ()
+    date_field: str = None
+    depends_on: tuple = ()
+
+
+def _history_row(key_cols, row_key, previous, current, columns, changed_at):
+    """صف سجل التغيرات: القيم الجديدة وفرق كل منها عن السابقة (None = صف غير موجود)"""
+    history = dict(zip(key_cols, row_key))
+    for col in columns:
+        # بدقة أعمدة DECIMAL(10, 2) حتى لا يظهر فرق التقريب كتغير في كل تشغيل
+        old = round(float((previous or {}).get(col) or 0), 2)
+        new = round(float((current or {}).get(col) or 0), 2)
+        history[col] = new
+        history[f'{col}_delta'] = round(new - old, 2)
+    history['changed_at'] = changed_at
+    return history
+
+
+def record_history(supabase, spec, batches, changed_at, resumed=False):
+    """إضافة تغيرات history_columns إلى spec.history_table أثناء مرور الدفعات
+    
+    القيم السابقة تُقرأ من الجدول الحالي (spec.table) قبل كتابته؛ المفاتيح
+    الجديدة تُسجل بفرق كامل، والمفاتيح التي اختفت تُسجل بقيم صفرية. كل دفعة
+    تُسجل تغيراتها قبل كتابتها في الجدول الحالي، فإن فشلت كتابته سُجل التغير
+    مرة أخرى في التشغيل التالي بنفس القيم المطلقة (لا يفسد إعادة بناء المخزون).
+    """
+    key_cols = _key_columns(spec.key)
+    history_key = key_cols + ('changed_at',)
+    previous = fetch_existing_values(supabase, spec.table, spec.key, spec.history_columns)
+    logger.info(f"📜 {spec.history_table}: مقارنة مع {len(previous)} صف في {spec.table}")
+    seen = set()
+    appended = 0
+    
+    def append(changes):
+        nonlocal appended
+        if changes:
+            upsert_rows(supabase, spec.history_table, changes, history_key)
+            appended += len(changes)
+    
+    for rows in batches:
+        changes = []
+        for row in rows:
+            row_key = _row_key(row, key_cols)
+            seen.add(row_key)
+            old = previous.get(row_key)
+            history = _history_row(key_cols, row_key, old, row, spec.history_columns, changed_at)
+            if old is None or any(history[f'{col}_delta'] for col in spec.history_columns):
+                changes.append(history)
+        append(changes)
+        yield rows
+    
+    # لقطة فارغة لا تُعدّل الجدول الحالي (load_batches)، فلا تُسجل كحذف لكل المخزون
+    if seen and not resumed:
+        append([
+            _history_row(key_cols, row_key, old, None, spec.history_columns, changed_at)
+            for row_key, old in previous.items() if row_key not in seen
+        ])
+    logger.info(f"📜 {spec.history_table}: أُضيف {appended} تغير")
+
+
+def merge_rows(batches, key_cols, merge):
+    """تجميع صفوف المفتاح نفسه عبر كل الدفعات (merge(الصف_المجمع, الصف_الجديد))"""
+    merged = {}
+    for rows in batches:
+        for row in rows:
+            row_key = _row_key(row, key_cols)
+            merged[row_key] = merge(merged[row_key], row) if row_key in merged else row
+    return list(merged.values())
+
+
+def _model_domain(spec, window=None):
+    """domain النموذج مع شرط النافذة على date_field إن وُجد"""
+    if window and spec.date_field:
+        return list(spec.domain) + sales_aggregates.window_domain(spec.date_field, *window)
+    return spec.domain
+
+
+def sync_model(odoo, supabase, spec, write_mode='upsert', snapshot=None, resume=True, summary=False,
+               window=None, export=None):
+    """مزامنة نموذج واحد حسب وصفه: جلب كامل بالصفحات، تحويل، ثم كتابة بالدفعات
+    
+    بعد كل صفحة مكتوبة تُحفظ نقطة استئناف (إلا مع merge حيث تُكتب اللقطة
+    مرة واحدة في النهاية). تُعيد مقاييس التشغيل: عدد السجلات المجلوبة،
+    الصفوف المكتوبة، والزمن.
+    summary=True (لنماذج لها group_by): الجلب عبر read_group بدون نقاط استئناف.
+    window=(since, until): السجلات التي يقع date_field فيها داخل النافذة فقط،
+    تُكتب بـ upsert دون حذف ما لم يظهر.
+    export: FileExport لتصدير الجدول إلى الملفات بجانب Supabase.
+    """
+    logger.info(f"🔄 بدء مزامنة {spec.name} ({spec.model} → {spec.table})...")
+    partial = bool(window and spec.date_field)
+    domain = _model_domain(spec, window)
+    if window and not partial:
+        logger.info(f"ℹ️ {spec.name}: النافذة الزمنية لا تنطبق على هذا النموذج - مزامنة كاملة")
+    started = time.monotonic()
+    # بتوقيت UTC صريح: يُكتب في أعمدة TIMESTAMP WITH TIME ZONE (ومنها changed_at في سجل التغيرات)
+    synced_at = datetime.now(timezone.utc).isoformat()
+    key_cols = _key_columns(spec.key)
+    metrics = {'fetched': 0, 'rows': 0}
+    
+    def rows_of(page):
+        metrics['fetched'] += len(page)
+        with run_metrics.timed('transform') as counters:
+            rows = spec.transform(Columns.from_records(page, ['id'] + spec.fields))
+            if spec.stamp_synced_at:
+                rows.constant('synced_at', synced_at)
+            counters.update(rows_in=len(page), rows_out=len(rows))
+        return rows
+    
+    checkpoint = Checkpoint(
+        spec.name, [spec.model, domain, spec.fields, spec.table, write_mode],
+        resume and spec.merge is None and not summary
+    )
+    if summary:
+        pages = read_group_pages(odoo, spec.model, domain, spec.fields, spec.group_by, spec.label)
+    else:
+        pages = stream_pages(odoo, spec.model, domain, spec.fields, spec.label, checkpoint.last_id)
+    on_written = None
+    if spec.merge is None:
+        batches = map(rows_of, pages)
+        if not summary:
+            # نقطة الاستئناف تتقدم عند اكتمال كتابة الصفحة (لا عند طلب التالية)
+            page_ends = {}
+            
+            def checkpointed_batches():
+                for index, page in enumerate(pages):
+                    page_ends[index] = page[-1]['id']
+                    yield rows_of(page)
+            batches = checkpointed_batches()
+            on_written = lambda index: checkpoint.advance(page_ends.pop(index))
+    else:
+        merged = merge_rows(map(rows_of, pages), key_cols, spec.merge)
+        logger.info(f"📊 تم تجميع {metrics['fetched']} {spec.label} في {len(merged)} صف")
+        batches = [merged]
+    batches = export_batches(export, spec.table, batches, partial, checkpoint.resumed)
+    if spec.history_table:
+        batches = record_history(supabase, spec, batches, synced_at, checkpoint.resumed or partial)
+    
+    metrics['rows'] = load_batches(
+        supabase, spec.table, batches, spec.key, write_mode, spec.label, snapshot,
+        resumed=checkpoint.resumed, before_swap=checkpoint.clear, on_written=on_written, partial=partial
+    )
+    checkpoint.clear()
+    metrics['seconds'] = time.monotonic() - started
+    
+    if not metrics['rows']:
+        logger.warning(f"⚠️ لا توجد بيانات لـ {spec.name}")
+        return metrics
+    
+    logger.info(
+        f"✅ تمت مزامنة {metrics['rows']} {spec.label} من {metrics['fetched']} سجل "
+        f"في {metrics['seconds']:.1f}s ({metrics['fetched'] / max(metrics['seconds'], 1e-9):.0f} سجل/ث)"
+    )
+    return metrics
+
+
+# ==================== تعريف النماذج ====================
+
+def _customer_columns(customers):
+    """تحويل res.partner إلى أعمدة aumet_customers"""
+    return Columns({
+        'aumet_id': customers['id'],
+        'name': customers['name'],
+        'email': customers['email'],
+        'phone': [phone or mobile for phone, mobile in zip(customers['phone'], customers['mobile'])]
+    })
+
+
+def _product_columns(products):
+    """تحويل product.product إلى أعمدة aumet_products"""
+    return Columns({
+        'aumet_id': products['id'],
+        'name': products['name'],
+        'default_code': products['default_code'],
+        'list_price': floats(products['list_price'])
+    })
+
+
+def _inventory_columns(quants):
+    """تحويل stock.quant إلى أعمدة aumet_inventory (قبل التجميع لكل منتج/موقع)"""
+    quantity = floats(quants['quantity'])
+    reserved = floats(quants['reserved_quantity'])
+    return Columns({
+        'product_id': many2one(quants['product_id'], 0),
+        'product_name': many2one(quants['product_id'], 1, 'غير معروف'),
+        'location': many2one(quants['location_id'], 1, 'غير محدد'),
+        'quantity': quantity,
+        'reserved_quantity': reserved,
+        'available_quantity': [q - r for q, r in zip(quantity, reserved)]
+    })
+
+
+def _merge_inventory(row, other):
+    """جمع كميات سجلين لنفس المنتج/الموقع"""
+    row['quantity'] += other['quantity']
+    row['reserved_quantity'] += other['reserved_quantity']
+    row['available_quantity'] = row['quantity'] - row['reserved_quantity']
+    return row
+
+
+def _purchase_columns(orders):
+    """تحويل purchase.order إلى أعمدة aumet_purchases"""
+    return Columns({
+        'purchase_id': orders['id'],
+        'purchase_name': orders['name'],
+        'supplier_id': many2one(orders['partner_id'], 0),
+        'supplier_name': many2one(orders['partner_id'], 1),
+        'purchase_date': orders['date_order'],
+        'amount_total': floats(orders['amount_total']),
+        'state': orders['state']
+    })
+
+
+MODEL_SYNCS = [
+    ModelSync(
+        name='customers',
+        model='res.partner',
+        # العملاء فقط وليس الموردين
+        domain=[['customer_rank', '>', 0]],
+        fields=['name', 'email', 'phone', 'mobile', 'city', 'country_id', 'customer_rank'],
+        table='aumet_customers',
+        transform=_customer_columns,
+        date_field='write_date',
+        label='عميل',
+    ),
+    ModelSync(
+        name='products',
+        model='product.product',
+        domain=[['sale_ok', '=', True]],
+        fields=['name', 'default_code', 'list_price', 'standard_price', 'categ_id', 'qty_available'],
+        table='aumet_products',
+        transform=_product_columns,
+        date_field='write_date',
+        label='منتج',
+    ),
+    ModelSync(
+        name='inventory',
+        model='stock.quant',
+        domain=[['quantity', '>', 0]],
+        fields=['product_id', 'location_id', 'quantity', 'reserved_quantity'],
+        table='aumet_inventory',
+        key=INVENTORY_KEY,
+        transform=_inventory_columns,
+        merge=_merge_inventory,
+        stamp_synced_at=True,
+        history_table='aumet_inventory_history',
+        history_columns=('quantity', 'reserved_quantity'),
+        group_by=('product_id', 'location_id'),
+        label='سجل مخزون',
+    ),
+    ModelSync(
+        name='purchases',
+        model='purchase.order',
+        domain=[['state', 'in', ['purchase', 'done']]],
+        fields=['name', 'partner_id', 'date_order', 'amount_total', 'state'],
+        table='aumet_purchases',
+        key='purchase_id',
+        transform=_purchase_columns,
+        stamp_synced_at=True,
+        date_field='date_order',
+        label='أمر شراء',
+    ),
+]
+
+
+# ==================== جدولة المراحل ====================
+
+@dataclass
+class SyncStage:
+    """مرحلة مزامنة: اسم، دالة تنفيذ بدون معاملات، والمراحل التي تعتمد عليها"""
+    name: str
+    run: object
+    depends_on: tuple = ()
+
+
+def _run_stage(stage):
+    """تنفيذ مرحلة واحدة وقياس زمنها (المقاييس تُنسب لاسم المرحلة)"""
+    token = current_entity.set(stage.name)
+    started = time.monotonic()
+    try:
+        stage.run()
+        status = 'ok'
+    except Exception:
+        logger.exception(f"❌ فشلت المرحلة {stage.name}")
+        status = 'failed'
+    finally:
+        current_entity.reset(token)
+    seconds = time.monotonic() - started
+    run_metrics.stage_finished(stage.name, status, seconds)
+    return {'status': status, 'seconds': seconds}
+
+
+def run_stages(stages, max_workers=None):
+    """تشغيل المراحل بالتوازي مع احترام الاعتماديات
+    
+    كل مرحلة تبدأ فور انتهاء جميع المراحل التي تعتمد عليها بنجاح، وتُتخطى
+    إذا فشلت إحداها. تُعاد حالة وزمن كل مرحلة.
+    """
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        unknown = set(stage.depends_on) - names
+        if unknown:
+            raise ValueError(f"المرحلة {stage.name} تعتمد على مراحل غير معرفة: {sorted(unknown)}")
+    
+    results = {}
+    remaining = list(stages)
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages), thread_name_prefix='stage') as executor:
+        running = {}
+        while remaining or running:
+            for stage in list(remaining):
+                dep_status = [results[d]['status'] for d in stage.depends_on if d in results]
+                if any(status != 'ok' for status in dep_status):
+                    logger.warning(f"⏭️ تخطي المرحلة {stage.name} بسبب فشل مرحلة تعتمد عليها")
+                    results[stage.name] = {'status': 'skipped', 'seconds': 0.0}
+                    remaining.remove(stage)
+                elif len(dep_status) == len(stage.depends_on):
+                    running[executor.submit(_run_stage, stage)] = stage.name
+                    remaining.remove(stage)
+            
+            if not running:
+                if remaining:
+                    raise ValueError(f"اعتماديات دائرية بين المراحل: {[s.name for s in remaining]}")
+                break
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    
+    return {stage.name: results[stage.name] for stage in stages}
+
+
+def log_stage_report(results, total_seconds):
+    """طباعة زمن وحالة كل مرحلة"""
+    icons = {'ok': '✅', 'failed': '❌', 'skipped': '⏭️'}
+    logger.info("📊 ملخص المراحل:")
+    for name, result in results.items():
+        logger.info(f"   {icons[result['status']]} {name:<15} {result['status']:<8} {result['seconds']:.1f}s")
+    logger.info(f"⏱️ الزمن الكلي: {total_seconds:.1f}s")
+
+
+# أسماء مختصرة لمجموعات مراحل في --entities
+ENTITY_GROUPS = {'sales': ('sales_orders', 'sales_aggregates', 'sales_rollups')}
+
+
+def entity_names():
+    """أسماء المراحل المتاحة لـ --entities بترتيب تشغيلها"""
+    return list(ENTITY_GROUPS['sales']) + [spec.name for spec in MODEL_SYNCS]
+
+
+def select_stages(stages, entities):
+    """المراحل المطلوبة فقط؛ الاعتماد على مرحلة غير مطلوبة يُهمل"""
+    return [
+        SyncStage(stage.name, stage.run, tuple(d for d in stage.depends_on if d in entities))
+        for stage in stages if stage.name in entities
+    ]
+
+
+def dry_run(odoo, model, domain, fields=(), transform=None, label='سجل'):
+    """--dry-run: عدد سجلات Odoo المطابقة، ومع transform جلبها وتحويلها
+    
+    لا يتصل بـ Supabase ولا يعدّل ملفات الحالة أو اللقطة أو نقاط الاستئناف.
+    """
+    count = odoo_execute(odoo, model, 'search_count', [domain])
+    message = f"🧪 {model}: {count} {label} مطابق"
+    if transform is not None and count:
+        rows = 0
+        for page in stream_pages(odoo, model, domain, list(fields), label):
+            with run_metrics.timed('transform') as counters:
+                batch = transform(Columns.from_records(page, ['id'] + list(fields)))
+                counters.update(rows_in=len(page), rows_out=len(batch))
+            rows += len(batch)
+        message += f"، {rows} صف بعد التحويل"
+    logger.info(f"{message} (تجربة - لم يُكتب شيء)")
+
+
+def _dry_run_sales_days(odoo, args, stage, model, field, label):
+    """--dry-run لمرحلة تجميع: سجلات الأيام المعلقة وأيام النافذة (أو الكل عند إعادة البناء)"""
+    state = load_state()
+    days = _sales_days(state.get(f'{stage}_pending') or [], args.window)
+    if args.full or stage not in state:
+        dry_run(odoo, model, [], label=label)
+    elif days:
+        logger.info(f"🧪 {stage}: إعادة حساب {len(days)} يوم مبيعات")
+        dry_run(odoo, model, sales_aggregates.days_domain(days, field), label=label)
+    else:
+        logger.info(f"🧪 {stage}: لا توجد أيام مبيعات معدلة")
+
+
+def build_dry_run_stages(odoo, args):
+    """مراحل --dry-run: نفس domain كل مرحلة مع الجلب والتحويل دون كتابة"""
+    watermark = None if args.full or args.window else load_state().get('sales_orders')
+    return [
+        SyncStage('sales_orders', lambda: dry_run(
+            odoo, 'pos.order', _sales_orders_domain(watermark, args.window), SALES_FIELDS, _order_columns, 'طلب')),
+        SyncStage('sales_aggregates', lambda: _dry_run_sales_days(
+            odoo, args, 'sales_aggregates', 'pos.order', 'date_order', 'طلب')),
+        SyncStage('sales_rollups', lambda: _dry_run_sales_days(
+            odoo, args, 'sales_rollups', 'pos.order.line', 'order_id.date_order', 'بند')),
+    ] + [
+        SyncStage(spec.name, lambda spec=spec: dry_run(
+            odoo, spec.model, _model_domain(spec, args.window), spec.fields, spec.transform, spec.label))
+        for spec in MODEL_SYNCS
+    ]
+
+
+def export_only(odoo, export, table, model, domain, fields, transform, key, label='سجل', merge=None,
+                partial=False):
+    """--export-only: جلب وتحويل ثم كتابة ملفات التصدير فقط
+    
+    لا يتصل بـ Supabase ولا يعدّل ملفات الحالة أو اللقطة أو نقاط الاستئناف.
+    partial: دمج السجلات في التصدير الحالي؛ السجلات التي استبعدها التحويل
+    (مثل المرتجعات) تُحذف من أقسامها.
+    """
+    deletes = []
+    
+    def batches():
+        for page in stream_pages(odoo, model, domain, fields, label):
+            with run_metrics.timed('transform') as counters:
+                rows = transform(Columns.from_records(page, ['id'] + fields))
+                counters.update(rows_in=len(page), rows_out=len(rows))
+            if partial:
+                kept = set(rows[key])
+                deletes.extend(record['id'] for record in page if record['id'] not in kept)
+            yield rows
+    
+    pages = batches()
+    if merge is not None:
+        pages = [merge_rows(pages, _key_columns(key), merge)]
+    rows = export.write(table, pages, 'merge' if partial else 'replace', deletes)
+    logger.info(f"✅ تم تصدير {rows} {label} ({model} → {table})")
+
+
+def build_export_stages(odoo, args, export):
+    """مراحل --export-only: الجداول القابلة للتصدير من Odoo مباشرة إلى الملفات"""
+    window = args.window
+    return [
+        SyncStage('sales_orders', lambda: export_only(
+            odoo, export, 'aumet_sales_orders', 'pos.order', _sales_orders_domain(window=window),
+            SALES_FIELDS, _order_columns, 'aumet_id', 'طلب', partial=bool(window))),
+    ] + [
+        SyncStage(spec.name, lambda spec=spec: export_only(
+            odoo, export, spec.table, spec.model, _model_domain(spec, window), spec.fields, spec.transform,
+            spec.key, spec.label, spec.merge, partial=bool(window and spec.date_field)))
+        for spec in MODEL_SYNCS if export.exports(spec.table)
+    ]
+
+
+def build_stages(odoo, supabase, args, snapshot=None, export=None):
+    """تعريف مراحل المزامنة واعتمادياتها (المطلوبة في --entities فقط)
+    
+    مع --summary تُشغّل فقط المراحل التي تدعم read_group (إجماليات المبيعات
+    والنماذج التي لها group_by). مع export تُصدّر الجداول إلى الملفات أيضاً.
+    """
+    window = args.window
+    if args.dry_run:
+        stages = build_dry_run_stages(odoo, args)
+    elif args.export_only:
+        stages = build_export_stages(odoo, args, export)
+    elif args.summary:
+        stages = [
+            SyncStage('sales_aggregates', lambda: sync_sales_aggregates(
+                odoo, supabase, write_mode=args.write_mode, snapshot=snapshot, summary=True)),
+        ] + [
+            SyncStage(spec.name, lambda spec=spec: sync_model(
+                odoo, supabase, spec, write_mode=args.write_mode, snapshot=snapshot, summary=True,
+                export=export))
+            for spec in MODEL_SYNCS if spec.group_by
+        ]
+    else:
+        stages = [
+            SyncStage('sales_orders', lambda: sync_sales_orders(
+                odoo, supabase, full=args.full, write_mode=args.write_mode, snapshot=snapshot,
+                resume=not args.no_resume, window=window, export=export)),
+            SyncStage('sales_aggregates', lambda: sync_sales_aggregates(
+                odoo, supabase, full=args.full, write_mode=args.write_mode, snapshot=snapshot, window=window),
+                ('sales_orders',)),
+            SyncStage('sales_rollups', lambda: sync_sales_rollups(
+                odoo, supabase, full=args.full, write_mode=args.write_mode, snapshot=snapshot, window=window),
+                ('sales_orders',)),
+        ] + [
+            SyncStage(spec.name, lambda spec=spec: sync_model(
+                odoo, supabase, spec, write_mode=args.write_mode, snapshot=snapshot,
+                resume=not args.no_resume, window=window, export=export), spec.depends_on)
+            for spec in MODEL_SYNCS
+        ]
+    return select_stages(stages, args.entities)
 
 
 # ==================== البرنامج الرئيسي ====================
 
+def _entities_arg(value):
+    """--entities: أسماء مراحل أو مجموعات (ENTITY_GROUPS) مفصولة بفواصل"""
+    entities = set()
+    for name in filter(None, (part.strip() for part in value.split(','))):
+        if name in ENTITY_GROUPS:
+            entities.update(ENTITY_GROUPS[name])
+        elif name in entity_names():
+            entities.add(name)
+        else:
+            raise argparse.ArgumentTypeError(
+                f"كيان غير معروف: {name} (المتاح: {', '.join(list(ENTITY_GROUPS) + entity_names())})"
+            )
+    return entities
+
+
+def _day_arg(value):
+    """تاريخ YYYY-MM-DD (يوم محلي بتوقيت SALES_TIMEZONE)"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"تاريخ غير صالح: {value} (الصيغة YYYY-MM-DD)")
+
+
+def parse_args(argv=None):
+    """قراءة خيارات سطر الأوامر"""
+    parser = argparse.ArgumentParser(description='مزامنة Aumet ERP (Odoo) مع Supabase')
+    parser.add_argument(
+        '--entities', type=_entities_arg, default=None,
+        help='المراحل المطلوبة مفصولة بفواصل (الافتراضي: الكل)، مثل sales,inventory؛ '
+             'sales = طلبات المبيعات وتجميعاتها'
+    )
+    parser.add_argument(
+        '--since', type=_day_arg,
+        help='مزامنة السجلات من هذا اليوم فقط (YYYY-MM-DD): upsert بدون حذف ولا تعديل العلامة المحفوظة'
+    )
+    parser.add_argument(
+        '--until', type=_day_arg,
+        help='آخر يوم في النافذة (شامل، الافتراضي: اليوم)؛ يتطلب --since'
+    )
+    parser.add_argument(
+        '--dry-run', action='store_true',
+        help='الجلب من Odoo والتحويل فقط: بدون اتصال بـ Supabase أو تعديل ملفات الحالة'
+    )
+    parser.add_argument(
+        '--export-dir', default=SYNC_EXPORT_DIR,
+        help='تصدير الطلبات والعملاء والمنتجات والمخزون والمشتريات أيضاً إلى ملفات '
+             'مقسمة حسب اليوم في هذا المجلد (يتطلب pyarrow)'
+    )
+    parser.add_argument(
+        '--export-format', choices=('parquet', 'arrow'), default=SYNC_EXPORT_FORMAT,
+        help='صيغة ملفات التصدير: parquet (مضغوط) أو arrow (Arrow IPC بدون ضغط للقراءة بـ memory map)'
+    )
+    parser.add_argument(
+        '--export-only', action='store_true',
+        help='التصدير إلى --export-dir فقط: بدون اتصال بـ Supabase أو تعديل ملفات الحالة'
+    )
+    parser.add_argument(
+        '--full', action='store_true',
+        help='إعادة بناء كاملة وتجاهل حالة المزامنة التزايدية المحفوظة'
+    )
+    parser.add_argument(
+        '--write-mode', choices=WRITE_MODES, default='upsert',
+        help='upsert: تحديث على المفتاح الطبيعي وحذف المفقود فقط، '
+             'swap: تحميل في جدول staging ثم استبدال ذري'
+    )
+    parser.add_argument(
+        '--summary', action='store_true',
+        help='تحديث جداول الملخص فقط (المخزون لكل منتج/موقع وإجماليات المبيعات) '
+             'عبر read_group في Odoo بدلاً من جلب كل السجلات'
+    )
+    parser.add_argument(
+        '--odoo-workers', type=int, default=ODOO_WORKERS,
+        help='عدد طلبات القراءة المتزامنة من Odoo (1 = تسلسلي)'
+    )
+    parser.add_argument(
+        '--write-concurrency', type=int, default=SUPABASE_WRITE_CONCURRENCY,
+        help='عدد دفعات upsert المُرسلة إلى Supabase بالتوازي (1 = تسلسلي)'
+    )
+    parser.add_argument(
+        '--no-resume', action='store_true',
+        help='تجاهل نقاط الاستئناف من تشغيل سابق منقطع والبدء من أول صفحة'
+    )
+    parser.add_argument(
+        '--no-snapshot', action='store_true',
+        help='عدم استخدام اللقطة المحلية (إرسال كل الصفوف بدلاً من المتغيرة فقط)'
+    )
+    parser.add_argument(
+        '--odoo-protocol', choices=PROTOCOLS, default=DEFAULT_PROTOCOL,
+        help='بروتوكول الاتصال بـ Odoo: xmlrpc أو jsonrpc'
+    )
+    parser.add_argument(
+        '--stage-workers', type=int, default=None,
+        help='أقصى عدد مراحل تعمل بالتوازي (الافتراضي: جميع المراحل المستقلة)'
+    )
+    parser.add_argument(
+        '--report', default=SYNC_REPORT_FILE,
+        help='مسار تقرير المقاييس (JSON) لكل مرحلة وطور'
+    )
+    parser.add_argument(
+        '--prometheus-textfile', default=SYNC_PROMETHEUS_FILE,
+        help='مسار ملف مقاييس Prometheus النصي (اختياري)'
+    )
+    args = parser.parse_args(argv)
+    
+    if args.until and not args.since:
+        parser.error('--until يتطلب --since')
+    args.window = (args.since, args.until or sales_aggregates.today()) if args.since else None
+    if args.window:
+        if args.window[0] > args.window[1]:
+            parser.error('--since بعد --until')
+        if args.full or args.summary:
+            parser.error('--since/--until لا تُستخدم مع --full أو --summary')
+        if args.write_mode == 'swap':
+            parser.error('--since/--until تكتب بـ upsert فقط (swap يستبدل الجدول كاملاً)')
+    if args.dry_run and args.summary:
+        parser.error('--dry-run لا يُستخدم مع --summary')
+    if args.export_only and not args.export_dir:
+        parser.error('--export-only يتطلب --export-dir (أو SYNC_EXPORT_DIR)')
+    if args.export_dir and args.dry_run:
+        parser.error('--dry-run لا يكتب ملفات التصدير (بدون --export-dir)')
+    if args.export_only and args.summary:
+        parser.error('--export-only لا يُستخدم مع --summary')
+    if args.entities is None:
+        args.entities = set(entity_names())
+    return args
+
+
+def write_reports(args):
+    """كتابة تقرير المقاييس (JSON) وملف Prometheus إن طُلب"""
+    report = run_metrics.report(
+        write_mode=args.write_mode,
+        full=args.full,
+        summary=args.summary,
+        write_concurrency=SUPABASE_WRITE_CONCURRENCY,
+        entities=sorted(args.entities),
+        window=args.window,
+        export_dir=args.export_dir or None,
+        odoo_protocol=args.odoo_protocol,
+        batch_sizes={name: batch.size for name, batch in sorted(_batch_sizes.items())},
+    )
+    try:
+        if args.report:
+            write_json_report(args.report, report)
+            logger.info(f"📝 تقرير المقاييس: {args.report}")
+        if args.prometheus_textfile:
+            write_prometheus_textfile(args.prometheus_textfile, report)
+    except OSError as e:
+        logger.warning(f"⚠️ تعذرت كتابة تقرير المقاييس: {e}")
+
+
 def main():
     """البرنامج الرئيسي"""
+    global ODOO_WORKERS, SUPABASE_WRITE_CONCURRENCY
+    args = parse_args()
+    ODOO_WORKERS = max(1, args.odoo_workers)
+    SUPABASE_WRITE_CONCURRENCY = max(1, args.write_concurrency)
+    run_metrics.reset()
+    
     logger.info("=" * 60)
     logger.info("🚀 بدء المزامنة الشاملة بين Aumet ERP و Supabase")
     logger.info("=" * 60)
     
+    if args.dry_run:
+        logger.info("🧪 وضع التجربة: لن يُكتب شيء في Supabase أو ملفات الحالة")
+    if args.window:
+        logger.info(f"📆 النافذة: من {args.window[0]} إلى {args.window[1]} (upsert بدون حذف)")
+    export = None
+    if args.export_dir:
+        # pyarrow مطلوب للتصدير فقط
+        from file_export import FileExport
+        export = FileExport(args.export_dir, args.export_format)
+        logger.info(f"📁 التصدير إلى {args.export_dir} ({args.export_format})"
+                    + (" فقط - بدون Supabase" if args.export_only else ""))
+    without_supabase = args.dry_run or args.export_only
+    
     # الاتصال بالأنظمة
-    models, uid = connect_odoo()
-    supabase = connect_supabase()
+    odoo = connect_odoo(args.odoo_protocol)
+    supabase = None if without_supabase else connect_supabase()
+    
+    # اللقطة المحلية: --full يمسحها ليُعاد إرسال كل شيء ويُصحح أي انحراف
+    snapshot = None if args.no_snapshot or without_supabase else SnapshotStore(SYNC_SNAPSHOT_FILE)
+    if snapshot is not None and args.full:
+        snapshot.clear()
     
     # المزامنة
-    sync_sales_orders(models, uid, supabase)
-    sync_customers(models, uid, supabase)
-    sync_products(models, uid, supabase)
-    sync_inventory(models, uid, supabase)
+    stages = build_stages(odoo, supabase, args, snapshot, export)
+    if not stages:
+        logger.warning("⚠️ لا توجد مراحل مطابقة لـ --entities في هذا الوضع")
+        return
+    started = time.monotonic()
+    results = run_stages(stages, args.stage_workers)
+    if snapshot is not None:
+        snapshot.close()
     
     logger.info("=" * 60)
+    log_stage_report(results, time.monotonic() - started)
+    log_batch_sizes()
+    logger.info(f"📡 Odoo: أُرسل {odoo.bytes_sent / 1024:.0f}KB واستُقبل {odoo.bytes_received / 1024:.0f}KB")
+    # تشغيل التجربة أو التصدير فقط لا يستبدل تقرير آخر مزامنة فعلية
+    if not without_supabase:
+        write_reports(args)
+    failed = [name for name, result in results.items() if result['status'] != 'ok']
+    if failed:
+        logger.error(f"❌ اكتملت المزامنة مع أخطاء في: {', '.join(failed)}")
+        logger.info("=" * 60)
+        sys.exit(1)
+    
     logger.info("✅ اكتملت المزامنة بنجاح!")
     logger.info("=" * 60)
 
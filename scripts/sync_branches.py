@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+مزامنة عدة فروع (قواعد Odoo منفصلة) بالتوازي إلى Supabase
+
+كل فرع يُعرّف في ملف إعدادات JSON (انظر sync_branches.example.json):
+عنوان Odoo وقاعدته والمستخدم، اسم متغير البيئة الذي يحمل كلمة المرور،
+و schema الفرع في Supabase (نفس أسماء الجداول في schema منفصل لكل فرع).
+
+كل فرع يُشغّل sync_aumet_to_supabase.py في عملية مستقلة ببيئته الخاصة:
+إعدادات الاتصال، وملفات الحالة واللقطة ونقاط الاستئناف والتقرير في مجلد
+الفرع. العمليات تعمل بالتوازي بحد أقصى --workers، فلا يتأثر فرع بفشل
+آخر ولا يطول زمن التشغيل بنسبة عدد الفروع. في النهاية يُكتب تقرير مجمع
+بحالة كل فرع وتقريره ومجاميع المقاييس لكل كيان عبر الفروع.
+
+مثال:
+    python scripts/sync_branches.py --config scripts/sync_branches.json --workers 4 -- --write-mode swap
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from sync_metrics import COUNTERS, write_json_report
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# ==================== الإعدادات ====================
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SYNC_SCRIPT = os.path.join(SCRIPTS_DIR, 'sync_aumet_to_supabase.py')
+
+SYNC_BRANCHES_FILE = os.getenv('SYNC_BRANCHES_FILE', os.path.join(SCRIPTS_DIR, 'sync_branches.json'))
+# مجلد ملفات كل فرع: <SYNC_BRANCHES_DIR>/<اسم الفرع>/
+SYNC_BRANCHES_DIR = os.getenv('SYNC_BRANCHES_DIR', os.path.join(SCRIPTS_DIR, '.sync_branches'))
+SYNC_BRANCHES_REPORT_FILE = os.getenv(
+    'SYNC_BRANCHES_REPORT_FILE', os.path.join(SCRIPTS_DIR, '.sync_branches_report.json')
+)
+SYNC_BRANCH_WORKERS = int(os.getenv('SYNC_BRANCH_WORKERS', '4'))  # عدد الفروع المتزامنة
+
+# مفاتيح إعدادات الفرع ← متغيرات البيئة التي يقرأها سكريبت المزامنة
+BRANCH_SETTINGS = {
+    'odoo_url': 'ODOO_URL',
+    'odoo_db': 'ODOO_DB',
+    'odoo_username': 'ODOO_USERNAME',
+    'odoo_uid': 'ODOO_UID',
+    'supabase_url': 'SUPABASE_URL',
+    'supabase_schema': 'SUPABASE_SCHEMA',
+}
+# إعدادات تُورث من بيئة الـ runner إن لم يحددها الفرع (مشروع Supabase مشترك)؛
+# غيرها يُحذف من البيئة حتى لا تصل قيمة الـ runner (ODOO_UID مثلاً) إلى فرع آخر
+RUNNER_SETTINGS = ('supabase_url',)
+REQUIRED_SETTINGS = ('odoo_url', 'odoo_db', 'odoo_username', 'odoo_password_env', 'supabase_schema')
+# الأسرار لا تُكتب في الملف: الإعداد يحمل اسم متغير البيئة الذي يحتويها
+BRANCH_SECRETS = {
+    'odoo_password_env': 'ODOO_PASSWORD',
+    'supabase_key_env': 'SUPABASE_KEY',
+}
+# ملفات الفرع المحلية (داخل مجلده)
+BRANCH_FILES = {
+    'SYNC_STATE_FILE': 'sync_state.json',
+    'SYNC_SNAPSHOT_FILE': 'sync_snapshot.sqlite',
+    'SYNC_CHECKPOINT_FILE': 'sync_checkpoint.json',
+    'SYNC_REPORT_FILE': 'sync_report.json',
+    'ODOO_SESSION_CACHE': 'odoo_session.json',
+}
+BRANCH_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+# ==================== ملف الإعدادات ====================
+
+def load_branches(path):
+    """قراءة الفروع من ملف الإعدادات مع تطبيق defaults على كل فرع"""
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    defaults = config.get('defaults', {})
+    branches = []
+    for entry in config.get('branches', []):
+        branch = {**defaults, **entry, 'env': {**defaults.get('env', {}), **entry.get('env', {})}}
+        name = branch.get('name', '')
+        if not BRANCH_NAME_PATTERN.match(name):
+            raise ValueError(f"اسم فرع غير صالح: {name!r} (أحرف لاتينية وأرقام و _ - فقط)")
+        if any(other['name'] == name for other in branches):
+            raise ValueError(f"اسم الفرع مكرر: {name}")
+        missing = [key for key in REQUIRED_SETTINGS if not branch.get(key)]
+        if missing:
+            raise ValueError(f"إعدادات ناقصة للفرع {name}: {', '.join(missing)}")
+        # فرعان في نفس الـ schema يكتبان فوق جداول بعضهما
+        shared = [other['name'] for other in branches if other['supabase_schema'] == branch['supabase_schema']]
+        if shared:
+            raise ValueError(f"الفرع {name} يستخدم schema الفرع {shared[0]}: {branch['supabase_schema']}")
+        branches.append(branch)
+    if not branches:
+        raise ValueError(f"لا توجد فروع في {path}")
+    return branches
+
+
+def branch_dir(branch):
+    return os.path.join(SYNC_BRANCHES_DIR, branch['name'])
+
+
+def branch_environment(branch):
+    """بيئة عملية الفرع: بيئة الـ runner مع إعدادات الفرع وملفاته"""
+    env = dict(os.environ)
+    for key, variable in BRANCH_SETTINGS.items():
+        if branch.get(key) is not None:
+            env[variable] = str(branch[key])
+        elif key not in RUNNER_SETTINGS:
+            env.pop(variable, None)
+    for key, variable in BRANCH_SECRETS.items():
+        if branch.get(key):
+            if branch[key] not in os.environ:
+                raise ValueError(f"متغير البيئة {branch[key]} غير موجود (الفرع {branch['name']})")
+            env[variable] = os.environ[branch[key]]
+    for variable, filename in BRANCH_FILES.items():
+        env[variable] = os.path.join(branch_dir(branch), filename)
+    if env.get('SYNC_EXPORT_DIR'):
+        # مجلد تصدير مشترك يُقسّم حسب الفرع حتى لا تستبدل الفروع ملفات بعضها
+        env['SYNC_EXPORT_DIR'] = os.path.join(env['SYNC_EXPORT_DIR'], branch['name'])
+    env.update({name: str(value) for name, value in branch['env'].items()})
+    return env
+
+
+# ==================== التشغيل ====================
+
+def run_branch(branch, sync_args):
+    """تشغيل مزامنة فرع واحد في عملية مستقلة وإعادة نتيجته"""
+    directory = branch_dir(branch)
+    os.makedirs(directory, exist_ok=True)
+    log_path = os.path.join(directory, 'sync.log')
+    result = {'status': 'failed', 'exit_code': None, 'seconds': 0.0, 'log': log_path, 'report': None}
+    started = time.monotonic()
+    try:
+        env = branch_environment(branch)
+        # تقرير تشغيل سابق لا يُنسب لهذا التشغيل إذا فشل الفرع قبل كتابة تقريره
+        if os.path.exists(env['SYNC_REPORT_FILE']):
+            os.remove(env['SYNC_REPORT_FILE'])
+        logger.info(f"🚀 {branch['name']}: بدء المزامنة ({branch['odoo_db']})")
+        with open(log_path, 'w', encoding='utf-8') as log:
+            process = subprocess.run(
+                [sys.executable, SYNC_SCRIPT] + list(sync_args),
+                env=env, stdout=log, stderr=subprocess.STDOUT, cwd=SCRIPTS_DIR
+            )
+        result['exit_code'] = process.returncode
+        if os.path.exists(env['SYNC_REPORT_FILE']):
+            with open(env['SYNC_REPORT_FILE'], 'r', encoding='utf-8') as f:
+                result['report'] = json.load(f)
+        result['status'] = 'ok' if process.returncode == 0 else 'failed'
+    except Exception as e:
+        result['error'] = str(e)
+    result['seconds'] = round(time.monotonic() - started, 3)
+    if result['status'] == 'ok':
+        logger.info(f"✅ {branch['name']}: اكتملت في {result['seconds']:.1f}s")
+    else:
+        reason = result.get('error') or f"رمز الخروج {result['exit_code']}، السجل: {log_path}"
+        logger.error(f"❌ {branch['name']}: فشلت ({reason})")
+    return result
+
+
+def combine_entities(results):
+    """مجاميع عدادات كل (كيان، طور) عبر تقارير الفروع"""
+    entities = {}
+    for result in results.values():
+        for entity, phases in ((result['report'] or {}).get('entities') or {}).items():
+            for phase, totals in phases.items():
+                combined = entities.setdefault(entity, {}).setdefault(phase, dict.fromkeys(COUNTERS, 0))
+                for name in COUNTERS:
+                    combined[name] += totals.get(name, 0)
+    for phases in entities.values():
+        for totals in phases.values():
+            totals['seconds'] = round(totals['seconds'], 3)
+    return entities
+
+
+def run_branches(branches, sync_args, workers):
+    """تشغيل الفروع بالتوازي (workers عملية على الأكثر) وإعادة {الفرع: النتيجة}"""
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='branch') as executor:
+        futures = {executor.submit(run_branch, branch, sync_args): branch['name'] for branch in branches}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    # ترتيب الفروع كما في ملف الإعدادات
+    return {branch['name']: results[branch['name']] for branch in branches}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='مزامنة عدة فروع Odoo بالتوازي',
+        epilog='المعاملات بعد -- تُمرر كما هي إلى sync_aumet_to_supabase.py لكل فرع'
+    )
+    parser.add_argument('--config', default=SYNC_BRANCHES_FILE, help='ملف إعدادات الفروع (JSON)')
+    parser.add_argument('--workers', type=int, default=SYNC_BRANCH_WORKERS, help='عدد الفروع المتزامنة')
+    parser.add_argument('--branches', help='أسماء فروع محددة مفصولة بفواصل (الافتراضي: الكل)')
+    parser.add_argument('--report', default=SYNC_BRANCHES_REPORT_FILE, help='مسار التقرير المجمع (JSON)')
+    parser.add_argument('sync_args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.sync_args[:1] == ['--']:
+        args.sync_args = args.sync_args[1:]
+    return args
+
+
+def main(argv=None):
+    """البرنامج الرئيسي"""
+    args = parse_args(argv)
+    try:
+        branches = load_branches(args.config)
+    except (OSError, ValueError) as e:
+        logger.error(f"❌ خطأ في ملف إعدادات الفروع: {e}")
+        sys.exit(1)
+    if args.branches:
+        selected = set(args.branches.split(','))
+        unknown = selected - {branch['name'] for branch in branches}
+        if unknown:
+            logger.error(f"❌ فروع غير معرفة: {', '.join(sorted(unknown))}")
+            sys.exit(1)
+        branches = [branch for branch in branches if branch['name'] in selected]
+    workers = max(1, min(args.workers, len(branches)))
+
+    logger.info("=" * 60)
+    logger.info(f"🚀 مزامنة {len(branches)} فرع بالتوازي ({workers} في نفس الوقت)")
+    logger.info("=" * 60)
+
+    started_at = datetime.now()
+    started = time.monotonic()
+    results = run_branches(branches, args.sync_args, workers)
+    failed = [name for name, result in results.items() if result['status'] != 'ok']
+
+    report = {
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+        'seconds': round(time.monotonic() - started, 3),
+        'status': 'failed' if failed else 'ok',
+        'workers': workers,
+        'sync_args': args.sync_args,
+        'branches': results,
+        'entities': combine_entities(results),
+    }
+    write_json_report(args.report, report)
+
+    logger.info("=" * 60)
+    for name, result in results.items():
+        icon = '✅' if result['status'] == 'ok' else '❌'
+        logger.info(f"   {icon} {name:<20} {result['seconds']:>8.1f}s")
+    total = sum(result['seconds'] for result in results.values())
+    logger.info(f"⏱️ الزمن الكلي: {report['seconds']:.1f}s (مجموع أزمنة الفروع: {total:.1f}s)")
+    logger.info(f"📝 التقرير المجمع: {args.report}")
+    if failed:
+        logger.error(f"❌ فشلت مزامنة الفروع: {', '.join(failed)}")
+        sys.exit(1)
+    logger.info("✅ اكتملت مزامنة جميع الفروع بنجاح!")
+
+
+if __name__ == "__main__":
+    main()
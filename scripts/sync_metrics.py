@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+مقاييس تشغيل المزامنة لكل كيان ولكل طور
+
+الأطوار: count, search, read, transform, delete, insert. لكل (كيان، طور)
+يُجمع: الزمن التراكمي، عدد الطلبات، البايتات المرسلة والمستقبلة، الصفوف
+الداخلة والخارجة، وعدد إعادة المحاولات. يُكتب التقرير كـ JSON وبشكل
+اختياري كملف نصي لـ Prometheus (node_exporter textfile collector).
+
+الكيان الحالي يُحدد عبر current_entity (contextvar) عند بدء كل مرحلة؛
+الـ threads التي تنشئها المرحلة يجب أن تُشغَّل داخل copy_context() لترثه.
+"""
+
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+
+PHASES = ('count', 'search', 'read', 'transform', 'delete', 'insert')
+COUNTERS = ('seconds', 'calls', 'bytes_sent', 'bytes_received', 'rows_in', 'rows_out', 'retries')
+PROMETHEUS_PREFIX = 'aumet_sync'
+
+current_entity = contextvars.ContextVar('sync_entity', default='-')
+
+
+class RunMetrics:
+    """مقاييس تشغيل واحد (آمنة للاستخدام من عدة threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = datetime.now()
+            self._started = time.monotonic()
+            self.phases = {}
+            self.stages = {}
+
+    def add(self, phase, entity=None, **counters):
+        """إضافة قيم إلى عدادات (الكيان، الطور)"""
+        entity = entity or current_entity.get()
+        with self._lock:
+            totals = self.phases.setdefault(entity, {}).setdefault(phase, dict.fromkeys(COUNTERS, 0))
+            for name, value in counters.items():
+                totals[name] += value
+
+    @contextmanager
+    def timed(self, phase, entity=None):
+        """قياس زمن كتلة كود؛ القاموس المُعاد يُملأ بباقي العدادات داخل الكتلة"""
+        counters = {}
+        started = time.monotonic()
+        try:
+            yield counters
+        finally:
+            self.add(phase, entity, seconds=time.monotonic() - started, **counters)
+
+    def stage_finished(self, name, status, seconds):
+        with self._lock:
+            self.stages[name] = {'status': status, 'seconds': round(seconds, 3)}
+
+    def report(self, **extra):
+        """التقرير الكامل كقاموس قابل للتحويل إلى JSON"""
+        with self._lock:
+            entities = {
+                entity: {
+                    phase: {name: round(value, 3) if name == 'seconds' else value for name, value in totals.items()}
+                    for phase, totals in sorted(phases.items(), key=lambda item: _phase_order(item[0]))
+                }
+                for entity, phases in sorted(self.phases.items())
+            }
+            stages = dict(self.stages)
+        failed = [name for name, stage in stages.items() if stage['status'] != 'ok']
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'seconds': round(time.monotonic() - self._started, 3),
+            'status': 'failed' if failed else 'ok',
+            'stages': stages,
+            'entities': entities,
+            **extra,
+        }
+
+
+def _phase_order(phase):
+    return PHASES.index(phase) if phase in PHASES else len(PHASES)
+
+
+def _write_atomic(path, text):
+    """كتابة الملف دفعة واحدة (لا يقرأ المُجمّع ملفاً نصف مكتوب)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_json_report(path, report):
+    _write_atomic(path, json.dumps(report, indent=2, ensure_ascii=False))
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def write_prometheus_textfile(path, report):
+    """كتابة التقرير بصيغة Prometheus النصية"""
+    lines = []
+
+    def metric(name, help_text, kind, samples):
+        full_name = f'{PROMETHEUS_PREFIX}_{name}'
+        lines.append(f'# HELP {full_name} {help_text}')
+        lines.append(f'# TYPE {full_name} {kind}')
+        for labels, value in samples:
+            lines.append(f'{full_name}{{{labels}}} {value}' if labels else f'{full_name} {value}')
+
+    metric('last_run_timestamp_seconds', 'Unix time when the last sync run finished.', 'gauge',
+           [('', int(time.time()))])
+    metric('run_seconds', 'Wall time of the last sync run.', 'gauge', [('', report['seconds'])])
+    metric('run_success', '1 if every stage of the last run succeeded.', 'gauge',
+           [('', int(report['status'] == 'ok'))])
+    metric('stage_success', '1 if the stage succeeded in the last run.', 'gauge',
+           [(_labels(stage=name), int(stage['status'] == 'ok')) for name, stage in report['stages'].items()])
+    metric('stage_seconds', 'Wall time of each stage in the last run.', 'gauge',
+           [(_labels(stage=name), stage['seconds']) for name, stage in report['stages'].items()])
+
+    for counter in COUNTERS:
+        metric(
+            f'phase_{counter}', f'Per entity/phase {counter.replace("_", " ")} in the last run.', 'gauge',
+            [
+                (_labels(entity=entity, phase=phase), totals[counter])
+                for entity, phases in report['entities'].items()
+                for phase, totals in phases.items()
+            ]
+        )
+
+    _write_atomic(path, '\n'.join(lines) + '\n')
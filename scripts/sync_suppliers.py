@@ -3,10 +3,13 @@
 سكريبت مزامنة الموردين من Odoo إلى Supabase
 """
 
-import xmlrpc.client
 import os
+import json
+import hashlib
 from supabase import create_client, Client
 
+from odoo_client import OdooClient
+
 # قراءة بيانات الاتصال من Environment Variables
 ODOO_URL = os.getenv('ODOO_URL', 'https://health-path.erp-ksa.aumet.com')
 ODOO_DB = os.getenv('ODOO_DB', 'health-path')
@@ -16,20 +19,22 @@ ODOO_PASSWORD = os.getenv('ODOO_PASSWORD')
 SUPABASE_URL = os.getenv('SUPABASE_URL', 'https://ajcbqdlpovpxbzltbjfl.supabase.co')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 
+BATCH_SIZE = 500  # عدد الموردين في كل طلب upsert
+PAGE_SIZE = 1000  # الحد الافتراضي لعدد الصفوف في استجابة PostgREST
+CONTENT_COLUMNS = ('name', 'contact_person', 'email', 'phone', 'address')
+
 def connect_odoo():
-    """الاتصال بـ Odoo"""
-    common = xmlrpc.client.ServerProxy(f'{ODOO_URL}/xmlrpc/2/common')
-    uid = common.authenticate(ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD, {})
-    models = xmlrpc.client.ServerProxy(f'{ODOO_URL}/xmlrpc/2/object')
-    return uid, models
+    """الاتصال بـ Odoo (البروتوكول حسب ODOO_PROTOCOL: xmlrpc أو jsonrpc)"""
+    odoo = OdooClient(ODOO_URL, ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD)
+    odoo.authenticate()
+    return odoo
 
-def get_suppliers(uid, models):
+def get_suppliers(odoo):
     """جلب بيانات الموردين من Odoo"""
     print("🔄 جلب بيانات الموردين من Odoo...")
     
     # البحث عن الموردين (res.partner مع is_supplier=True)
-    supplier_ids = models.execute_kw(
-        ODOO_DB, uid, ODOO_PASSWORD,
+    supplier_ids = odoo.execute_kw(
         'res.partner', 'search',
         [[['supplier_rank', '>', 0]]]  # الموردين فقط
     )
@@ -41,8 +46,7 @@ def get_suppliers(uid, models):
         return []
     
     # جلب تفاصيل الموردين
-    suppliers = models.execute_kw(
-        ODOO_DB, uid, ODOO_PASSWORD,
+    suppliers = odoo.execute_kw(
         'res.partner', 'read',
         [supplier_ids],
         {'fields': ['id', 'name', 'email', 'phone', 'mobile', 'street', 'city', 'country_id']}
@@ -50,44 +54,137 @@ def get_suppliers(uid, models):
     
     return suppliers
 
+def supplier_row(supplier):
+    """تحويل res.partner إلى صف في جدول suppliers (بما يتوافق مع schema الموجود)"""
+    contact_name = supplier.get('name', '').split()[0] if supplier.get('name') else 'غير محدد'
+    return {
+        'odoo_partner_id': supplier['id'],
+        'name': supplier['name'] or 'مورد غير معروف',
+        'contact_person': contact_name,
+        'email': supplier.get('email') or None,
+        'phone': supplier.get('phone') or supplier.get('mobile') or None,
+        'address': f"{supplier.get('street') or ''} {supplier.get('city') or ''} {supplier['country_id'][1] if supplier.get('country_id') else ''}".strip() or None,
+    }
+
+
+def content_hash(row):
+    """hash لمحتوى المورد (بدون المعرفات) لاكتشاف التغيير والتكرار"""
+    content = {column: row.get(column) for column in CONTENT_COLUMNS}
+    encoded = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def load_existing_index(supabase):
+    """بناء فهرس محلي لما هو موجود في Supabase
+    
+    يُعيد (by_partner, legacy): by_partner = {odoo_partner_id: hash} و
+    legacy = {hash: [id, ...]} للصفوف القديمة التي أُدرجت بدون odoo_partner_id.
+    """
+    by_partner = {}
+    legacy = {}
+    columns = ','.join(('id', 'odoo_partner_id') + CONTENT_COLUMNS)
+    start = 0
+    while True:
+        page = (
+            supabase.table('suppliers').select(columns)
+            .order('id').range(start, start + PAGE_SIZE - 1).execute().data
+        )
+        for row in page:
+            if row.get('odoo_partner_id') is not None:
+                by_partner[row['odoo_partner_id']] = content_hash(row)
+            else:
+                legacy.setdefault(content_hash(row), []).append(row['id'])
+        if len(page) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+    return by_partner, legacy
+
+
+# فئات SQLSTATE لأخطاء سببها صف بعينه: بيانات غير صالحة (22) أو مخالفة قيد (23)
+ROW_ERROR_CLASSES = ('22', '23')
+
+
+def is_row_error(error):
+    """هل الخطأ من Postgres بسبب صف معين (فيفيد تقسيم الدفعة لعزله)؟"""
+    return str(getattr(error, 'code', '') or '')[:2] in ROW_ERROR_CLASSES
+
+
+def upsert_isolated(supabase, rows, on_conflict):
+    """upsert دفعة كاملة؛ عند خطأ صف تُقسم الدفعة إلى نصفين حتى يُعزل الصف المسبب
+    
+    صف واحد معطوب يكلف log2(حجم الدفعة) طلباً إضافياً فقط بدلاً من طلب لكل صف.
+    الأخطاء التي تصيب الدفعة كلها (on_conflict غير صالح، صلاحيات، شبكة،
+    مهلة) تُرفع مباشرة بدون تقسيم. تُعيد قائمة (الصف، الخطأ) للصفوف التي فشلت.
+    """
+    if not rows:
+        return []
+    try:
+        supabase.table('suppliers').upsert(rows, on_conflict=on_conflict).execute()
+        return []
+    except Exception as e:
+        if not is_row_error(e):
+            raise
+        if len(rows) == 1:
+            return [(rows[0], e)]
+        middle = len(rows) // 2
+        return (
+            upsert_isolated(supabase, rows[:middle], on_conflict)
+            + upsert_isolated(supabase, rows[middle:], on_conflict)
+        )
+
+
 def sync_to_supabase(suppliers):
-    """مزامنة الموردين مع Supabase"""
+    """مزامنة الموردين مع Supabase (upsert على odoo_partner_id بالدفعات)
+    
+    لا يُرسل إلا الموردون الجدد أو الذين تغيرت بياناتهم، لذا إعادة التشغيل
+    لا تكرر الجدول. الصفوف القديمة المطابقة (بدون odoo_partner_id) تُربط
+    بالمورد بدلاً من إدراج نسخة جديدة.
+    """
     print("🔄 مزامنة الموردين مع Supabase...")
     
     supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
     
-    synced_count = 0
-    error_count = 0
+    by_partner, legacy = load_existing_index(supabase)
+    print(f"📊 الموجود في Supabase: {len(by_partner)} مورد مرتبط، {sum(map(len, legacy.values()))} صف قديم بدون معرف")
     
+    inserts, updates, adopted = [], [], []
+    skipped = 0
     for supplier in suppliers:
-        try:
-            # تحضير البيانات بما يتوافق مع schema الموجود
-            contact_name = supplier.get('name', '').split()[0] if supplier.get('name') else 'غير محدد'
-            
-            data = {
-                'name': supplier['name'] or 'مورد غير معروف',
-                'contact_person': contact_name,
-                'email': supplier.get('email') or None,
-                'phone': supplier.get('phone') or supplier.get('mobile') or None,
-                'address': f"{supplier.get('street', '')} {supplier.get('city', '')} {supplier['country_id'][1] if supplier.get('country_id') else ''}".strip() or None,
-            }
-            
-            # إدراج فقط (بدون تحديث)
-            result = supabase.table('suppliers').insert(data).execute()
-            synced_count += 1
-            
-            if synced_count % 100 == 0:
-                print(f"✅ تمت مزامنة {synced_count} مورد...")
-                
-        except Exception as e:
-            error_count += 1
-            print(f"❌ خطأ في مزامنة المورد {supplier['id']}: {str(e)}")
-            continue
+        row = supplier_row(supplier)
+        digest = content_hash(row)
+        previous = by_partner.get(row['odoo_partner_id'])
+        if previous == digest:
+            skipped += 1
+        elif previous is not None:
+            updates.append(row)
+        elif legacy.get(digest):
+            # صف قديم مطابق: يُحدّث بإضافة odoo_partner_id بدلاً من التكرار
+            adopted.append({'id': legacy[digest].pop(), **row})
+        else:
+            inserts.append(row)
+        by_partner[row['odoo_partner_id']] = digest
+    
+    failed = []
+    for batch_start in range(0, len(inserts) + len(updates), BATCH_SIZE):
+        batch = (inserts + updates)[batch_start:batch_start + BATCH_SIZE]
+        failed += upsert_isolated(supabase, batch, 'odoo_partner_id')
+    for batch_start in range(0, len(adopted), BATCH_SIZE):
+        failed += upsert_isolated(supabase, adopted[batch_start:batch_start + BATCH_SIZE], 'id')
+    
+    failed_ids = {row['odoo_partner_id'] for row, _ in failed}
+    for row, error in failed:
+        print(f"❌ خطأ في مزامنة المورد {row['odoo_partner_id']}: {str(error)}")
+    
+    inserted = sum(1 for row in inserts if row['odoo_partner_id'] not in failed_ids)
+    updated = sum(1 for row in updates + adopted if row['odoo_partner_id'] not in failed_ids)
     
     print(f"\n🎉 اكتملت المزامنة!")
-    print(f"✅ تمت مزامنة {synced_count} مورد بنجاح")
-    if error_count > 0:
-        print(f"❌ فشل {error_count} مورد")
+    print(f"➕ جديد: {inserted}")
+    print(f"✏️ محدّث: {updated}")
+    print(f"⏭️ بدون تغيير: {skipped}")
+    if failed:
+        print(f"❌ فشل {len(failed)} مورد")
+    return {'inserted': inserted, 'updated': updated, 'skipped': skipped, 'failed': len(failed)}
 
 def main():
     """الدالة الرئيسية"""
@@ -106,11 +203,11 @@ def main():
     
     try:
         # الاتصال بـ Odoo
-        uid, models = connect_odoo()
-        print(f"✅ تم الاتصال بـ Odoo بنجاح! (User ID: {uid})")
+        odoo = connect_odoo()
+        print(f"✅ تم الاتصال بـ Odoo بنجاح! (User ID: {odoo.uid}, {odoo.protocol})")
         
         # جلب الموردين
-        suppliers = get_suppliers(uid, models)
+        suppliers = get_suppliers(odoo)
         
         if suppliers:
             # المزامنة مع Supabase
@@ -3,10 +3,11 @@
 """
 
 import os
-import xmlrpc.client
 from datetime import datetime, timedelta
 import logging
 
+from odoo_client import OdooClient
+
 # إعداد Logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,21 +25,17 @@ def test_fetch_orders():
     """اختبار جلب الطلبات بفلاتر مختلفة"""
     try:
         logger.info("🔗 الاتصال بـ Odoo...")
-        common = xmlrpc.client.ServerProxy(f'{ODOO_URL}/xmlrpc/2/common')
-        models = xmlrpc.client.ServerProxy(f'{ODOO_URL}/xmlrpc/2/object')
+        # بدون ذاكرة الجلسة: نختبر تسجيل الدخول فعلياً ولا نكتب .odoo_session.json
+        odoo = OdooClient(ODOO_URL, ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD, session_cache=None)
         
         # المصادقة
-        uid = common.authenticate(ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD, {})
-        if not uid:
-            logger.error("❌ فشلت المصادقة")
-            return
+        uid, _ = odoo.authenticate()
         
-        logger.info(f"✅ تم تسجيل الدخول - UID: {uid}")
+        logger.info(f"✅ تم تسجيل الدخول - UID: {uid} ({odoo.protocol})")
         
         # اختبار 1: جلب جميع الطلبات بدون فلتر
         logger.info("\n📊 اختبار 1: جلب جميع الطلبات...")
-        all_order_ids = models.execute_kw(
-            ODOO_DB, uid, ODOO_PASSWORD,
+        all_order_ids = odoo.execute_kw(
             'sale.order', 'search',
             [[]], 
             {}
@@ -48,8 +45,7 @@ def test_fetch_orders():
         # اختبار 2: جلب طلبات آخر سنة
         logger.info("\n📊 اختبار 2: جلب طلبات آخر سنة...")
         one_year_ago = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
-        year_order_ids = models.execute_kw(
-            ODOO_DB, uid, ODOO_PASSWORD,
+        year_order_ids = odoo.execute_kw(
             'sale.order', 'search',
             [[['date_order', '>=', one_year_ago]]], 
             {}
@@ -60,8 +56,7 @@ def test_fetch_orders():
         # اختبار 3: جلب طلبات آخر 6 أشهر
         logger.info("\n📊 اختبار 3: جلب طلبات آخر 6 أشهر...")
         six_months_ago = (datetime.now() - timedelta(days=180)).strftime('%Y-%m-%d')
-        six_month_order_ids = models.execute_kw(
-            ODOO_DB, uid, ODOO_PASSWORD,
+        six_month_order_ids = odoo.execute_kw(
             'sale.order', 'search',
             [[['date_order', '>=', six_months_ago]]], 
             {}
@@ -72,8 +67,7 @@ def test_fetch_orders():
         # اختبار 4: جلب طلبات آخر 3 أشهر
         logger.info("\n📊 اختبار 4: جلب طلبات آخر 3 أشهر...")
         three_months_ago = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
-        three_month_order_ids = models.execute_kw(
-            ODOO_DB, uid, ODOO_PASSWORD,
+        three_month_order_ids = odoo.execute_kw(
             'sale.order', 'search',
             [[['date_order', '>=', three_months_ago]]], 
             {}
@@ -84,8 +78,7 @@ def test_fetch_orders():
         # جلب تفاصيل أول 5 طلبات للتحقق
         if all_order_ids[:5]:
             logger.info("\n📋 تفاصيل أول 5 طلبات:")
-            sample_orders = models.execute_kw(
-                ODOO_DB, uid, ODOO_PASSWORD,
+            sample_orders = odoo.execute_kw(
                 'sale.order', 'read',
                 [all_order_ids[:5]],
                 {'fields': ['name', 'date_order', 'amount_total', 'state']}
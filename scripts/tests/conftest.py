@@ -0,0 +1,58 @@
+"""إعداد مشترك لاختبارات سكريبتات المزامنة (python -m pytest من جذر المستودع)
+
+الخوادم الوهمية في scripts/benchmarks (Odoo و PostgREST) تُستخدم كـ fixtures
+حتى تمر الاختبارات عبر العملاء الحقيقيين (OdooClient و supabase-py).
+"""
+
+import os
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.join(SCRIPTS_DIR, 'benchmarks')
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+FAKE_SUPABASE_KEY = 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.test'
+
+
+@pytest.fixture
+def postgrest():
+    """PostgREST وهمي فارغ (postgrest.tables للقراءة والتعبئة المباشرة)"""
+    from fake_postgrest import FakePostgrest
+    server = FakePostgrest().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def supabase(postgrest):
+    """عميل supabase-py حقيقي موجّه إلى PostgREST الوهمي"""
+    from supabase import create_client
+    return create_client(postgrest.url, FAKE_SUPABASE_KEY)
+
+
+@pytest.fixture
+def fake_odoo():
+    """خادم Odoo وهمي ببيانات فارغة (fake_odoo.dataset قابلة للتعديل أثناء الاختبار)"""
+    from fake_odoo import FakeOdooServer, make_dataset
+    server = FakeOdooServer(make_dataset(orders=0, partners=0, products=0, quants=0, purchases=0)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def odoo(fake_odoo):
+    from odoo_client import OdooClient
+    return OdooClient(fake_odoo.url, 'db', 'admin', 'secret', session_cache=None)
+
+
+@pytest.fixture
+def sync(tmp_path, monkeypatch):
+    """وحدة sync_aumet_to_supabase بملفات حالة مؤقتة ومتحكمات دفعات جديدة"""
+    import sync_aumet_to_supabase as sync
+    monkeypatch.setattr(sync, 'SYNC_STATE_FILE', str(tmp_path / 'sync_state.json'))
+    monkeypatch.setattr(sync, 'SYNC_CHECKPOINT_FILE', str(tmp_path / 'sync_checkpoint.json'))
+    monkeypatch.setattr(sync, '_batch_sizes', {})
+    return sync
@@ -0,0 +1,85 @@
+"""حجم الدفعة المتكيف: التكبير والتصغير والسقف بعد أخطاء الحمل الزائد"""
+
+import socket
+import xmlrpc.client
+
+import sync_aumet_to_supabase as sync
+
+
+class HttpError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+def test_grows_while_full_batches_are_fast():
+    batch = sync.AdaptiveBatchSize('t', 100, maximum=1000, target_seconds=2)
+    batch.record(100, 0.5)
+    assert batch.size == 150
+    batch.record(150, 0.5)
+    assert batch.size == 225
+
+
+def test_does_not_grow_on_partial_batch():
+    batch = sync.AdaptiveBatchSize('t', 100, target_seconds=2)
+    batch.record(40, 0.1)
+    assert batch.size == 100
+
+
+def test_shrinks_in_proportion_to_slow_response():
+    batch = sync.AdaptiveBatchSize('t', 1000, minimum=50, target_seconds=2)
+    batch.record(1000, 8)
+    assert batch.size == 250
+    batch.record(250, 100)
+    assert batch.size == 50  # لا ينزل تحت الحد الأدنى
+
+
+def test_payload_limit_caps_size():
+    batch = sync.AdaptiveBatchSize('t', 100, maximum=10000, target_seconds=2,
+                                   max_payload_bytes=10000)
+    batch.record(100, 0.1, payload_bytes=5000)  # 50 بايت للصف
+    assert batch.size == 150
+    batch.record(150, 0.1, payload_bytes=150 * 200)  # 200 بايت للصف
+    assert batch.size == 50
+
+
+def test_overload_halves_size_and_lowers_ceiling():
+    batch = sync.AdaptiveBatchSize('t', 1000, minimum=50, maximum=5000, target_seconds=2)
+    assert batch.shrink(socket.timeout())
+    assert (batch.size, batch.ceiling, batch.shrinks) == (500, 800, 1)
+    # النمو بعدها لا يتجاوز 80% من الحجم الذي فشل
+    for _ in range(5):
+        batch.record(batch.size, 0.1)
+    assert batch.size == 800
+
+
+def test_shrink_recognises_overload_errors_only():
+    batch = sync.AdaptiveBatchSize('t', 1000, minimum=50)
+    assert batch.shrink(HttpError('57014'))
+    assert batch.shrink(xmlrpc.client.ProtocolError('odoo', 504, 'Gateway Timeout', {}))
+    assert not batch.shrink(HttpError('23505'))
+    assert not batch.shrink(ValueError('bad data'))
+    assert batch.size == 250
+
+
+def test_shrink_refuses_below_minimum():
+    batch = sync.AdaptiveBatchSize('t', 60, minimum=50)
+    assert batch.shrink(TimeoutError())
+    assert batch.size == 50
+    assert not batch.shrink(TimeoutError())
+
+
+def test_write_adaptive_retries_overloaded_batch_smaller(monkeypatch):
+    monkeypatch.setattr(sync, '_batch_sizes', {})
+    monkeypatch.setattr(sync, 'WRITE_BATCH_SIZE', 100)
+    sent = []
+    
+    def send(batch):
+        if len(batch) > 50:
+            raise HttpError('413')
+        sent.append([row['id'] for row in batch])
+    
+    rows = [{'id': i} for i in range(120)]
+    sync._write_adaptive('t', rows, send)
+    assert [row_id for batch in sent for row_id in batch] == list(range(120))
+    assert max(len(batch) for batch in sent) <= 50
@@ -0,0 +1,136 @@
+"""الاستئناف من نقطة حفظ ورفض استبدال الجدول ببيانات staging فارغة"""
+
+import threading
+
+import pytest
+
+
+class OdooDropped(ConnectionError):
+    pass
+
+
+def drop_after(sync, monkeypatch, pages):
+    """stream_pages ينقطع بعد عدد من الصفحات (مثل انقطاع الاتصال بـ Odoo)"""
+    original = sync.stream_pages
+    
+    def stream_pages(*args, **kwargs):
+        for number, page in enumerate(original(*args, **kwargs)):
+            if number == pages:
+                raise OdooDropped('connection reset')
+            yield page
+    
+    monkeypatch.setattr(sync, 'stream_pages', stream_pages)
+    
+    def restore():
+        # الصفحة التي كان thread الجلب الخلفي يطلبها عند الانقطاع لا تُحسب على التشغيل التالي
+        for thread in threading.enumerate():
+            if thread.name == 'odoo-prefetch':
+                thread.join(timeout=5)
+        monkeypatch.setattr(sync, 'stream_pages', original)
+    return restore
+
+
+def fixed_page_size(sync, model, size):
+    """صفحات Odoo بحجم ثابت (المتحكم التكيفي لا ينزل عادة تحت 50)"""
+    sync._batch_sizes[f'odoo:{model}'] = sync.AdaptiveBatchSize(f'odoo:{model}', size, minimum=size, maximum=size)
+
+
+def partner(partner_id):
+    return {'id': partner_id, 'name': f'Partner {partner_id}', 'email': None, 'phone': None,
+            'mobile': None, 'city': 'Riyadh', 'country_id': [1, 'Saudi Arabia'], 'customer_rank': 1}
+
+
+@pytest.fixture
+def customers_spec(sync):
+    return next(spec for spec in sync.MODEL_SYNCS if spec.name == 'customers')
+
+
+@pytest.mark.parametrize('write_mode', ['upsert', 'swap'])
+def test_interrupted_model_sync_resumes_after_last_written_page(
+        sync, odoo, fake_odoo, supabase, postgrest, monkeypatch, customers_spec, write_mode):
+    fixed_page_size(sync, 'res.partner', 10)
+    fake_odoo.dataset['res.partner'] += [partner(i) for i in range(1, 51)]
+    postgrest.tables['aumet_customers'] = [{'aumet_id': 999, 'name': 'old'}]
+    
+    restore = drop_after(sync, monkeypatch, 2)
+    with pytest.raises(OdooDropped):
+        sync.sync_model(odoo, supabase, customers_spec, write_mode)
+    checkpoint = sync.load_state(sync.SYNC_CHECKPOINT_FILE)['customers']
+    assert checkpoint['last_id'] == 20
+    
+    restore()
+    fake_odoo.records_served.clear()
+    sync.sync_model(odoo, supabase, customers_spec, write_mode)
+    
+    assert fake_odoo.records_served['res.partner'] == 30
+    stored = {row['aumet_id'] for row in postgrest.tables['aumet_customers']}
+    # upsert المستأنف يؤجل حذف المفقود إلى التشغيل الكامل التالي
+    assert stored == set(range(1, 51)) | ({999} if write_mode == 'upsert' else set())
+    assert 'customers' not in sync.load_state(sync.SYNC_CHECKPOINT_FILE)
+
+
+def test_checkpoint_is_cleared_before_swap(sync, supabase, postgrest):
+    seen = []
+    
+    def before_swap():
+        seen.append(postgrest.calls['rpc/swap_sync_table'])
+    
+    sync.load_batches(supabase, 'aumet_products', [[{'aumet_id': 1}]], 'aumet_id', 'swap',
+                      before_swap=before_swap)
+    assert seen == [0]
+    assert postgrest.calls['rpc/swap_sync_table'] == 1
+
+
+def test_fresh_swap_without_rows_is_refused(sync, supabase, postgrest, caplog):
+    postgrest.tables['aumet_products'] = [{'aumet_id': 1}]
+    cleared = []
+    assert sync.load_batches(supabase, 'aumet_products', [[]], 'aumet_id', 'swap',
+                             before_swap=lambda: cleared.append(True)) == 0
+    assert postgrest.tables['aumet_products'] == [{'aumet_id': 1}]
+    assert postgrest.calls['rpc/swap_sync_table'] == 0
+    assert cleared == []
+    assert any(record.levelname == 'ERROR' for record in caplog.records)
+
+
+def test_resumed_swap_onto_empty_staging_is_refused(sync, supabase, postgrest):
+    # تشغيل سابق نفّذ swap_sync_table وضاعت استجابته: staging فارغ الآن
+    postgrest.tables['aumet_products'] = [{'aumet_id': 1}, {'aumet_id': 2}]
+    postgrest.tables['aumet_products_staging'] = []
+    assert sync.load_batches(supabase, 'aumet_products', [[]], 'aumet_id', 'swap', resumed=True) == 0
+    assert len(postgrest.tables['aumet_products']) == 2
+    assert postgrest.calls['rpc/swap_sync_table'] == 0
+
+
+def test_resumed_swap_with_filled_staging_swaps(sync, supabase, postgrest):
+    # الانقطاع بعد كتابة آخر صفحة: لا صفوف جديدة لكن staging ممتلئ
+    postgrest.tables['aumet_products'] = [{'aumet_id': 1}]
+    postgrest.tables['aumet_products_staging'] = [{'aumet_id': 2}, {'aumet_id': 3}]
+    sync.load_batches(supabase, 'aumet_products', [[]], 'aumet_id', 'swap', resumed=True)
+    assert [row['aumet_id'] for row in postgrest.tables['aumet_products']] == [2, 3]
+
+
+def test_resumed_sales_run_keeps_original_start_as_watermark_cap(
+        sync, odoo, fake_odoo, supabase, postgrest, monkeypatch):
+    fixed_page_size(sync, 'pos.order', 2)
+    monkeypatch.setattr(sync, 'SYNC_WATERMARK_MARGIN_SECONDS', 0)
+    orders = fake_odoo.dataset['pos.order']
+    for order_id in range(1, 7):
+        stamp = f'2024-01-01 0{order_id}:00:00'
+        orders.append({'id': order_id, 'name': f'POS/{order_id}', 'partner_id': False, 'date_order': stamp,
+                       'amount_total': 10.0, 'state': 'paid', 'write_date': stamp})
+    
+    restore = drop_after(sync, monkeypatch, 1)
+    with pytest.raises(OdooDropped):
+        sync.sync_sales_orders(odoo, supabase)
+    restore()
+    
+    # التشغيل الأول بدأ في 2024-06-01، وطلب لم يُجلب بعد عُدّل بعده
+    state = sync.load_state(sync.SYNC_CHECKPOINT_FILE)
+    state['sales_orders']['context']['progress']['started_at'] = '2024-06-01 00:00:00'
+    sync.save_state(state, sync.SYNC_CHECKPOINT_FILE)
+    orders[5] = {**orders[5], 'write_date': '2025-01-01 00:00:00'}
+    
+    sync.sync_sales_orders(odoo, supabase)
+    
+    # ما عُدّل بعد بدء التشغيل الأول يُعاد جلبه في التشغيل التالي
+    assert sync.load_state()['sales_orders'] == {'write_date': '2024-06-01 00:00:00', 'id': 0}
@@ -0,0 +1,59 @@
+"""خيارات سطر الأوامر: --entities و --since/--until و --dry-run"""
+
+import os
+
+import pytest
+
+import sync_aumet_to_supabase as sync
+
+
+def test_entities_expand_groups_and_drop_unselected_dependencies():
+    args = sync.parse_args(['--entities', 'sales,inventory'])
+    assert args.entities == {'sales_orders', 'sales_aggregates', 'sales_rollups', 'inventory'}
+    
+    stages = sync.build_stages(None, None, sync.parse_args(['--entities', 'sales_aggregates']))
+    assert [(stage.name, stage.depends_on) for stage in stages] == [('sales_aggregates', ())]
+
+
+def test_all_entities_by_default():
+    args = sync.parse_args([])
+    assert args.entities == set(sync.entity_names())
+    assert args.window is None
+
+
+def test_window_defaults_until_to_today(monkeypatch):
+    monkeypatch.setattr(sync.sales_aggregates, 'today', lambda: '2024-03-10')
+    assert sync.parse_args(['--since', '2024-03-01']).window == ('2024-03-01', '2024-03-10')
+
+
+@pytest.mark.parametrize('argv', [
+    ['--entities', 'orders'],
+    ['--since', '2024-02-30'],
+    ['--until', '2024-03-01'],
+    ['--since', '2024-03-02', '--until', '2024-03-01'],
+    ['--since', '2024-03-01', '--full'],
+    ['--since', '2024-03-01', '--summary'],
+    ['--since', '2024-03-01', '--write-mode', 'swap'],
+    ['--dry-run', '--summary'],
+])
+def test_invalid_combinations_are_rejected(argv):
+    with pytest.raises(SystemExit):
+        sync.parse_args(argv)
+
+
+def test_window_days_are_inclusive():
+    assert sync.sales_aggregates.window_days('2024-02-28', '2024-03-01') == ['2024-02-28', '2024-02-29', '2024-03-01']
+
+
+def test_dry_run_reads_odoo_without_writing_state(sync, odoo, fake_odoo):
+    fake_odoo.dataset['pos.order'].append({
+        'id': 1, 'name': 'POS/000001', 'partner_id': False, 'date_order': '2024-01-01 10:00:00',
+        'amount_total': 10.0, 'state': 'paid', 'write_date': '2024-01-01 10:00:00',
+    })
+    
+    results = sync.run_stages(sync.build_stages(odoo, None, sync.parse_args(['--dry-run'])), 2)
+    
+    assert {result['status'] for result in results.values()} == {'ok'}
+    assert fake_odoo.calls[('pos.order', 'search_count')] >= 1
+    assert not os.path.exists(sync.SYNC_STATE_FILE)
+    assert not os.path.exists(sync.SYNC_CHECKPOINT_FILE)
@@ -0,0 +1,42 @@
+"""دفعات الأعمدة (Columns): تتصرف كتسلسل صفوف في مسارات الكتابة"""
+
+from columnar import Columns, as_rows, floats, many2one
+
+
+RECORDS = [
+    {'id': 1, 'name': 'A', 'partner_id': [5, 'Partner 5'], 'amount_total': 10},
+    {'id': 2, 'name': 'B', 'partner_id': False, 'amount_total': -3.5},
+    {'id': 3, 'name': 'C', 'partner_id': [6, 'Partner 6'], 'amount_total': None},
+]
+
+
+def test_columns_behave_like_rows():
+    batch = Columns.from_records(RECORDS, ['id', 'name'])
+
+    assert len(batch) == 3
+    assert batch[1] == {'id': 2, 'name': 'B'}
+    assert list(batch[1:]) == [{'id': 2, 'name': 'B'}, {'id': 3, 'name': 'C'}]
+    assert as_rows(batch) == [{'id': 1, 'name': 'A'}, {'id': 2, 'name': 'B'}, {'id': 3, 'name': 'C'}]
+    assert batch.keys(('id', 'name')) == [(1, 'A'), (2, 'B'), (3, 'C')]
+
+
+def test_select_and_constant():
+    batch = Columns.from_records(RECORDS, ['id', 'partner_id', 'amount_total'])
+    amounts = floats(batch['amount_total'])
+    batch['partner_id'] = many2one(batch['partner_id'], 0)
+
+    assert batch.select([True] * 3) is batch
+    kept = batch.select([amount >= 0 for amount in amounts])
+    kept.constant('synced_at', 'now')
+
+    assert amounts == [10.0, -3.5, 0.0]
+    assert kept.rows() == [
+        {'id': 1, 'partner_id': 5, 'amount_total': 10, 'synced_at': 'now'},
+        {'id': 3, 'partner_id': 6, 'amount_total': None, 'synced_at': 'now'},
+    ]
+
+
+def test_empty_columns():
+    batch = Columns.from_records([], ['id'])
+    assert len(batch) == 0
+    assert as_rows(batch) == []
@@ -0,0 +1,102 @@
+"""تصدير الجداول إلى ملفات مقسمة حسب اليوم: الاستبدال الكامل والدمج"""
+
+import os
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+import file_export  # noqa: E402
+
+
+def order(order_id, date_order, amount=100.0):
+    return {'aumet_id': order_id, 'name': f'POS/{order_id:06d}', 'partner_id': None,
+            'date_order': date_order, 'amount_total': amount, 'state': 'paid'}
+
+
+def partitions(export, table):
+    """{القسم: [(المفتاح، المبلغ)]} من الملفات المكتوبة"""
+    return {
+        value: sorted(zip(*(export.read(path).column(name).to_pylist() for name in ('aumet_id', 'amount_total'))))
+        for value, path in sorted(export._existing_partitions(table).items())
+    }
+
+
+@pytest.fixture(params=['parquet', 'arrow'])
+def export(tmp_path, request):
+    return file_export.FileExport(str(tmp_path), request.param)
+
+
+def test_replace_writes_one_file_per_local_day(export):
+    rows = export.write('aumet_sales_orders', [
+        [order(1, '2024-01-01 10:00:00'), order(2, '2024-01-01 22:00:00')],
+        [order(3, '2024-01-02 08:00:00', 30.0), order(4, False)],
+    ])
+
+    assert rows == 4
+    # 22:00 UTC = اليوم التالي بتوقيت الرياض
+    assert partitions(export, 'aumet_sales_orders') == {
+        '2024-01-01': [(1, 100.0)],
+        '2024-01-02': [(2, 100.0), (3, 30.0)],
+        file_export.NULL_PARTITION: [(4, 100.0)],
+    }
+
+    export.write('aumet_sales_orders', [[order(5, '2024-02-01 10:00:00')]])
+    assert partitions(export, 'aumet_sales_orders') == {'2024-02-01': [(5, 100.0)]}
+
+
+def test_empty_replace_keeps_existing_files(export):
+    export.write('aumet_sales_orders', [[order(1, '2024-01-01 10:00:00')]])
+    export.write('aumet_sales_orders', [[]])
+    assert partitions(export, 'aumet_sales_orders') == {'2024-01-01': [(1, 100.0)]}
+
+
+def test_merge_moves_changed_rows_and_applies_deletes(export):
+    export.write('aumet_sales_orders', [[
+        order(1, '2024-01-01 10:00:00'), order(2, '2024-01-01 11:00:00'), order(3, '2024-01-02 10:00:00'),
+    ]])
+
+    # الطلب 1 ينتقل إلى يوم جديد، والطلب 3 أصبح مرتجعاً فيُحذف ويفرغ قسمه
+    export.write('aumet_sales_orders', [[order(1, '2024-01-05 10:00:00', 15.0)]], 'merge', deletes=[3])
+
+    assert partitions(export, 'aumet_sales_orders') == {
+        '2024-01-01': [(2, 100.0)],
+        '2024-01-05': [(1, 15.0)],
+    }
+    assert not os.path.exists(os.path.join(export.root, 'aumet_sales_orders', 'day=2024-01-02'))
+
+
+def test_merge_without_previous_export_writes_nothing(export):
+    export.write('aumet_sales_orders', [[order(1, '2024-01-01 10:00:00')]], 'merge')
+    assert partitions(export, 'aumet_sales_orders') == {}
+
+
+def test_snapshot_tables_replace_only_todays_partition(export, monkeypatch):
+    product = lambda aumet_id, price: {'aumet_id': aumet_id, 'name': 'P', 'default_code': None, 'list_price': price}
+    monkeypatch.setattr(file_export.sales_aggregates, 'today', lambda: '2024-03-01')
+    export.write('aumet_products', [[product(1, 5.0)]])
+    monkeypatch.setattr(file_export.sales_aggregates, 'today', lambda: '2024-03-02')
+    export.write('aumet_products', [[product(1, 6.0), product(2, 7.0)]])
+    export.write('aumet_products', [[product(1, 8.0)]])
+
+    assert {
+        value: sorted(export.read(path).column('list_price').to_pylist())
+        for value, path in export._existing_partitions('aumet_products').items()
+    } == {'2024-03-01': [5.0], '2024-03-02': [8.0]}
+
+
+def test_sales_orders_sync_tees_into_export(sync, odoo, fake_odoo, supabase, tmp_path):
+    export = file_export.FileExport(str(tmp_path / 'exports'))
+    odoo_order = lambda order_id, write_date, amount=100.0: {
+        'id': order_id, 'name': f'POS/{order_id:06d}', 'partner_id': False, 'date_order': write_date,
+        'amount_total': amount, 'state': 'paid', 'write_date': write_date,
+    }
+    orders = fake_odoo.dataset['pos.order']
+    orders += [odoo_order(1, '2024-01-01 10:00:00'), odoo_order(2, '2024-01-02 10:00:00')]
+    sync.sync_sales_orders(odoo, supabase, export=export)
+
+    orders[1] = odoo_order(2, '2024-01-03 10:00:00', -40.0)
+    orders.append(odoo_order(3, '2024-01-03 11:00:00', 25.0))
+    sync.sync_sales_orders(odoo, supabase, export=export)
+
+    assert partitions(export, 'aumet_sales_orders') == {'2024-01-01': [(1, 100.0)], '2024-01-03': [(3, 25.0)]}
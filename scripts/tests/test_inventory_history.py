@@ -0,0 +1,57 @@
+"""سجل تغيرات المخزون (aumet_inventory_history) أثناء مزامنة aumet_inventory"""
+
+from datetime import datetime, timedelta
+
+
+def quant(quant_id, product_id, location_id, quantity, reserved=0.0):
+    return {
+        'id': quant_id,
+        'product_id': [product_id, f'Product {product_id}'],
+        'location_id': [location_id, f'WH/Stock/{location_id}'],
+        'quantity': quantity,
+        'reserved_quantity': reserved,
+        'write_date': '2024-01-01 00:00:00',
+    }
+
+
+def inventory_spec(sync):
+    return next(spec for spec in sync.MODEL_SYNCS if spec.name == 'inventory')
+
+
+def history(postgrest):
+    columns = ('product_id', 'location', 'quantity', 'quantity_delta', 'reserved_quantity', 'reserved_quantity_delta')
+    return [tuple(row[c] for c in columns) for row in postgrest.tables.get('aumet_inventory_history', [])]
+
+
+def test_history_records_only_changed_keys(sync, odoo, fake_odoo, supabase, postgrest):
+    quants = fake_odoo.dataset['stock.quant']
+    quants += [quant(1, 1, 1, 5.0, 1.0), quant(2, 1, 1, 3.0), quant(3, 2, 2, 4.0)]
+
+    sync.sync_model(odoo, supabase, inventory_spec(sync))
+    assert history(postgrest) == [
+        (1, 'WH/Stock/1', 8.0, 8.0, 1.0, 1.0),
+        (2, 'WH/Stock/2', 4.0, 4.0, 0.0, 0.0),
+    ]
+
+    # بدون تغير: لا صفوف جديدة
+    sync.sync_model(odoo, supabase, inventory_spec(sync))
+    assert len(history(postgrest)) == 2
+
+    # تغير كمية واختفاء سجل (الكمية 0 خارج domain المزامنة)
+    quants[0] = quant(1, 1, 1, 7.0, 1.0)
+    quants[2] = quant(3, 2, 2, 0.0)
+    sync.sync_model(odoo, supabase, inventory_spec(sync))
+    assert history(postgrest)[2:] == [
+        (1, 'WH/Stock/1', 10.0, 2.0, 1.0, 0.0),
+        (2, 'WH/Stock/2', 0.0, -4.0, 0.0, 0.0),
+    ]
+
+
+def test_changed_at_is_utc(sync, odoo, fake_odoo, supabase, postgrest):
+    fake_odoo.dataset['stock.quant'].append(quant(1, 1, 1, 5.0))
+
+    sync.sync_model(odoo, supabase, inventory_spec(sync))
+
+    changed_at = datetime.fromisoformat(postgrest.tables['aumet_inventory_history'][0]['changed_at'])
+    assert changed_at.utcoffset() == timedelta(0)
+    assert postgrest.tables['aumet_inventory'][0]['synced_at'] == postgrest.tables['aumet_inventory_history'][0]['changed_at']
@@ -0,0 +1,101 @@
+"""كتابة اللقطات إلى Supabase: وضعا upsert و swap واللقطة المحلية"""
+
+import pytest
+
+from snapshot_store import SnapshotStore
+
+
+def rows(*items):
+    return [{'aumet_id': aumet_id, 'name': name} for aumet_id, name in items]
+
+
+def table(postgrest, name):
+    return sorted(({k: row[k] for k in ('aumet_id', 'name')} for row in postgrest.tables.get(name, [])),
+                  key=lambda row: row['aumet_id'])
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshot.sqlite'))
+    yield store
+    store.close()
+
+
+def test_upsert_updates_inserts_and_deletes_vanished_rows(sync, supabase, postgrest):
+    postgrest.tables['aumet_products'] = rows((1, 'a'), (2, 'b'), (3, 'c'))
+    batches = [rows((2, 'b2'), (3, 'c')), rows((4, 'd'))]
+    
+    total = sync.load_batches(supabase, 'aumet_products', iter(batches), 'aumet_id', 'upsert')
+    
+    assert total == 3
+    assert table(postgrest, 'aumet_products') == rows((2, 'b2'), (3, 'c'), (4, 'd'))
+
+
+def test_upsert_with_composite_key(sync, supabase, postgrest):
+    postgrest.tables['aumet_inventory'] = [
+        {'product_id': 1, 'location': 'A', 'quantity': 1},
+        {'product_id': 1, 'location': 'B', 'quantity': 2},
+        {'product_id': 2, 'location': 'A', 'quantity': 3},
+    ]
+    batch = [{'product_id': 1, 'location': 'A', 'quantity': 5}, {'product_id': 2, 'location': 'B', 'quantity': 1}]
+    sync.load_batches(supabase, 'aumet_inventory', [batch], sync.INVENTORY_KEY, 'upsert')
+    stored = sorted((row['product_id'], row['location'], row['quantity']) for row in postgrest.tables['aumet_inventory'])
+    assert stored == [(1, 'A', 5), (2, 'B', 1)]
+
+
+def test_swap_replaces_table_through_staging(sync, supabase, postgrest):
+    postgrest.tables['aumet_products'] = rows((1, 'a'), (2, 'b'))
+    batches = [rows((2, 'b2')), rows((3, 'c'))]
+    
+    total = sync.load_batches(supabase, 'aumet_products', iter(batches), 'aumet_id', 'swap')
+    
+    assert total == 2
+    assert table(postgrest, 'aumet_products') == rows((2, 'b2'), (3, 'c'))
+    assert postgrest.tables['aumet_products_staging'] == []
+    assert postgrest.calls['rpc/prepare_sync_staging'] == 1
+    assert postgrest.calls['rpc/swap_sync_table'] == 1
+    # الجدول الأصلي لا يُكتب فيه إلا عبر swap_sync_table
+    assert postgrest.rows_written['aumet_products'] == 0
+
+
+def test_partial_upsert_keeps_rows_outside_batches(sync, supabase, postgrest):
+    postgrest.tables['aumet_products'] = rows((1, 'a'), (2, 'b'), (3, 'c'))
+    
+    total = sync.load_batches(supabase, 'aumet_products', iter([rows((2, 'b2'), (4, 'd'))]), 'aumet_id', partial=True)
+    
+    assert total == 2
+    assert table(postgrest, 'aumet_products') == rows((1, 'a'), (2, 'b2'), (3, 'c'), (4, 'd'))
+
+
+def test_partial_swap_is_refused(sync, supabase, postgrest):
+    with pytest.raises(ValueError):
+        sync.load_batches(supabase, 'aumet_products', iter([rows((1, 'a'))]), 'aumet_id', 'swap', partial=True)
+    assert postgrest.calls['rpc/prepare_sync_staging'] == 0
+
+
+@pytest.mark.parametrize('write_mode', ['upsert', 'swap'])
+def test_empty_snapshot_leaves_table_untouched(sync, supabase, postgrest, write_mode):
+    postgrest.tables['aumet_products'] = rows((1, 'a'))
+    assert sync.load_batches(supabase, 'aumet_products', iter([[], []]), 'aumet_id', write_mode) == 0
+    assert table(postgrest, 'aumet_products') == rows((1, 'a'))
+    assert postgrest.calls['rpc/swap_sync_table'] == 0
+
+
+def test_snapshot_sends_only_changed_rows(sync, supabase, postgrest, snapshot):
+    first = rows((1, 'a'), (2, 'b'), (3, 'c'))
+    sync.load_batches(supabase, 'aumet_products', [first], 'aumet_id', 'upsert', snapshot=snapshot)
+    assert postgrest.rows_written['aumet_products'] == 3
+    
+    second = rows((1, 'a'), (2, 'b2'), (4, 'd'))
+    total = sync.load_batches(supabase, 'aumet_products', [second], 'aumet_id', 'upsert', snapshot=snapshot)
+    
+    assert total == 3
+    assert postgrest.rows_written['aumet_products'] == 3 + 2
+    assert table(postgrest, 'aumet_products') == second
+    assert set(snapshot.load('aumet_products')) == {(1,), (2,), (4,)}
+
+
+def test_snapshot_after_swap_matches_written_rows(sync, supabase, postgrest, snapshot):
+    snapshot.apply('aumet_products', {(9,): 'stale'})
+    sync.load_batches(supabase, 'aumet_products', [rows((1, 'a'))], 'aumet_id', 'swap', snapshot=snapshot)
+    assert set(snapshot.load('aumet_products')) == {(1,)}
@@ -0,0 +1,117 @@
+"""عميل Odoo عبر XML-RPC و JSON-RPC: تخزين uid بين التشغيلات وإعادة المصادقة عند رفضه"""
+
+import json
+import threading
+import xmlrpc.client
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
+import pytest
+
+from odoo_client import OdooAuthError, OdooClient
+
+
+class OdooRequestHandler(SimpleXMLRPCRequestHandler):
+    """يخدم XML-RPC على /xmlrpc/2/* و JSON-RPC على /jsonrpc بنفس الدوال"""
+
+    rpc_paths = ('/xmlrpc/2/common', '/xmlrpc/2/object')
+
+    def do_POST(self):
+        if self.path != '/jsonrpc':
+            return super().do_POST()
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        params = request['params']
+        try:
+            reply = {'result': self.server.funcs[params['method']](*params['args'])}
+        except xmlrpc.client.Fault as e:
+            name, _, message = e.faultString.partition(': ')
+            reply = {'error': {'message': 'Odoo Server Error', 'data': {'name': name, 'message': message}}}
+        body = json.dumps({'jsonrpc': '2.0', 'id': request['id'], **reply}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class OdooStub:
+    """خادم Odoo محلي يحاكي common.authenticate و object.execute_kw"""
+
+    def __init__(self, password='secret', uid=7):
+        self.password = password
+        self.uid = uid
+        self.logins = 0
+        self.servers = []
+        self.url = None
+
+    def _authenticate(self, db, username, password, context):
+        self.logins += 1
+        return self.uid if password == self.password else False
+
+    def _execute_kw(self, db, uid, password, model, method, args, kwargs):
+        if uid != self.uid or password != self.password:
+            raise xmlrpc.client.Fault(3, 'odoo.exceptions.AccessDenied: Access Denied')
+        return [{'id': 1, 'name': 'x'}]
+
+    def start(self):
+        server = SimpleXMLRPCServer(('127.0.0.1', 0), requestHandler=OdooRequestHandler,
+                                    logRequests=False, allow_none=True)
+        server.register_function(self._authenticate, 'authenticate')
+        server.register_function(self._execute_kw, 'execute_kw')
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        self.servers.append(server)
+        self.url = f'http://127.0.0.1:{server.server_address[1]}'
+        return self
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+
+@pytest.fixture(params=['xmlrpc', 'jsonrpc'])
+def odoo(request):
+    stub = OdooStub().start()
+    stub.protocol = request.param
+    yield stub
+    stub.stop()
+
+
+def client(odoo, cache, password='secret'):
+    return OdooClient(odoo.url, 'db', 'admin', password,
+                      protocol=odoo.protocol, session_cache=str(cache))
+
+
+def test_uid_is_cached_without_password(odoo, tmp_path):
+    cache = tmp_path / 'session.json'
+    assert client(odoo, cache).authenticate() == (7, False)
+    
+    saved = json.loads(cache.read_text(encoding='utf-8'))
+    assert list(saved.values()) == [{'uid': 7}]
+    assert 'secret' not in cache.read_text(encoding='utf-8')
+    
+    # تشغيل جديد يقرأ uid من الملف دون مصافحة مع الخادم
+    assert client(odoo, cache).authenticate() == (7, True)
+    assert odoo.logins == 1
+
+
+def test_rejected_cached_uid_reauthenticates_once(odoo, tmp_path):
+    cache = tmp_path / 'session.json'
+    client(odoo, cache).authenticate()
+    odoo.uid = 9  # المستخدم أُعيد إنشاؤه أو تغيرت كلمة المرور
+    
+    fresh = client(odoo, cache)
+    assert fresh.execute_kw('res.partner', 'search_read', [[]]) == [{'id': 1, 'name': 'x'}]
+    assert fresh.uid == 9
+    assert odoo.logins == 2
+    assert json.loads(cache.read_text(encoding='utf-8')) == {fresh._cache_key(): {'uid': 9}}
+
+
+def test_no_session_cache_never_touches_disk(odoo, tmp_path):
+    fresh = OdooClient(odoo.url, 'db', 'admin', 'secret', protocol=odoo.protocol, session_cache=None)
+    assert fresh.authenticate() == (7, False)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_wrong_password_raises(odoo, tmp_path):
+    with pytest.raises(OdooAuthError):
+        client(odoo, tmp_path / 'session.json', password='wrong').authenticate()
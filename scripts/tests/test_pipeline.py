@@ -0,0 +1,87 @@
+"""خط الجلب المسبق: حدّ الطابور وانتشار الأخطاء وإيقاف المنتِج"""
+
+import threading
+import time
+
+import pytest
+
+import sync_aumet_to_supabase as sync
+
+
+class TrackedPages:
+    """مولّد صفحات يسجّل عدد السجلات المنتَجة وهل أُغلق"""
+
+    def __init__(self, sizes, error=None):
+        self.sizes = sizes
+        self.error = error
+        self.produced = 0
+        self.closed = threading.Event()
+        self._gen = self._pages()
+
+    def _pages(self):
+        for size in self.sizes:
+            self.produced += size
+            yield [{'id': self.produced - i} for i in range(size)]
+        if self.error is not None:
+            raise self.error
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._gen)
+
+    def close(self):
+        self._gen.close()
+        self.closed.set()
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_producer_stops_at_buffer_limit():
+    pages = TrackedPages([10] * 20)
+    consumer = sync.prefetch(pages, max_buffered=30)
+    
+    # المنتِج يملأ الطابور حتى 30 سجلاً ثم ينتظر المستهلك
+    assert wait_until(lambda: pages.produced >= 30)
+    time.sleep(0.1)
+    assert pages.produced <= 40  # 30 في الطابور + صفحة واحدة تنتظر مكاناً
+    
+    seen = 0
+    for page in consumer:
+        seen += len(page)
+        time.sleep(0.005)
+        assert pages.produced - seen <= 40
+    assert seen == 200
+
+
+def test_oversized_page_is_accepted_when_buffer_is_empty():
+    pages = TrackedPages([5, 50, 5])
+    consumer = sync.prefetch(pages, max_buffered=10)
+    assert [len(page) for page in consumer] == [5, 50, 5]
+
+
+def test_producer_error_reaches_consumer_after_buffered_pages():
+    pages = TrackedPages([3, 3], error=RuntimeError('odoo down'))
+    consumer = sync.prefetch(pages, max_buffered=100)
+    received = []
+    with pytest.raises(RuntimeError, match='odoo down'):
+        for page in consumer:
+            received.append(len(page))
+    assert received == [3, 3]
+
+
+def test_closing_consumer_stops_producer():
+    pages = TrackedPages([10] * 1000)
+    consumer = sync.prefetch(pages, max_buffered=20)
+    next(consumer)
+    consumer.close()
+    assert pages.closed.wait(2.0)
+    assert pages.produced < 1000 * 10
@@ -0,0 +1,68 @@
+"""المطابقة بالـ checksum (reconcile_supabase): تقسيم النطاقات المختلفة فقط والإصلاح"""
+
+import pytest
+
+import reconcile_supabase
+
+
+def order(order_id, amount=100.0, date_order='2024-01-01 10:00:00'):
+    return {
+        'id': order_id, 'name': f'POS/{order_id:06d}', 'partner_id': False, 'date_order': date_order,
+        'amount_total': amount, 'state': 'paid', 'write_date': date_order,
+    }
+
+
+@pytest.fixture
+def spec():
+    return next(spec for spec in reconcile_supabase.reconcile_specs() if spec.name == 'sales_orders')
+
+
+@pytest.fixture
+def synced(sync, odoo, fake_odoo, supabase):
+    """64 طلباً متطابقاً في الطرفين"""
+    fake_odoo.dataset['pos.order'] += [order(order_id) for order_id in range(1, 65)]
+    sync.sync_sales_orders(odoo, supabase)
+    return fake_odoo.dataset['pos.order']
+
+
+def test_matching_entity_opens_only_the_first_level(odoo, supabase, spec, synced):
+    result = reconcile_supabase.reconcile_entity(odoo, supabase, spec, fanout=4, leaf_size=8)
+
+    assert result['status'] == 'ok'
+    assert result['buckets'] == 4
+    assert result['ranges'] == []
+
+
+def test_only_differing_buckets_are_split_down_to_leaves(sync, odoo, supabase, postgrest, spec, synced):
+    # [1, 65) → أربعة نطاقات بطول 16 → نطاقات أوراق بطول 4
+    synced[4] = order(5, 40.0)
+    postgrest.tables['aumet_sales_orders'] = [
+        row for row in postgrest.tables['aumet_sales_orders'] if row['aumet_id'] != 50
+    ]
+
+    result = reconcile_supabase.reconcile_entity(odoo, supabase, spec, fanout=4, leaf_size=4)
+
+    assert result['status'] == 'drift'
+    assert result['ranges'] == [[5, 9], [49, 53]]
+    assert (result['missing'], result['extra'], result['changed']) == (1, 0, 1)
+    # 4 في المستوى الأول + 4 لكل نطاق من النطاقين المختلفين فقط
+    assert result['buckets'] == 12
+    assert sync.load_state().get('sales_aggregates_pending') is None
+
+
+def test_repair_rewrites_differing_rows_and_marks_their_days(sync, odoo, supabase, postgrest, spec, synced):
+    synced[4] = order(5, 40.0, date_order='2024-01-03 10:00:00')
+    postgrest.tables['aumet_sales_orders'].append(
+        {'aumet_id': 100, 'name': 'POS/000100', 'partner_id': None, 'date_order': '2024-01-02 10:00:00',
+         'amount_total': 5.0, 'state': 'paid'}
+    )
+
+    result = reconcile_supabase.reconcile_entity(odoo, supabase, spec, fanout=4, leaf_size=8, repair=True)
+
+    assert result['status'] == 'repaired'
+    assert result['repaired'] == 2
+    stored = {row['aumet_id']: row['amount_total'] for row in postgrest.tables['aumet_sales_orders']}
+    assert 100 not in stored and stored[5] == 40.0
+    # اليوم القديم والجديد للطلب المختلف ويوم الطلب المحذوف
+    assert sync.load_state()['sales_aggregates_pending'] == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert reconcile_supabase.reconcile_entity(odoo, supabase, spec, fanout=4, leaf_size=8)['status'] == 'ok'
@@ -0,0 +1,105 @@
+"""إجماليات المبيعات اليومية والشهرية: الحساب والتحديث التزايدي للأيام المعلقة"""
+
+import sales_aggregates
+
+
+def order(order_id, date_order, amount=100.0, write_date=None):
+    return {
+        'id': order_id,
+        'name': f'POS/{order_id:06d}',
+        'partner_id': False,
+        'date_order': date_order,
+        'amount_total': amount,
+        'state': 'paid',
+        'write_date': write_date or date_order,
+    }
+
+
+def test_local_day_accepts_odoo_and_iso_values():
+    assert sales_aggregates.local_day('2024-01-01 20:59:59') == '2024-01-01'
+    assert sales_aggregates.local_day('2024-01-01 21:00:00') == '2024-01-02'
+    assert sales_aggregates.local_day('2024-01-01T21:00:00+00:00') == '2024-01-02'
+
+
+def test_days_domain_merges_consecutive_days():
+    assert sales_aggregates.day_ranges(['2024-01-03', '2024-01-01', '2024-01-02', '2024-01-05']) == [
+        ('2024-01-01', '2024-01-04'), ('2024-01-05', '2024-01-06'),
+    ]
+    assert sales_aggregates.days_domain(['2024-01-01', '2024-01-02', '2024-01-05'], 'order_id.date_order') == [
+        '|',
+        '&', ['order_id.date_order', '>=', '2023-12-31 21:00:00'], ['order_id.date_order', '<', '2024-01-02 21:00:00'],
+        '&', ['order_id.date_order', '>=', '2024-01-04 21:00:00'], ['order_id.date_order', '<', '2024-01-05 21:00:00'],
+    ]
+
+
+def test_totals_count_returns_separately():
+    totals = sales_aggregates.add_orders({}, [
+        order(1, '2024-01-01 10:00:00', 100.0),
+        order(2, '2024-01-01 11:00:00', 50.0),
+        order(3, '2024-01-01 12:00:00', -30.0),
+        order(4, '2024-02-10 12:00:00', 20.0),
+        order(5, None),
+    ])
+
+    daily = sales_aggregates.daily_rows(totals)
+    monthly = sales_aggregates.monthly_rows(daily)
+
+    assert daily[0] == {
+        'sale_date': '2024-01-01', 'order_count': 2, 'revenue': 150.0, 'avg_basket': 75.0,
+        'return_count': 1, 'return_amount': 30.0, 'net_revenue': 120.0,
+    }
+    assert [row['month'] for row in monthly] == ['2024-01-01', '2024-02-01']
+    assert monthly[1]['net_revenue'] == 20.0
+
+
+def test_day_with_only_returns_has_no_basket():
+    daily = sales_aggregates.daily_rows(sales_aggregates.add_orders({}, [order(1, '2024-01-01 10:00:00', -5.0)]))
+    assert daily[0]['avg_basket'] == 0.0
+    assert daily[0]['net_revenue'] == -5.0
+
+
+def aggregate_rows(postgrest):
+    columns = ('order_count', 'revenue', 'return_count', 'return_amount', 'net_revenue')
+    return {
+        table: sorted((row[key],) + tuple(row[c] for c in columns) for row in postgrest.tables.get(table, []))
+        for table, key in (('aumet_sales_daily', 'sale_date'), ('aumet_sales_monthly', 'month'))
+    }
+
+
+def test_incremental_aggregates_match_full_recompute(sync, odoo, fake_odoo, supabase, postgrest, monkeypatch):
+    orders = fake_odoo.dataset['pos.order']
+    orders += [
+        order(1, '2024-01-01 10:00:00'),
+        order(2, '2024-01-31 10:00:00', 40.0),
+        order(3, '2024-03-01 10:00:00', 10.0),
+    ]
+    sync.sync_sales_orders(odoo, supabase)
+    sync.sync_sales_aggregates(odoo, supabase)
+
+    # الطلب 2 ينتقل إلى فبراير ويصبح الطلب 1 مرتجعاً
+    orders[1] = order(2, '2024-02-02 10:00:00', 40.0, write_date='2024-03-02 00:00:00')
+    orders[0] = order(1, '2024-01-01 10:00:00', -25.0, write_date='2024-03-02 00:00:01')
+    sync.sync_sales_orders(odoo, supabase)
+    assert sync.load_state()['sales_aggregates_pending'] == ['2024-01-01', '2024-01-31', '2024-02-02']
+
+    stream_pages = sync.stream_pages
+    def marking_stream_pages(*args, **kwargs):
+        sync.mark_sales_days(['2024-02-01'])
+        return stream_pages(*args, **kwargs)
+    monkeypatch.setattr(sync, 'stream_pages', marking_stream_pages)
+    fake_odoo.records_served.clear()
+
+    sync.sync_sales_aggregates(odoo, supabase)
+
+    assert sync.load_state()['sales_aggregates_pending'] == ['2024-02-01']
+    assert fake_odoo.records_served['pos.order'] == 2
+    incremental = aggregate_rows(postgrest)
+    assert incremental['aumet_sales_daily'] == [
+        ('2024-01-01', 0, 0.0, 1, 25.0, -25.0),
+        ('2024-02-02', 1, 40.0, 0, 0.0, 40.0),
+        ('2024-03-01', 1, 10.0, 0, 0.0, 10.0),
+    ]
+
+    monkeypatch.setattr(sync, 'stream_pages', stream_pages)
+    sync.sync_sales_aggregates(odoo, supabase, full=True)
+    assert incremental == aggregate_rows(postgrest)
@@ -0,0 +1,135 @@
+"""تجميعات المنتجات والعملاء اليومية: الحساب والتحديث التزايدي للأيام المعلقة"""
+
+import pandas as pd
+
+import sales_rollups
+
+
+def order(order_id, date_order, amount=100.0, partner=None, write_date=None):
+    return {
+        'id': order_id,
+        'name': f'POS/{order_id:06d}',
+        'partner_id': partner or False,
+        'date_order': date_order,
+        'amount_total': amount,
+        'state': 'paid',
+        'write_date': write_date or date_order,
+    }
+
+
+def line(line_id, order_id, product_id, qty, subtotal):
+    return {
+        'id': line_id,
+        'order_id': [order_id, f'POS/{order_id:06d}'],
+        'product_id': [product_id, f'Product {product_id}'],
+        'qty': qty,
+        'price_subtotal_incl': subtotal,
+    }
+
+
+ORDERS = [
+    order(1, '2024-01-01 10:00:00', partner=[5, 'Partner 5']),
+    # 22:00 UTC = اليوم التالي بتوقيت الرياض
+    order(2, '2024-01-01 22:00:00'),
+    order(3, '2024-01-01 11:00:00', amount=-30.0, partner=[5, 'Partner 5']),
+]
+LINES = [
+    line(1, 1, 10, 2, 20.0),
+    line(2, 1, 11, 1, 5.0),
+    line(3, 2, 10, 3, 30.0),
+    line(4, 3, 10, -1, -10.0),
+    line(5, 1, 10, 1, 10.0),
+]
+
+
+def test_daily_rollups_merge_pages_and_drop_returns():
+    headers = sales_rollups.order_headers_frame(ORDERS)
+    # بنود الطلب 1 للمنتج 10 موزعة على صفحتين
+    reduced = [sales_rollups.reduce_lines(LINES[:3]), sales_rollups.reduce_lines(LINES[3:])]
+
+    by_product, by_partner = sales_rollups.daily_rollups(headers, reduced)
+
+    assert [(r['sale_date'], r['product_id'], r['quantity'], r['revenue'], r['order_count']) for r in by_product] == [
+        ('2024-01-01', 10, 3.0, 30.0, 1),
+        ('2024-01-01', 11, 1.0, 5.0, 1),
+        ('2024-01-02', 10, 3.0, 30.0, 1),
+    ]
+    assert [(r['sale_date'], r['partner_id'], r['partner_name'], r['revenue']) for r in by_partner] == [
+        ('2024-01-01', 5, 'Partner 5', 35.0),
+        ('2024-01-02', sales_rollups.NO_PARTNER_ID, 'عميل نقدي', 30.0),
+    ]
+
+
+def test_daily_rollups_without_lines():
+    headers = sales_rollups.order_headers_frame(ORDERS)
+    assert sales_rollups.daily_rollups(headers, []) == ([], [])
+    assert isinstance(headers, pd.DataFrame)
+
+
+def rollup_rows(postgrest, table, key):
+    columns = ('sale_date', key, 'quantity', 'revenue', 'order_count')
+    return sorted(tuple(row[c] for c in columns) for row in postgrest.tables.get(table, []))
+
+
+def test_incremental_rollups_match_full_recompute(sync, odoo, fake_odoo, supabase, postgrest, monkeypatch):
+    # طلب في يوم لا يتغير: بنده لا يُقرأ في التحديث التزايدي
+    fake_odoo.dataset['pos.order'] += [dict(o) for o in ORDERS] + [order(4, '2024-03-01 10:00:00')]
+    fake_odoo.dataset['pos.order.line'] += [dict(l) for l in LINES] + [line(6, 4, 12, 1, 7.0)]
+    sync.sync_sales_orders(odoo, supabase)
+    sync.sync_sales_rollups(odoo, supabase)
+    assert {row[0] for row in rollup_rows(postgrest, 'aumet_sales_daily_products', 'product_id')} == {
+        '2024-01-01', '2024-01-02', '2024-03-01'
+    }
+
+    # الطلب 2 ينتقل من 2024-01-02 إلى 2024-01-05 وتتغير كمية بند في الطلب 1
+    orders, lines = fake_odoo.dataset['pos.order'], fake_odoo.dataset['pos.order.line']
+    orders[1] = order(2, '2024-01-05 10:00:00', write_date='2024-03-02 00:00:00')
+    orders[0] = dict(orders[0], write_date='2024-03-02 00:00:01')
+    lines[1] = line(2, 1, 11, 4, 20.0)
+
+    sync.sync_sales_orders(odoo, supabase)
+    # اليوم القديم للطلب 2 يُقرأ من Supabase قبل تحديثه
+    assert sync.load_state()['sales_rollups_pending'] == ['2024-01-01', '2024-01-02', '2024-01-05']
+
+    # يوم يُسجل أثناء حساب التجميعات يبقى معلقاً للتشغيل التالي
+    stream_pages = sync.stream_pages
+    def marking_stream_pages(*args, **kwargs):
+        sync.mark_sales_days(['2024-02-01'])
+        return stream_pages(*args, **kwargs)
+    monkeypatch.setattr(sync, 'stream_pages', marking_stream_pages)
+    fake_odoo.records_served.clear()
+
+    sync.sync_sales_rollups(odoo, supabase)
+
+    assert sync.load_state()['sales_rollups_pending'] == ['2024-02-01']
+    assert fake_odoo.records_served['pos.order.line'] == len(LINES)
+    incremental = {
+        'aumet_sales_daily_products': rollup_rows(postgrest, 'aumet_sales_daily_products', 'product_id'),
+        'aumet_sales_daily_partners': rollup_rows(postgrest, 'aumet_sales_daily_partners', 'partner_id'),
+    }
+    assert '2024-01-02' not in {row[0] for rows in incremental.values() for row in rows}
+
+    monkeypatch.setattr(sync, 'stream_pages', stream_pages)
+    sync.sync_sales_rollups(odoo, supabase, full=True)
+
+    assert incremental == {
+        'aumet_sales_daily_products': rollup_rows(postgrest, 'aumet_sales_daily_products', 'product_id'),
+        'aumet_sales_daily_partners': rollup_rows(postgrest, 'aumet_sales_daily_partners', 'partner_id'),
+    }
+    assert incremental['aumet_sales_daily_products'] == [
+        ('2024-01-01', 10, 3.0, 30.0, 1),
+        ('2024-01-01', 11, 4.0, 20.0, 1),
+        ('2024-01-05', 10, 3.0, 30.0, 1),
+        ('2024-03-01', 12, 1.0, 7.0, 1),
+    ]
+
+
+def test_incremental_rollups_without_pending_days_read_nothing(sync, odoo, fake_odoo, supabase, postgrest):
+    fake_odoo.dataset['pos.order'] += [dict(o) for o in ORDERS]
+    fake_odoo.dataset['pos.order.line'] += [dict(l) for l in LINES]
+    sync.sync_sales_rollups(odoo, supabase)
+    fake_odoo.calls.clear()
+
+    sync.sync_sales_rollups(odoo, supabase)
+
+    assert fake_odoo.round_trips == 0
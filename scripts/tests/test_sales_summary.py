@@ -0,0 +1,89 @@
+"""وضع --summary: مجاميع read_group تطابق الحساب من السجلات"""
+
+import sales_aggregates
+
+
+def order(order_id, date_order, amount=100.0, state='paid'):
+    return {
+        'id': order_id,
+        'name': f'POS/{order_id:06d}',
+        'partner_id': False,
+        'date_order': date_order,
+        'amount_total': amount,
+        'state': state,
+        'write_date': date_order,
+    }
+
+
+ORDERS = [
+    order(1, '2024-01-01 10:00:00', 100.0),
+    order(2, '2024-01-01 11:00:00', 60.0, state='done'),
+    order(3, '2024-01-01 12:00:00', -20.0),
+    # 21:30 UTC = اليوم التالي بتوقيت الرياض
+    order(4, '2024-01-01 21:30:00', 40.0, state='invoiced'),
+    order(5, '2024-02-03 09:00:00', -15.0, state='done'),
+]
+
+
+def test_state_rows_add_up_to_daily_rows():
+    totals = sales_aggregates.add_orders({}, ORDERS)
+
+    states = sales_aggregates.state_rows(totals)
+    daily = sales_aggregates.daily_rows(totals)
+
+    assert [(r['sale_date'], r['state'], r['order_count'], r['return_count']) for r in states] == [
+        ('2024-01-01', 'done', 1, 0),
+        ('2024-01-01', 'paid', 1, 1),
+        ('2024-01-02', 'invoiced', 1, 0),
+        ('2024-02-03', 'done', 0, 1),
+    ]
+    assert daily[0] == {
+        'sale_date': '2024-01-01', 'order_count': 2, 'revenue': 160.0, 'avg_basket': 80.0,
+        'return_count': 1, 'return_amount': 20.0, 'net_revenue': 140.0,
+    }
+    assert sales_aggregates.totals_days(totals) == {'2024-01-01', '2024-01-02', '2024-02-03'}
+
+
+def summary_tables(postgrest):
+    tables = {}
+    for table, key in (
+        ('aumet_sales_daily', ('sale_date',)),
+        ('aumet_sales_daily_states', ('sale_date', 'state')),
+        ('aumet_sales_monthly', ('month',)),
+    ):
+        tables[table] = sorted(
+            tuple(row[c] for c in key + ('order_count', 'revenue', 'return_count', 'return_amount', 'net_revenue'))
+            for row in postgrest.tables.get(table, [])
+        )
+    return tables
+
+
+def test_summary_matches_full_aggregates(sync, odoo, fake_odoo, supabase, postgrest):
+    fake_odoo.dataset['pos.order'] += ORDERS
+    sync.sync_sales_aggregates(odoo, supabase, full=True)
+    full = summary_tables(postgrest)
+    assert len(full['aumet_sales_daily_states']) == 4
+    postgrest.tables.clear()
+    fake_odoo.calls.clear()
+
+    sync.sync_sales_aggregates(odoo, supabase, summary=True)
+
+    assert summary_tables(postgrest) == full
+    # استدعاء read_group للمبيعات وآخر للمرتجعات (مجموعة لكل يوم وحالة)
+    assert {call: n for call, n in fake_odoo.calls.items() if call[0] == 'pos.order'} == {('pos.order', 'read_group'): 2}
+
+
+def test_incremental_run_keeps_state_rows_in_step(sync, odoo, fake_odoo, supabase, postgrest):
+    orders = fake_odoo.dataset['pos.order']
+    orders += [dict(o) for o in ORDERS]
+    sync.sync_sales_aggregates(odoo, supabase)
+
+    # الطلب 2 يصبح paid: صف done لليوم يختفي
+    orders[1] = order(2, '2024-01-01 11:00:00', 60.0)
+    sync.mark_sales_days(['2024-01-01'])
+    sync.sync_sales_aggregates(odoo, supabase)
+    incremental = summary_tables(postgrest)
+
+    sync.sync_sales_aggregates(odoo, supabase, full=True)
+    assert incremental == summary_tables(postgrest)
+    assert ('2024-01-01', 'done') not in {row[:2] for row in incremental['aumet_sales_daily_states']}
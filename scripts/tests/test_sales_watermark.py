@@ -0,0 +1,62 @@
+"""علامة المياه العليا لمزامنة طلبات المبيعات التزايدية"""
+
+import sync_aumet_to_supabase as sync
+
+
+def test_watermark_is_latest_write_date_then_id():
+    orders = [
+        {'id': 5, 'write_date': '2025-01-01 10:00:00'},
+        {'id': 9, 'write_date': '2025-01-01 10:00:01'},
+        {'id': 3, 'write_date': '2025-01-01 10:00:01'},
+        {'id': 7, 'write_date': '2025-01-01 09:00:00'},
+    ]
+    assert sync._orders_watermark(orders) == {'write_date': '2025-01-01 10:00:01', 'id': 9}
+
+
+def test_watermark_ties_on_write_date_are_broken_by_id():
+    previous = {'write_date': '2025-01-01 10:00:00', 'id': 8}
+    assert sync._orders_watermark([{'id': 4, 'write_date': '2025-01-01 10:00:00'}], previous) == previous
+    assert sync._orders_watermark([{'id': 12, 'write_date': '2025-01-01 10:00:00'}], previous) == {
+        'write_date': '2025-01-01 10:00:00', 'id': 12
+    }
+
+
+def test_watermark_does_not_move_back():
+    previous = {'write_date': '2025-01-02 00:00:00', 'id': 1}
+    assert sync._orders_watermark([{'id': 50, 'write_date': '2025-01-01 00:00:00'}], previous) == previous
+
+
+def test_cap_watermark_at_run_start_minus_margin(monkeypatch):
+    monkeypatch.setattr(sync, 'SYNC_WATERMARK_MARGIN_SECONDS', 300)
+    watermark = {'write_date': '2025-01-01 10:00:00', 'id': 42}
+    # تعديل خلال آخر 5 دقائق قبل البدء أو أثناء التشغيل يُعاد جلبه في التشغيل التالي
+    assert sync._cap_watermark(watermark, '2025-01-01 10:03:00') == {'write_date': '2025-01-01 09:58:00', 'id': 0}
+
+
+def test_cap_watermark_keeps_older_watermark(monkeypatch):
+    monkeypatch.setattr(sync, 'SYNC_WATERMARK_MARGIN_SECONDS', 300)
+    watermark = {'write_date': '2025-01-01 09:00:00', 'id': 42}
+    assert sync._cap_watermark(watermark, '2025-01-01 10:03:00') == watermark
+    assert sync._cap_watermark(None, '2025-01-01 10:03:00') is None
+
+
+def test_orders_domain_resumes_after_watermark_tie():
+    from fake_odoo import matches
+    watermark = {'write_date': '2025-01-01 10:00:00', 'id': 8}
+    domain = sync._sales_orders_domain(watermark)
+    orders = [
+        {'id': 4, 'write_date': '2025-01-01 10:00:00'},
+        {'id': 8, 'write_date': '2025-01-01 10:00:00'},
+        {'id': 9, 'write_date': '2025-01-01 10:00:00'},
+        {'id': 2, 'write_date': '2025-01-01 10:00:01'},
+        {'id': 30, 'write_date': '2025-01-01 09:59:59'},
+    ]
+    assert [order['id'] for order in orders if matches(order, domain)] == [9, 2]
+
+
+def test_orders_domain_window_ignores_watermark():
+    watermark = {'write_date': '2025-01-01 10:00:00', 'id': 8}
+    assert sync._sales_orders_domain(watermark, ('2025-01-01', '2025-01-02')) == [
+        ['date_order', '>=', '2024-12-31 21:00:00'], ['date_order', '<', '2025-01-02 21:00:00'],
+    ]
+    assert sync._sales_orders_domain() == []
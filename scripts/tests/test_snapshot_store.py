@@ -0,0 +1,77 @@
+"""مخزن اللقطات: hash المحتوى وتسجيل ما كُتب وما حُذف لكل كيان"""
+
+import threading
+
+import pytest
+
+from snapshot_store import SnapshotStore, row_hash
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshot.sqlite'))
+    yield store
+    store.close()
+
+
+def test_row_hash_ignores_column_order_and_synced_at():
+    row = {'aumet_id': 1, 'name': 'Panadol', 'price': 2.5, 'synced_at': '2026-01-01T00:00:00'}
+    same = {'price': 2.5, 'synced_at': '2026-02-01T00:00:00', 'name': 'Panadol', 'aumet_id': 1}
+    assert row_hash(row) == row_hash(same)
+    assert row_hash(row) != row_hash({**row, 'price': 3.0})
+    assert row_hash(row) != row_hash({**row, 'name': None})
+
+
+def test_apply_and_load_round_trip_keys(store):
+    store.apply('aumet_inventory', {(5, 'WH/Stock'): 'a', (5, None): 'b'})
+    store.apply('aumet_products', {(1,): 'c'})
+    assert store.load('aumet_inventory') == {(5, 'WH/Stock'): 'a', (5, None): 'b'}
+    assert store.load('aumet_products') == {(1,): 'c'}
+    assert store.load('aumet_customers') == {}
+
+
+def test_diff_between_runs(store):
+    first = [{'aumet_id': i, 'name': f'p{i}'} for i in range(1, 5)]
+    store.apply('aumet_products', {(row['aumet_id'],): row_hash(row) for row in first})
+    
+    second = [
+        {'aumet_id': 1, 'name': 'p1'},         # بدون تغيير
+        {'aumet_id': 2, 'name': 'p2 (new)'},   # معدل
+        {'aumet_id': 4, 'name': 'p4'},         # بدون تغيير
+        {'aumet_id': 7, 'name': 'p7'},         # جديد
+    ]                                          # 3 حُذف
+    previous = store.load('aumet_products')
+    changed = [row for row in second if previous.get((row['aumet_id'],)) != row_hash(row)]
+    vanished = set(previous) - {(row['aumet_id'],) for row in second}
+    assert [row['aumet_id'] for row in changed] == [2, 7]
+    assert vanished == {(3,)}
+    
+    store.apply('aumet_products', {(row['aumet_id'],): row_hash(row) for row in changed}, deletes=vanished)
+    assert store.load('aumet_products') == {(row['aumet_id'],): row_hash(row) for row in second}
+
+
+def test_reset_and_clear(store):
+    store.apply('a', {(1,): 'x'})
+    store.apply('b', {(1,): 'y'})
+    store.reset('a')
+    assert store.load('a') == {} and store.load('b') == {(1,): 'y'}
+    store.clear()
+    assert store.load('b') == {}
+
+
+def test_snapshot_persists_and_is_thread_safe(tmp_path):
+    path = str(tmp_path / 'snapshot.sqlite')
+    store = SnapshotStore(path)
+    threads = [
+        threading.Thread(target=store.apply, args=(f'table{n}', {(i,): str(i) for i in range(200)}))
+        for n in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.close()
+    
+    reopened = SnapshotStore(path)
+    assert all(len(reopened.load(f'table{n}')) == 200 for n in range(4))
+    reopened.close()
@@ -0,0 +1,74 @@
+"""جدولة مراحل المزامنة: الاعتماديات والتوازي وانتشار الفشل"""
+
+import logging
+import threading
+
+import pytest
+
+import sync_aumet_to_supabase as sync
+
+
+def make_stage(name, calls, depends_on=(), error=None, before=None):
+    def run(*_):
+        if before is not None:
+            before()
+        calls.append(name)
+        if error is not None:
+            raise error
+    return sync.SyncStage(name, run, tuple(depends_on))
+
+
+def test_stage_starts_after_its_dependencies():
+    calls = []
+    stages = [
+        make_stage('customers', calls, depends_on=['sales_orders']),
+        make_stage('products', calls, depends_on=['customers', 'sales_orders']),
+        make_stage('sales_orders', calls),
+    ]
+    results = sync.run_stages(stages)
+    assert calls == ['sales_orders', 'customers', 'products']
+    assert [name for name in results] == ['customers', 'products', 'sales_orders']
+    assert {result['status'] for result in results.values()} == {'ok'}
+
+
+def test_independent_stages_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    calls = []
+    stages = [make_stage(name, calls, before=barrier.wait) for name in ('customers', 'products')]
+    results = sync.run_stages(stages)
+    assert {result['status'] for result in results.values()} == {'ok'}
+
+
+def test_failure_skips_dependents_only(caplog):
+    calls = []
+    stages = [
+        make_stage('sales_orders', calls, error=RuntimeError('odoo down')),
+        make_stage('customers', calls, depends_on=['sales_orders']),
+        make_stage('products', calls, depends_on=['customers']),
+        make_stage('inventory', calls),
+    ]
+    with caplog.at_level(logging.ERROR):
+        results = sync.run_stages(stages)
+    assert {name: result['status'] for name, result in results.items()} == {
+        'sales_orders': 'failed', 'customers': 'skipped', 'products': 'skipped', 'inventory': 'ok'
+    }
+    assert sorted(calls) == ['inventory', 'sales_orders']
+    # الفشل يُسجل مرة واحدة ومعه traceback
+    failures = [record for record in caplog.records if record.levelno == logging.ERROR]
+    assert len(failures) == 1 and failures[0].exc_info[1].args == ('odoo down',)
+
+
+def test_dependency_cycle_is_rejected():
+    calls = []
+    stages = [
+        make_stage('customers', calls, depends_on=['products']),
+        make_stage('products', calls, depends_on=['customers']),
+    ]
+    with pytest.raises(ValueError):
+        sync.run_stages(stages)
+    assert calls == []
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        sync.run_stages([make_stage('customers', [], depends_on=['suppliers'])])
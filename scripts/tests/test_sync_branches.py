@@ -0,0 +1,74 @@
+"""ملف إعدادات الفروع (sync_branches): التحقق وبيئة عملية كل فرع"""
+
+import json
+
+import pytest
+
+import sync_branches
+
+
+def branch(name, schema, **settings):
+    return {
+        'name': name,
+        'odoo_url': f'https://{name}.example.com',
+        'odoo_db': name,
+        'odoo_username': 'sync@example.com',
+        'odoo_password_env': 'ODOO_PASSWORD_TEST',
+        'supabase_schema': schema,
+        **settings,
+    }
+
+
+def write_config(tmp_path, branches, defaults=None):
+    path = tmp_path / 'branches.json'
+    path.write_text(json.dumps({'defaults': defaults or {}, 'branches': branches}), encoding='utf-8')
+    return str(path)
+
+
+def test_defaults_are_merged_into_each_branch(tmp_path):
+    path = write_config(
+        tmp_path,
+        [branch('main', 'public'), branch('north', 'branch_north', env={'ODOO_WORKERS': '4'})],
+        defaults={'supabase_url': 'https://project.supabase.co', 'env': {'ODOO_WORKERS': '2', 'SALES_TIMEZONE': 'UTC'}},
+    )
+
+    main, north = sync_branches.load_branches(path)
+
+    assert main['supabase_url'] == north['supabase_url'] == 'https://project.supabase.co'
+    assert main['env'] == {'ODOO_WORKERS': '2', 'SALES_TIMEZONE': 'UTC'}
+    assert north['env'] == {'ODOO_WORKERS': '4', 'SALES_TIMEZONE': 'UTC'}
+
+
+@pytest.mark.parametrize('branches, message', [
+    ([branch('main branch', 'public')], 'اسم فرع غير صالح'),
+    ([branch('main', 'public'), branch('main', 'branch_2')], 'اسم الفرع مكرر'),
+    ([branch('main', 'public', odoo_db='')], 'odoo_db'),
+    ([branch('main', None)], 'supabase_schema'),
+    ([branch('main', 'public'), branch('north', 'public')], 'schema'),
+    ([], 'لا توجد فروع'),
+])
+def test_invalid_configs_are_rejected(tmp_path, branches, message):
+    with pytest.raises(ValueError, match=message):
+        sync_branches.load_branches(write_config(tmp_path, branches))
+
+
+def test_branch_environment_does_not_leak_runner_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_branches, 'SYNC_BRANCHES_DIR', str(tmp_path))
+    monkeypatch.setenv('ODOO_UID', '99')
+    monkeypatch.setenv('SUPABASE_URL', 'https://runner.supabase.co')
+    monkeypatch.setenv('ODOO_PASSWORD_TEST', 'secret')
+
+    env = sync_branches.branch_environment(branch('north', 'branch_north', env={'ODOO_WORKERS': '3'}))
+
+    assert 'ODOO_UID' not in env
+    assert env['SUPABASE_URL'] == 'https://runner.supabase.co'
+    assert env['SUPABASE_SCHEMA'] == 'branch_north'
+    assert env['ODOO_PASSWORD'] == 'secret'
+    assert env['ODOO_WORKERS'] == '3'
+    assert env['SYNC_STATE_FILE'] == str(tmp_path / 'north' / 'sync_state.json')
+
+
+def test_missing_secret_variable_fails_the_branch(monkeypatch):
+    monkeypatch.delenv('ODOO_PASSWORD_TEST', raising=False)
+    with pytest.raises(ValueError, match='ODOO_PASSWORD_TEST'):
+        sync_branches.branch_environment(branch('north', 'branch_north'))
@@ -0,0 +1,59 @@
+"""مقاييس التشغيل: التجميع لكل (كيان، طور) وتصدير JSON و Prometheus"""
+
+import contextvars
+import json
+import threading
+
+from sync_metrics import COUNTERS, RunMetrics, current_entity, write_json_report, write_prometheus_textfile
+
+
+def test_counters_accumulate_per_entity_and_phase():
+    metrics = RunMetrics()
+    metrics.add('read', 'customers', calls=1, rows_in=100)
+    metrics.add('read', 'customers', calls=1, rows_in=50)
+    with metrics.timed('insert', 'customers') as counters:
+        counters['rows_out'] = 150
+    
+    report = metrics.report()
+    customers = report['entities']['customers']
+    assert list(customers) == ['read', 'insert']  # بترتيب PHASES
+    assert (customers['read']['calls'], customers['read']['rows_in']) == (2, 150)
+    assert customers['insert']['rows_out'] == 150
+    assert customers['insert']['seconds'] >= 0
+
+
+def test_entity_is_inherited_by_threads_started_in_copied_context():
+    metrics = RunMetrics()
+    
+    def stage():
+        current_entity.set('products')
+        worker = threading.Thread(target=contextvars.copy_context().run,
+                                  args=(metrics.add, 'search'), kwargs={'calls': 1})
+        worker.start()
+        worker.join()
+    
+    contextvars.copy_context().run(stage)
+    metrics.add('count', calls=1)
+    one_call = {**dict.fromkeys(COUNTERS, 0), 'calls': 1}
+    assert metrics.report()['entities'] == {'-': {'count': one_call}, 'products': {'search': one_call}}
+
+
+def test_failed_stage_marks_run_failed_in_both_reports(tmp_path):
+    metrics = RunMetrics()
+    metrics.add('read', 'inventory', calls=3)
+    metrics.stage_finished('inventory', 'ok', 1.5)
+    metrics.stage_finished('sales_orders', 'failed', 0.2)
+    report = metrics.report(mode='incremental')
+    assert report['status'] == 'failed' and report['mode'] == 'incremental'
+    
+    json_path = tmp_path / 'report.json'
+    write_json_report(str(json_path), report)
+    assert json.loads(json_path.read_text(encoding='utf-8'))['stages']['sales_orders']['status'] == 'failed'
+    
+    prom_path = tmp_path / 'metrics' / 'sync.prom'
+    write_prometheus_textfile(str(prom_path), report)
+    lines = prom_path.read_text(encoding='utf-8').splitlines()
+    assert 'aumet_sync_run_success 0' in lines
+    assert 'aumet_sync_stage_success{stage="inventory"} 1' in lines
+    assert 'aumet_sync_stage_success{stage="sales_orders"} 0' in lines
+    assert 'aumet_sync_phase_calls{entity="inventory",phase="read"} 3' in lines
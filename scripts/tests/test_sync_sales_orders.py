@@ -0,0 +1,68 @@
+"""مزامنة طلبات المبيعات عبر Odoo و PostgREST الوهميين"""
+
+
+def order(order_id, write_date, amount=100.0, date_order=None):
+    return {
+        'id': order_id,
+        'name': f'POS/{order_id:06d}',
+        'partner_id': False,
+        'date_order': date_order or write_date,
+        'amount_total': amount,
+        'state': 'paid',
+        'write_date': write_date,
+    }
+
+
+def stored_orders(postgrest):
+    return {row['aumet_id']: row for row in postgrest.tables.get('aumet_sales_orders', [])}
+
+
+def test_incremental_run_resumes_after_tied_write_date(sync, odoo, fake_odoo, supabase, postgrest):
+    orders = fake_odoo.dataset['pos.order']
+    orders += [order(1, '2024-01-01 10:00:00'), order(2, '2024-01-01 12:00:00'), order(3, '2024-01-01 12:00:00')]
+    
+    sync.sync_sales_orders(odoo, supabase)
+    assert set(stored_orders(postgrest)) == {1, 2, 3}
+    assert sync.load_state()['sales_orders'] == {'write_date': '2024-01-01 12:00:00', 'id': 3}
+    
+    # طلب جديد بنفس write_date وid أكبر، وتعديل لاحق لطلب قديم
+    orders.append(order(4, '2024-01-01 12:00:00'))
+    orders[0] = order(1, '2024-01-02 08:00:00', amount=55.0)
+    fake_odoo.records_served.clear()
+    
+    sync.sync_sales_orders(odoo, supabase)
+    
+    assert fake_odoo.records_served['pos.order'] == 2
+    assert set(stored_orders(postgrest)) == {1, 2, 3, 4}
+    assert stored_orders(postgrest)[1]['amount_total'] == 55.0
+    assert sync.load_state()['sales_orders'] == {'write_date': '2024-01-02 08:00:00', 'id': 1}
+
+
+def test_order_turned_return_is_deleted_incrementally(sync, odoo, fake_odoo, supabase, postgrest):
+    orders = fake_odoo.dataset['pos.order']
+    orders += [order(1, '2024-01-01 10:00:00'), order(2, '2024-01-01 11:00:00')]
+    sync.sync_sales_orders(odoo, supabase)
+    
+    orders[1] = order(2, '2024-01-03 09:00:00', amount=-20.0)
+    sync.sync_sales_orders(odoo, supabase)
+    
+    assert set(stored_orders(postgrest)) == {1}
+
+
+def test_window_updates_its_days_only(sync, odoo, fake_odoo, supabase, postgrest):
+    orders = fake_odoo.dataset['pos.order']
+    orders += [order(1, '2024-01-01 10:00:00'), order(2, '2024-01-05 10:00:00'), order(3, '2024-01-09 10:00:00')]
+    sync.sync_sales_orders(odoo, supabase)
+    watermark = sync.load_state()['sales_orders']
+    
+    orders[0] = order(1, '2024-01-01 10:00:00', amount=10.0)
+    orders[1] = order(2, '2024-01-05 10:00:00', amount=20.0)
+    orders[2] = order(3, '2024-01-09 10:00:00', amount=30.0)
+    fake_odoo.records_served.clear()
+    
+    sync.sync_sales_orders(odoo, supabase, window=('2024-01-04', '2024-01-06'))
+    
+    assert fake_odoo.records_served['pos.order'] == 1
+    assert [stored_orders(postgrest)[i]['amount_total'] for i in (1, 2, 3)] == [100.0, 20.0, 100.0]
+    assert sync.load_state()['sales_orders'] == watermark
+    assert sync.load_state()['sales_aggregates_pending'] == ['2024-01-05']
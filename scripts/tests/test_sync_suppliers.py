@@ -0,0 +1,81 @@
+"""عزل صفوف الموردين المعطوبة: التقسيم فقط عند أخطاء الصفوف (SQLSTATE 22/23)"""
+
+import pytest
+from postgrest.exceptions import APIError
+
+import sync_suppliers
+
+
+class SuppliersTable:
+    """جدول suppliers يرفض الدفعة كلها إذا احتوت صفاً يحدده reject"""
+
+    def __init__(self, reject):
+        self.reject = reject
+        self.requests = []
+        self.rows = {}
+
+    def table(self, name):
+        assert name == 'suppliers'
+        return self
+
+    def upsert(self, rows, on_conflict):
+        self._pending = (rows, on_conflict)
+        return self
+
+    def execute(self):
+        rows, on_conflict = self._pending
+        self.requests.append(len(rows))
+        for row in rows:
+            error = self.reject(row)
+            if error is not None:
+                raise error
+        self.rows.update((row[on_conflict], row) for row in rows)
+
+
+def api_error(code):
+    return APIError({'code': code, 'message': f'error {code}', 'details': None, 'hint': None})
+
+
+def rows(count):
+    return [{'odoo_partner_id': i, 'name': f'supplier {i}'} for i in range(count)]
+
+
+@pytest.mark.parametrize('code', ['23505', '23502', '22001', '22P02'])
+def test_row_errors_are_bisected_to_the_failing_row(code):
+    bad = {37}
+    client = SuppliersTable(lambda row: api_error(code) if row['odoo_partner_id'] in bad else None)
+    failed = sync_suppliers.upsert_isolated(client, rows(64), 'odoo_partner_id')
+    
+    assert [(row['odoo_partner_id'], error.code) for row, error in failed] == [(37, code)]
+    assert set(client.rows) == set(range(64)) - bad
+    # صف معطوب واحد يكلف طلبين لكل مستوى من مستويات التقسيم
+    assert len(client.requests) == 1 + 2 * 6
+
+
+def test_several_bad_rows_are_all_reported():
+    bad = {0, 5, 6, 63}
+    client = SuppliersTable(lambda row: api_error('23514') if row['odoo_partner_id'] in bad else None)
+    failed = sync_suppliers.upsert_isolated(client, rows(64), 'odoo_partner_id')
+    assert sorted(row['odoo_partner_id'] for row, _ in failed) == sorted(bad)
+    assert len(client.rows) == 60
+
+
+@pytest.mark.parametrize('error', [
+    api_error('42P10'),          # on_conflict بدون قيد فريد مطابق
+    api_error('42501'),          # صلاحيات
+    api_error('PGRST301'),       # JWT غير صالح
+    TimeoutError('read timed out'),
+    ConnectionResetError(),
+])
+def test_batch_wide_errors_are_raised_after_one_request(error):
+    client = SuppliersTable(lambda row: error)
+    with pytest.raises(type(error)):
+        sync_suppliers.upsert_isolated(client, rows(500), 'odoo_partner_id')
+    assert client.requests == [500]
+
+
+def test_is_row_error():
+    assert sync_suppliers.is_row_error(api_error('23505'))
+    assert sync_suppliers.is_row_error(api_error('22003'))
+    assert not sync_suppliers.is_row_error(api_error('42P10'))
+    assert not sync_suppliers.is_row_error(ValueError('no code'))
@@ -0,0 +1,56 @@
+"""الكتابة المتزامنة للدفعات (write_stream): الترتيب ونقاط الاستئناف"""
+
+import time
+
+import pytest
+
+
+def pages(count, size=5):
+    for page in range(count):
+        yield [{'aumet_id': page * size + i, 'name': f'P{page * size + i}'} for i in range(size)]
+
+
+def prepare(rows):
+    return rows, lambda: None
+
+
+def test_concurrent_upserts_complete_in_order(sync, supabase, postgrest, monkeypatch):
+    monkeypatch.setattr(sync, 'SUPABASE_WRITE_CONCURRENCY', 4)
+    postgrest.latency = 0.2
+    written = []
+
+    started = time.monotonic()
+    sync.write_stream(supabase, 'aumet_products', pages(8), prepare, 'aumet_id', on_written=written.append)
+    elapsed = time.monotonic() - started
+
+    assert written == list(range(8))
+    assert len(postgrest.tables['aumet_products']) == 40
+    # 8 طلبات × 0.2s تسلسلياً = 1.6s
+    assert elapsed < 1.2
+
+
+def test_fetch_failure_waits_for_sent_batches(sync, supabase, postgrest, monkeypatch):
+    monkeypatch.setattr(sync, 'SUPABASE_WRITE_CONCURRENCY', 4)
+    postgrest.latency = 0.1
+    written = []
+
+    def failing_pages():
+        yield from pages(3)
+        raise ConnectionError('odoo dropped')
+
+    with pytest.raises(ConnectionError):
+        sync.write_stream(supabase, 'aumet_products', failing_pages(), prepare, 'aumet_id',
+                          on_written=written.append)
+
+    assert written == [0, 1, 2]
+    assert len(postgrest.tables['aumet_products']) == 15
+
+
+def test_inserts_stay_serial(sync, supabase, postgrest, monkeypatch):
+    monkeypatch.setattr(sync, 'SUPABASE_WRITE_CONCURRENCY', 4)
+    written = []
+
+    sync.write_stream(supabase, 'aumet_products_staging', pages(3), prepare, on_written=written.append)
+
+    assert written == [0, 1, 2]
+    assert len(postgrest.tables['aumet_products_staging']) == 15
@@ -78,6 +78,25 @@ export const appRouter = router({
       .query(async ({ input }) => {
         return await supabaseDb.getYearlySales(input.year);
       }),
+
+    // إجماليات يومية لفترة (جدول aumet_sales_daily)
+    getDailyTotals: publicProcedure
+      .input(z.object({
+        startDate: z.string(),
+        endDate: z.string(),
+      }))
+      .query(async ({ input }) => {
+        return await supabaseDb.getDailySalesTotals(input.startDate, input.endDate);
+      }),
+
+    // إجماليات شهرية لسنة (جدول aumet_sales_monthly)
+    getMonthlyTotals: publicProcedure
+      .input(z.object({
+        year: z.number(),
+      }))
+      .query(async ({ input }) => {
+        return await supabaseDb.getMonthlySalesTotals(input.year);
+      }),
   }),
 
   // تقارير المنتجات
@@ -3,7 +3,14 @@
  */
 
 import { createClient } from '@supabase/supabase-js';
-import { SUPABASE_CONFIG, type SalesOrder, type ReportFilters, type SalesStats } from '../shared/supabase';
+import {
+  SUPABASE_CONFIG,
+  type SalesOrder,
+  type ReportFilters,
+  type SalesStats,
+  type DailySalesTotals,
+  type MonthlySalesTotals,
+} from '../shared/supabase';
 
 // إنشاء عميل Supabase
 const supabase = createClient(SUPABASE_CONFIG.url, SUPABASE_CONFIG.anonKey);
@@ -151,3 +158,41 @@ export async function getYearlySales(year: number): Promise<SalesOrder[]> {
 
   return data || [];
 }
+
+/**
+ * إجماليات المبيعات اليومية لفترة (من الجدول المُجمّع بدل قراءة كل الطلبات)
+ */
+export async function getDailySalesTotals(startDate: string, endDate: string): Promise<DailySalesTotals[]> {
+  const { data, error } = await supabase
+    .from('aumet_sales_daily')
+    .select('sale_date, order_count, revenue, avg_basket, return_count, return_amount, net_revenue')
+    .gte('sale_date', startDate)
+    .lte('sale_date', endDate)
+    .order('sale_date', { ascending: true });
+
+  if (error) {
+    console.error('Error fetching daily sales totals:', error);
+    throw error;
+  }
+
+  return data || [];
+}
+
+/**
+ * إجماليات المبيعات الشهرية لسنة
+ */
+export async function getMonthlySalesTotals(year: number): Promise<MonthlySalesTotals[]> {
+  const { data, error } = await supabase
+    .from('aumet_sales_monthly')
+    .select('month, order_count, revenue, avg_basket, return_count, return_amount, net_revenue')
+    .gte('month', `${year}-01-01`)
+    .lte('month', `${year}-12-01`)
+    .order('month', { ascending: true });
+
+  if (error) {
+    console.error('Error fetching monthly sales totals:', error);
+    throw error;
+  }
+
+  return data || [];
+}
@@ -51,3 +51,24 @@ export interface SalesStats {
   completedOrders: number;
   draftOrders: number;
 }
+
+/**
+ * إجماليات المبيعات ليوم أو شهر (aumet_sales_daily / aumet_sales_monthly)
+ * تُحدّثها المزامنة تزايدياً؛ المرتجعات منفصلة في return_count و return_amount
+ */
+export interface SalesTotals {
+  order_count: number;
+  revenue: number;
+  avg_basket: number;
+  return_count: number;
+  return_amount: number;
+  net_revenue: number;
+}
+
+export interface DailySalesTotals extends SalesTotals {
+  sale_date: string;
+}
+
+export interface MonthlySalesTotals extends SalesTotals {
+  month: string;
+}
@@ -3,8 +3,11 @@
 سكريبت بسيط للتحقق من عدد sale.order في Odoo
 """
 
-import xmlrpc.client
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from odoo_client import OdooClient
 
 # قراءة المتغيرات البيئية يدوياً
 def load_env_file(filepath):
@@ -34,13 +37,14 @@ print(f"📍 Database: {ODOO_DB}")
 print(f"📍 Username: {ODOO_USERNAME}")
 print("=" * 60)
 
-# الاتصال بـ Odoo
-common = xmlrpc.client.ServerProxy(f'{ODOO_URL}/xmlrpc/2/common')
-models = xmlrpc.client.ServerProxy(f'{ODOO_URL}/xmlrpc/2/object')
+# الاتصال بـ Odoo (xmlrpc أو jsonrpc حسب ODOO_PROTOCOL في .env.sync)
+# بدون ذاكرة الجلسة: سكريبت التشخيص يجب أن يختبر تسجيل الدخول فعلياً ولا يكتب .odoo_session.json
+odoo = OdooClient(ODOO_URL, ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD,
+                  protocol=env.get('ODOO_PROTOCOL', 'xmlrpc'), session_cache=None)
 
 # المصادقة
 print("\n🔐 المصادقة...")
-uid = common.authenticate(ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD, {})
+uid, _ = odoo.authenticate()
 print(f"✅ تم تسجيل الدخول بنجاح! UID: {uid}")
 
 # 1. استخدام search_count للحصول على العدد الكلي
@@ -48,8 +52,7 @@ print("\n" + "=" * 60)
 print("📊 الطريقة 1: استخدام search_count")
 print("=" * 60)
 
-total_count = models.execute_kw(
-    ODOO_DB, uid, ODOO_PASSWORD,
+total_count = odoo.execute_kw(
     'sale.order', 'search_count',
     [[]]  # بدون فلاتر = جميع الطلبات
 )
@@ -60,8 +63,7 @@ print("\n" + "=" * 60)
 print("📊 الطريقة 2: استخدام search مع limit=100000")
 print("=" * 60)
 
-order_ids = models.execute_kw(
-    ODOO_DB, uid, ODOO_PASSWORD,
+order_ids = odoo.execute_kw(
     'sale.order', 'search',
     [[]],
     {'limit': 100000}
@@ -73,8 +75,7 @@ print("\n" + "=" * 60)
 print("📊 الطريقة 3: استخدام search بدون limit")
 print("=" * 60)
 
-order_ids_no_limit = models.execute_kw(
-    ODOO_DB, uid, ODOO_PASSWORD,
+order_ids_no_limit = odoo.execute_kw(
     'sale.order', 'search',
     [[]]
 )
@@ -93,8 +94,7 @@ print("📄 تفاصيل أول طلب:")
 print("=" * 60)
 
 if order_ids:
-    first_order = models.execute_kw(
-        ODOO_DB, uid, ODOO_PASSWORD,
+    first_order = odoo.execute_kw(
         'sale.order', 'read',
         [order_ids[:1]],
         {'fields': ['id', 'name', 'partner_id', 'amount_total', 'state', 'date_order']}